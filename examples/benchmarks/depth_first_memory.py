@@ -0,0 +1,81 @@
+"""Peak memory and run time of a converted convolutional SNN on a long sequence, for a
+regular forward pass and for `depth_first_forward` with different chunk sizes.
+
+Each configuration runs in a separate process, whose peak resident memory is reported,
+together with the estimate of `Network.estimate_memory`.
+
+Usage:
+    python depth_first_memory.py
+"""
+
+import multiprocessing
+import resource
+import time
+
+import torch
+import torch.nn as nn
+
+import sinabs
+
+BATCH_SIZE = 1
+TIME_STEPS = 1000
+INPUT_SHAPE = (2, 64, 64)
+CHUNK_SIZES = (1, 10, 100)
+
+
+def make_snn():
+    torch.manual_seed(0)
+    ann = nn.Sequential(
+        nn.Conv2d(2, 16, kernel_size=3, padding=1, bias=False),
+        nn.ReLU(),
+        nn.AvgPool2d(2),
+        nn.Conv2d(16, 32, kernel_size=3, padding=1, bias=False),
+        nn.ReLU(),
+        nn.AvgPool2d(2),
+        nn.Flatten(),
+        nn.Linear(32 * 16 * 16, 10, bias=False),
+        nn.ReLU(),
+    )
+    return sinabs.from_model(ann, batch_size=BATCH_SIZE).spiking_model
+
+
+def run(chunk_size, queue):
+    snn = make_snn()
+    input_data = (torch.rand(BATCH_SIZE, TIME_STEPS, *INPUT_SHAPE) < 0.05).float()
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    with torch.no_grad():
+        if chunk_size is None:
+            output = snn(input_data.flatten(0, 1)).sum(0)
+        else:
+            output = sinabs.depth_first_forward(
+                snn, input_data, chunk_size=chunk_size, sum_over_time=True
+            )[0]
+    duration = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((output.tolist(), (peak - baseline) / 2**10, duration))
+
+
+if __name__ == "__main__":
+    context = multiprocessing.get_context("spawn")
+    print(f"{BATCH_SIZE} x {TIME_STEPS} x {INPUT_SHAPE} input")
+    network = sinabs.Network(
+        spiking_model=make_snn(), input_shape=INPUT_SHAPE, batch_size=BATCH_SIZE
+    )
+    print(
+        f"{'execution':>18} {'peak memory [MiB]':>18} {'estimate [MiB]':>15} "
+        f"{'time [s]':>9}"
+    )
+    reference = None
+    for chunk_size in (None, *CHUNK_SIZES):
+        queue = context.Queue()
+        process = context.Process(target=run, args=(chunk_size, queue))
+        process.start()
+        output, memory, duration = queue.get()
+        process.join()
+        if reference is None:
+            reference = output
+        assert torch.allclose(torch.tensor(output), torch.tensor(reference))
+        name = "forward" if chunk_size is None else f"depth-first, {chunk_size:>3}"
+        estimate = network.estimate_memory(BATCH_SIZE, TIME_STEPS, chunk_size) / 2**20
+        print(f"{name:>18} {memory:18.1f} {estimate:15.1f} {duration:9.2f}")
@@ -0,0 +1,83 @@
+"""Compare full-length simulation of a converted rate-coded classifier with early exit, where
+each sample is only simulated until its output spike counts decide the class.
+
+A small ANN is trained on synthetic data of clusters with varying difficulty, converted
+with `sinabs.from_model` and simulated with constant input for `TIME_STEPS` time steps.
+
+Usage:
+    python early_exit.py
+"""
+
+import time
+
+import torch
+import torch.nn as nn
+
+import sinabs
+from sinabs import early_exit_inference
+
+N_FEATURES = 32
+N_CLASSES = 10
+N_SAMPLES = 512
+TIME_STEPS = 200
+CHUNK_SIZE = 10
+MARGINS = (2, 5, 10)
+
+
+def make_data(n_samples, centers):
+    labels = torch.randint(N_CLASSES, (n_samples,))
+    # Noise level varies from sample to sample, so some samples are easier than others
+    noise = torch.rand(n_samples, 1) * 1.5
+    data = centers[labels] + noise * torch.randn(n_samples, N_FEATURES)
+    return data, labels
+
+
+def train_ann(data, labels):
+    ann = nn.Sequential(
+        nn.Linear(N_FEATURES, 128),
+        nn.ReLU(),
+        nn.Linear(128, 128),
+        nn.ReLU(),
+        nn.Linear(128, N_CLASSES),
+        nn.ReLU(),
+    )
+    optimizer = torch.optim.Adam(ann.parameters(), lr=1e-3)
+    for _ in range(300):
+        optimizer.zero_grad()
+        nn.functional.cross_entropy(ann(data), labels).backward()
+        optimizer.step()
+    return ann
+
+
+if __name__ == "__main__":
+    torch.manual_seed(0)
+    centers = torch.randn(N_CLASSES, N_FEATURES)
+    ann = train_ann(*make_data(4096, centers))
+    data, labels = make_data(N_SAMPLES, centers)
+    # Scale inputs so that output neurons fire at moderate rates
+    snn_input = (data / 10).unsqueeze(1).expand(-1, TIME_STEPS, -1)
+    snn = sinabs.from_model(ann, batch_size=N_SAMPLES).spiking_model
+
+    with torch.no_grad():
+        print(f"ANN accuracy: {(ann(data).argmax(1) == labels).float().mean():.1%}")
+        sinabs.reset_states(snn)
+        start = time.perf_counter()
+        output = snn(snn_input.flatten(0, 1)).unflatten(0, (N_SAMPLES, TIME_STEPS))
+        duration = time.perf_counter() - start
+    accuracy = (output.sum(1).argmax(1) == labels).float().mean()
+    print(
+        f"{'margin':>8} {'accuracy':>9} {'mean steps':>11} {'time [ms]':>10} {'speedup':>8}"
+    )
+    print(f"{'full':>8} {accuracy:9.1%} {TIME_STEPS:11d} {duration * 1e3:10.1f}")
+
+    for margin in MARGINS:
+        start = time.perf_counter()
+        counts, steps = early_exit_inference(
+            snn, snn_input, chunk_size=CHUNK_SIZE, margin=margin
+        )
+        early_duration = time.perf_counter() - start
+        accuracy = (counts.argmax(1) == labels).float().mean()
+        print(
+            f"{margin:8d} {accuracy:9.1%} {steps.float().mean():11.1f} "
+            f"{early_duration * 1e3:10.1f} {duration / early_duration:7.1f}x"
+        )
@@ -0,0 +1,67 @@
+"""Compare dense and event-driven sparse simulation of IAF layers at different input activity.
+
+The dense simulation updates every neuron at every time step. The sparse simulation
+(`iaf_forward_sparse`) only updates neurons that receive input, so it is faster for very sparse
+input, such as from event cameras. The crossover point is the input activity, i.e. the fraction
+of neurons receiving input per time step, above which the dense simulation is faster.
+
+Usage:
+    python iaf_sparse_crossover.py
+"""
+
+import time
+
+import torch
+
+import sinabs.layers as sl
+from sinabs.layers.functional import events_to_sparse, sparse_to_events
+
+BATCH_SIZE = 4
+TIME_STEPS = 100
+NEURON_SHAPE = (2, 128, 128)
+ACTIVITIES = (0.001, 0.003, 0.01, 0.03, 0.1, 0.3)
+
+
+def measure_time(fn, *args, repeats=3):
+    fn(*args)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn(*args)
+    return (time.perf_counter() - start) / repeats
+
+
+def run(layer, input_data):
+    layer.reset_states()
+    return layer(input_data)
+
+
+if __name__ == "__main__":
+    dense_layer = sl.IAF()
+    sparse_layer = sl.IAF(shape=(BATCH_SIZE, *NEURON_SHAPE))
+    print(
+        f"{BATCH_SIZE} x {TIME_STEPS} x {NEURON_SHAPE} IAF neurons, "
+        f"{torch.get_num_threads()} threads"
+    )
+    print(f"{'activity':>8} {'dense [ms]':>11} {'sparse [ms]':>12} {'speedup':>8}")
+    crossover = None
+    for activity in ACTIVITIES:
+        mask = torch.rand(BATCH_SIZE, TIME_STEPS, *NEURON_SHAPE) < activity
+        input_data = mask * torch.rand(mask.shape)
+        # Events are usually already available in sparse form, so conversions are not timed
+        events = sparse_to_events(input_data.to_sparse())
+
+        with torch.no_grad():
+            output_events = run(sparse_layer, events)
+            output_sparse = events_to_sparse(output_events, sparse_layer.v_mem.shape)
+            assert torch.equal(run(dense_layer, input_data), output_sparse.to_dense())
+            dense = measure_time(run, dense_layer, input_data)
+            sparse = measure_time(run, sparse_layer, events)
+
+        if sparse > dense and crossover is None:
+            crossover = activity
+        print(
+            f"{activity:8.1%} {dense * 1e3:11.1f} {sparse * 1e3:12.1f} "
+            f"{dense / sparse:7.1f}x"
+        )
+    if crossover is not None:
+        print(f"Dense simulation is faster from {crossover:.1%} input activity")
@@ -0,0 +1,89 @@
+"""Count memory allocations per time step of the LIF forward pass during inference.
+
+Compares the generic step-by-step simulation (`lif_forward_single` in a loop) with the in-place
+inference path `lif_forward_inplace`, which `lif_forward` uses when no gradients are needed.
+
+Usage:
+    python lif_inference_allocations.py
+"""
+
+import time
+
+import torch
+from torch.profiler import ProfilerActivity, profile
+
+import sinabs.activation as sa
+from sinabs.layers.functional.lif import lif_forward_inplace, lif_forward_single
+
+BATCH_SIZE = 8
+TIME_STEPS = 100
+NEURON_SHAPE = (16, 32, 32)
+
+
+def generic_loop(input_data, params, state):
+    output = []
+    for step in range(input_data.shape[1]):
+        spikes, state = lif_forward_single(
+            input_data=input_data[:, step],
+            surrogate_grad_fn=sa.SingleExponential(),
+            state=state,
+            **params,
+        )
+        output.append(spikes)
+    return torch.stack(output, 1)
+
+
+def inplace(input_data, params, state):
+    return lif_forward_inplace(input_data=input_data, state=state, **params)[0]
+
+
+def count_allocations(fn, *args):
+    """Number of operator calls that allocate memory, and total allocated bytes."""
+    with profile(activities=[ProfilerActivity.CPU], profile_memory=True) as prof:
+        fn(*args)
+    allocations = [
+        event.self_cpu_memory_usage
+        for event in prof.events()
+        if event.self_cpu_memory_usage > 0
+    ]
+    return len(allocations), sum(allocations)
+
+
+def measure_time(fn, *args, repeats=5):
+    fn(*args)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn(*args)
+    return (time.perf_counter() - start) / repeats
+
+
+if __name__ == "__main__":
+    input_data = torch.rand(BATCH_SIZE, TIME_STEPS, *NEURON_SHAPE)
+    for tau_syn in (None, 10.0):
+        params = dict(
+            alpha_mem=torch.exp(torch.tensor(-1 / 20.0)),
+            alpha_syn=(
+                None if tau_syn is None else torch.exp(torch.tensor(-1 / tau_syn))
+            ),
+            spike_threshold=torch.tensor(1.0),
+            spike_fn=sa.MultiSpike,
+            reset_fn=sa.MembraneSubtract(),
+            min_v_mem=torch.tensor(-1.0),
+            norm_input=True,
+        )
+        state = {"v_mem": torch.zeros(BATCH_SIZE, *NEURON_SHAPE)}
+        if tau_syn is not None:
+            state["i_syn"] = torch.zeros(BATCH_SIZE, *NEURON_SHAPE)
+
+        print(f"tau_syn={tau_syn}")
+        for name, fn in (("generic loop", generic_loop), ("in-place", inplace)):
+            with torch.inference_mode():
+                n_alloc, n_bytes = count_allocations(
+                    fn, input_data, params, dict(state)
+                )
+                duration = measure_time(fn, input_data, params, dict(state))
+            print(
+                f"  {name:>12}: {n_alloc / TIME_STEPS:6.2f} allocations per step, "
+                f"{n_bytes / TIME_STEPS / 1e6:6.2f} MB per step, "
+                f"{duration * 1e3:8.2f} ms per forward pass"
+            )
@@ -0,0 +1,97 @@
+"""Throughput of a deep convolutional SNN on a long sequence, for `depth_first_forward` and
+for `pipelined_forward` with different numbers of pipeline stages.
+
+Each stage runs in its own thread, and each operation is limited to a single thread, so
+that the speedup over `depth_first_forward` shows the gain from pipelining alone. It is
+bounded by the number of available CPU cores, and by the share of time that is spent in
+Python, outside of PyTorch operations, while holding the global interpreter lock. That share
+is measured with the torch profiler and the resulting upper bound on the speedup is printed.
+
+Usage:
+    python pipelined_forward.py
+"""
+
+import os
+import time
+
+import torch
+import torch.nn as nn
+from torch.profiler import ProfilerActivity, profile
+
+import sinabs
+
+BATCH_SIZE = 4
+TIME_STEPS = 200
+CHUNK_SIZE = 10
+INPUT_SHAPE = (2, 32, 32)
+STAGES = (1, 2, 4, 8)
+
+
+def make_snn(depth=8, channels=16):
+    torch.manual_seed(0)
+    layers = [nn.Conv2d(2, channels, kernel_size=3, padding=1), nn.ReLU()]
+    for _ in range(depth - 1):
+        layers += [nn.Conv2d(channels, channels, kernel_size=3, padding=1), nn.ReLU()]
+    return sinabs.from_model(
+        nn.Sequential(*layers), batch_size=BATCH_SIZE
+    ).spiking_model
+
+
+def measure(function):
+    start = time.perf_counter()
+    output = function()
+    return output, time.perf_counter() - start
+
+
+def python_share(snn, input_data):
+    # Share of the time of `depth_first_forward` that is not spent in PyTorch operations
+    sinabs.reset_states(snn)
+    with profile(activities=[ProfilerActivity.CPU]) as prof:
+        _, duration = measure(
+            lambda: sinabs.depth_first_forward(
+                snn, input_data, chunk_size=CHUNK_SIZE, sum_over_time=True
+            )
+        )
+    operations = [
+        event
+        for event in prof.events()
+        if event.cpu_parent is None and event.name.startswith("aten::")
+    ]
+    return 1 - sum(event.cpu_time_total for event in operations) / 1e6 / duration
+
+
+if __name__ == "__main__":
+    torch.set_num_threads(1)
+    snn = make_snn()
+    input_data = (torch.rand(BATCH_SIZE, TIME_STEPS, *INPUT_SHAPE) < 0.1).float()
+
+    sinabs.reset_states(snn)
+    expected, reference = measure(
+        lambda: sinabs.depth_first_forward(
+            snn, input_data, chunk_size=CHUNK_SIZE, sum_over_time=True
+        )
+    )
+    print(f"CPU cores: {os.cpu_count()}, time steps: {BATCH_SIZE * TIME_STEPS}")
+    print(f"{'runner':>20} {'time [s]':>9} {'steps/s':>9} {'speedup':>8}")
+    print(
+        f"{'depth-first':>20} {reference:9.2f} "
+        f"{BATCH_SIZE * TIME_STEPS / reference:9.0f} {1:8.2f}"
+    )
+    for stages in STAGES:
+        sinabs.reset_states(snn)
+        output, duration = measure(
+            lambda: sinabs.pipelined_forward(
+                snn, input_data, CHUNK_SIZE, stages=stages, sum_over_time=True
+            )
+        )
+        assert torch.allclose(output, expected)
+        print(
+            f"{f'pipelined, {stages} stages':>20} {duration:9.2f} "
+            f"{BATCH_SIZE * TIME_STEPS / duration:9.0f} {reference / duration:8.2f}"
+        )
+
+    share = python_share(snn, input_data)
+    print(
+        f"Time spent in Python, holding the GIL: {share:.0%}. "
+        f"The speedup is below {1 / share:.1f} for any number of stages."
+    )
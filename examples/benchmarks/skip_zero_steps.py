@@ -0,0 +1,80 @@
+"""Speed-up from skipping time steps without input in a convolutional SNN, for event camera
+input where most time bins are silent.
+
+Compares a model of `IAFSqueeze` and convolutional and pooling layers with the same model
+where convolutional and pooling layers are wrapped in `SkipZeroSteps` and the spiking layers
+use `skip_zero_steps=True`.
+
+Usage:
+    python skip_zero_steps.py
+"""
+
+import time
+
+import torch
+import torch.nn as nn
+
+import sinabs.layers as sl
+
+BATCH_SIZE = 4
+TIME_STEPS = 100
+INPUT_SHAPE = (2, 64, 64)
+SILENT_FRACTIONS = (0.0, 0.5, 0.8, 0.95)
+
+
+def make_model(skip_zero_steps):
+    torch.manual_seed(0)
+
+    def wrap(module):
+        return sl.SkipZeroSteps(module) if skip_zero_steps else module
+
+    def spiking_layer():
+        return sl.IAFSqueeze(batch_size=BATCH_SIZE, skip_zero_steps=skip_zero_steps)
+
+    return nn.Sequential(
+        wrap(nn.Conv2d(2, 16, kernel_size=3, padding=1, bias=False)),
+        spiking_layer(),
+        wrap(sl.SumPool2d(2)),
+        wrap(nn.Conv2d(16, 32, kernel_size=3, padding=1, bias=False)),
+        spiking_layer(),
+        wrap(sl.SumPool2d(2)),
+        wrap(nn.Conv2d(32, 32, kernel_size=3, padding=1, bias=False)),
+        spiking_layer(),
+    )
+
+
+def measure_time(model, input_data, repeats=3):
+    for layer in model.modules():
+        if isinstance(layer, sl.StatefulLayer):
+            layer.reset_states()
+    model(input_data)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        model(input_data)
+    return (time.perf_counter() - start) / repeats
+
+
+if __name__ == "__main__":
+    model = make_model(skip_zero_steps=False)
+    skipping_model = make_model(skip_zero_steps=True)
+    print(f"{BATCH_SIZE} x {TIME_STEPS} x {INPUT_SHAPE} input")
+    print(f"{'silent':>7} {'dense [ms]':>11} {'skipping [ms]':>14} {'speedup':>8}")
+    for silent_fraction in SILENT_FRACTIONS:
+        events = (torch.rand(BATCH_SIZE, TIME_STEPS, *INPUT_SHAPE) < 0.05).float()
+        # Silent time bins are the same for all samples, e.g. from recordings of a static scene
+        events[:, torch.rand(TIME_STEPS) < silent_fraction] = 0
+        input_data = events.flatten(0, 1)
+        with torch.no_grad():
+            for layer in skipping_model.modules():
+                if isinstance(layer, sl.StatefulLayer):
+                    layer.reset_states()
+            for layer in model.modules():
+                if isinstance(layer, sl.StatefulLayer):
+                    layer.reset_states()
+            assert torch.equal(model(input_data), skipping_model(input_data))
+            dense = measure_time(model, input_data)
+            skipping = measure_time(skipping_model, input_data)
+        print(
+            f"{silent_fraction:7.0%} {dense * 1e3:11.1f} {skipping * 1e3:14.1f} "
+            f"{dense / skipping:7.1f}x"
+        )
@@ -0,0 +1,71 @@
+"""Compare dense and event-driven convolution of spikes at different input activity.
+
+`SparseConv2d` only processes non-zero inputs, so it is faster than `torch.nn.Conv2d` for
+very sparse input. The crossover point, i.e. the input activity above which the dense
+convolution is faster, depends on the hardware and the layer shape. Use it to choose
+`max_density`, above which `SparseConv2d` switches to the dense convolution.
+
+Usage:
+    python sparse_conv_crossover.py
+"""
+
+import time
+
+import torch
+import torch.nn as nn
+
+import sinabs.layers as sl
+from sinabs.layers.functional import sparse_conv2d
+
+BATCH_SIZE = 4
+TIME_STEPS = 50
+# (in_channels, out_channels, height and width)
+LAYERS = ((2, 16, 64), (16, 32, 32), (64, 64, 16))
+ACTIVITIES = (0.001, 0.003, 0.01, 0.02, 0.05)
+
+
+def measure_time(fn, *args, repeats=3):
+    fn(*args)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn(*args)
+    return (time.perf_counter() - start) / repeats
+
+
+if __name__ == "__main__":
+    print(f"{BATCH_SIZE} x {TIME_STEPS} time steps, {torch.get_num_threads()} threads")
+    for in_channels, out_channels, size in LAYERS:
+        torch.manual_seed(0)
+        conv = nn.Conv2d(in_channels, out_channels, kernel_size=3, padding=1)
+        sparse_conv = sl.SparseConv2d.from_conv(conv)
+        print(f"\nConv2d {in_channels} -> {out_channels} channels, {size} x {size}")
+        print(f"{'activity':>8} {'dense [ms]':>11} {'sparse [ms]':>12} {'speedup':>8}")
+        crossover = None
+        for activity in ACTIVITIES:
+            shape = (BATCH_SIZE * TIME_STEPS, in_channels, size, size)
+            spikes = (torch.rand(shape) < activity).float()
+            with torch.no_grad():
+                sparse_output = sparse_conv2d(
+                    spikes,
+                    sparse_conv.weight,
+                    sparse_conv.bias,
+                    padding=sparse_conv._reversed_padding_repeated_twice,
+                )
+                assert torch.allclose(conv(spikes), sparse_output, atol=1e-5)
+                dense = measure_time(conv, spikes)
+                sparse = measure_time(
+                    sparse_conv2d,
+                    spikes,
+                    sparse_conv.weight,
+                    sparse_conv.bias,
+                    sparse_conv.stride,
+                    sparse_conv._reversed_padding_repeated_twice,
+                )
+            if sparse > dense and crossover is None:
+                crossover = activity
+            print(
+                f"{activity:8.1%} {dense * 1e3:11.1f} {sparse * 1e3:12.1f} "
+                f"{dense / sparse:7.1f}x"
+            )
+        if crossover is not None:
+            print(f"Dense convolution is faster from {crossover:.1%} input activity")
@@ -0,0 +1,125 @@
+"""Memory of spikes in different formats, handed between the layers of a convolutional SNN
+during inference.
+
+Spiking layers emit float32 by default. With `spike_dtype`, spikes are emitted as uint8 or
+bool, pass through `SumPool2d` and the time reshaping layers unchanged and are only converted
+to float at the input of convolutional layers (`register_float_input_hooks`). For storage,
+binary spikes can be bit-packed with `pack_spikes`.
+
+The peak memory allocated during the forward pass of a single IAF layer is measured with the
+torch profiler, for the default engine and for `closed_form=True`.
+
+Usage:
+    python spike_format_memory.py
+"""
+
+import time
+
+import torch
+import torch.nn as nn
+from torch.profiler import ProfilerActivity, profile
+
+import sinabs.activation as sa
+import sinabs.layers as sl
+from sinabs.hooks import register_float_input_hooks
+from sinabs.layers.functional import pack_spikes
+
+BATCH_SIZE = 4
+TIME_STEPS = 50
+INPUT_SHAPE = (2, 64, 64)
+
+
+def make_model(spike_dtype):
+    torch.manual_seed(0)
+    return nn.Sequential(
+        nn.Conv2d(2, 16, kernel_size=3, padding=1, bias=False),
+        sl.IAFSqueeze(
+            batch_size=BATCH_SIZE, spike_fn=sa.SingleSpike, spike_dtype=spike_dtype
+        ),
+        sl.SumPool2d(2),
+        nn.Conv2d(16, 32, kernel_size=3, padding=1, bias=False),
+        sl.IAFSqueeze(
+            batch_size=BATCH_SIZE, spike_fn=sa.SingleSpike, spike_dtype=spike_dtype
+        ),
+    )
+
+
+def spike_bytes(model, input_data):
+    # Bytes of the outputs of all spiking and pooling layers
+    sizes = []
+
+    def hook(module, input_, output):
+        sizes.append(output.numel() * output.element_size())
+
+    handles = [
+        module.register_forward_hook(hook)
+        for module in model
+        if isinstance(module, (sl.StatefulLayer, sl.SumPool2d))
+    ]
+    start = time.perf_counter()
+    with torch.no_grad():
+        output = model(input_data)
+    duration = time.perf_counter() - start
+    for handle in handles:
+        handle.remove()
+    return output, sum(sizes), duration
+
+
+def peak_memory(function):
+    # Peak of CPU memory allocated by torch while `function` is running
+    with profile(activities=[ProfilerActivity.CPU], profile_memory=True) as prof:
+        function()
+    current = peak = 0
+    for event in sorted(prof.events(), key=lambda e: e.time_range.start):
+        if event.name == "[memory]":
+            current += event.cpu_memory_usage
+        else:
+            current += event.self_cpu_memory_usage
+        peak = max(peak, current)
+    return peak
+
+
+def layer_memory(closed_form, spike_dtype, input_data):
+    layer = sl.IAF(closed_form=closed_form, spike_dtype=spike_dtype)
+    with torch.no_grad():
+        output = layer(input_data)
+        layer.reset_states()
+        peak = peak_memory(lambda: layer(input_data))
+    return peak, output.numel() * output.element_size()
+
+
+if __name__ == "__main__":
+    input_data = torch.rand(BATCH_SIZE * TIME_STEPS, *INPUT_SHAPE) * 2
+    print(f"{BATCH_SIZE} x {TIME_STEPS} x {INPUT_SHAPE} input")
+    print(f"{'format':>8} {'spike memory [MiB]':>19} {'time [ms]':>10}")
+    reference = None
+    for spike_dtype in (None, torch.uint8, torch.bool):
+        model = make_model(spike_dtype)
+        register_float_input_hooks(model)
+        output, n_bytes, duration = spike_bytes(model, input_data)
+        if reference is None:
+            reference = output
+        assert torch.equal(output.float(), reference)
+        name = "float32" if spike_dtype is None else str(spike_dtype).split(".")[1]
+        print(f"{name:>8} {n_bytes / 2**20:19.1f} {duration * 1e3:10.1f}")
+
+    packed = pack_spikes(reference)
+    print(
+        f"Output spikes: {reference.numel() * 4 / 2**20:.1f} MiB as float32, "
+        f"{packed.numel() / 2**20:.2f} MiB bit-packed"
+    )
+
+    layer_input = torch.rand(BATCH_SIZE, TIME_STEPS, 16, 64, 64) * 2
+    print(
+        f"\nSingle IAF layer, {tuple(layer_input.shape)} input of "
+        f"{layer_input.numel() * 4 / 2**20:.1f} MiB"
+    )
+    print(f"{'engine':>12} {'format':>8} {'peak [MiB]':>11} {'output [MiB]':>13}")
+    for closed_form in (False, True):
+        for spike_dtype in (None, torch.uint8):
+            peak, n_bytes = layer_memory(closed_form, spike_dtype, layer_input)
+            engine = "closed form" if closed_form else "default"
+            name = "float32" if spike_dtype is None else "uint8"
+            print(
+                f"{engine:>12} {name:>8} {peak / 2**20:11.1f} {n_bytes / 2**20:13.1f}"
+            )
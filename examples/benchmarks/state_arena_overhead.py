@@ -0,0 +1,62 @@
+"""Overhead of a `StateArena` on forward passes, and its speedup of model-wide state
+operations, for a model with many small LIF layers.
+
+After each forward pass of a layer, the arena copies the new states into its views. This
+costs one copy of the states per forward call, which matters most for short inputs, such as
+single time steps, and becomes negligible for long sequences.
+
+Usage:
+    python state_arena_overhead.py
+"""
+
+import time
+
+import torch
+import torch.nn as nn
+
+import sinabs
+import sinabs.layers as sl
+
+NUM_LAYERS = 20
+NUM_NEURONS = 256
+BATCH_SIZE = 8
+REPEATS = 200
+
+
+def make_model():
+    torch.manual_seed(0)
+    layers = []
+    for _ in range(NUM_LAYERS):
+        layers += [nn.Linear(NUM_NEURONS, NUM_NEURONS), sl.LIF(tau_mem=20.0)]
+    return nn.Sequential(*layers)
+
+
+def measure(fn):
+    # Milliseconds per call, after warm-up
+    fn()
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        fn()
+    return (time.perf_counter() - start) / REPEATS * 1e3
+
+
+if __name__ == "__main__":
+    model = make_model()
+    arena_model = make_model()
+    arena = sinabs.StateArena(arena_model)
+
+    print(f"{'operation':>24} {'plain [ms]':>11} {'arena [ms]':>11}")
+    with torch.no_grad():
+        for time_steps in (1, 10, 100):
+            data = torch.rand(BATCH_SIZE, time_steps, NUM_NEURONS)
+            plain = measure(lambda: model(data))
+            with_arena = measure(lambda: arena_model(data))
+            name = f"forward, {time_steps} steps"
+            print(f"{name:>24} {plain:11.3f} {with_arena:11.3f}")
+
+        operations = {
+            "reset": (lambda: sinabs.reset_states(model), arena.reset),
+            "snapshot": (lambda: sinabs.snapshot_states(model), arena.snapshot),
+        }
+        for name, (plain_fn, arena_fn) in operations.items():
+            print(f"{name:>24} {measure(plain_fn):11.3f} {measure(arena_fn):11.3f}")
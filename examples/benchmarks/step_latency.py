@@ -0,0 +1,58 @@
+"""Measure the latency per time step of a convolutional SNN with batch size 1, as in
+closed-loop applications where each time step is processed as soon as its input arrives.
+
+Compares calling the model with input of a single time step, which goes through the full
+`forward` of each layer, with `Network.step`, which skips repeated shape checks and
+recomputation of decay factors.
+
+Usage:
+    python step_latency.py
+"""
+
+import time
+
+import torch
+import torch.nn as nn
+
+import sinabs.layers as sl
+from sinabs import Network
+
+TIME_STEPS = 2000
+INPUT_SHAPE = (2, 32, 32)
+
+
+def make_model():
+    return nn.Sequential(
+        nn.Conv2d(2, 8, kernel_size=3, padding=1, bias=False),
+        sl.LIFSqueeze(tau_mem=20.0, batch_size=1),
+        sl.SumPool2d(2),
+        nn.Conv2d(8, 16, kernel_size=3, padding=1, bias=False),
+        sl.LIFSqueeze(tau_mem=20.0, batch_size=1),
+        sl.SumPool2d(2),
+        nn.Flatten(),
+        nn.Linear(16 * 8 * 8, 10, bias=False),
+        sl.LIFSqueeze(tau_mem=20.0, batch_size=1),
+    )
+
+
+def measure_latency(fn, input_data):
+    # Microseconds per time step, after warm-up
+    for step in range(100):
+        fn(input_data[step])
+    start = time.perf_counter()
+    for step in range(TIME_STEPS):
+        fn(input_data[step])
+    return (time.perf_counter() - start) / TIME_STEPS * 1e6
+
+
+if __name__ == "__main__":
+    torch.manual_seed(0)
+    net = Network(spiking_model=make_model())
+    input_data = (torch.rand(TIME_STEPS, 1, *INPUT_SHAPE) < 0.05).float()
+    print(f"Batch size 1, input {INPUT_SHAPE}, {torch.get_num_threads()} threads")
+    with torch.no_grad():
+        forward = measure_latency(net, input_data)
+        net.reset_states()
+        step = measure_latency(net.step, input_data)
+    print(f"forward: {forward:7.1f} us/step")
+    print(f"step:    {step:7.1f} us/step ({forward / step:.1f}x faster)")
@@ -2,9 +2,21 @@ from pbr.version import VersionInfo
 
 __version__ = VersionInfo("sinabs").release_string()
 
-from . import conversion, utils
+from . import conversion, training, utils
 from .from_torch import from_model
+from .inference import depth_first_forward, early_exit_inference, pipelined_forward
 from .network import Network
 from .nir import from_nir, to_nir
+from .state_arena import StateArena
+from .state_bank import StateBank
 from .synopcounter import SNNAnalyzer, SynOpCounter
-from .utils import reset_states, set_batch_size, zero_grad
+from .utils import (
+    detach_states,
+    load_states,
+    reset_states,
+    restore_states,
+    save_states,
+    set_batch_size,
+    snapshot_states,
+    zero_grad,
+)
@@ -2,6 +2,7 @@ from .quantize import Quantize, StochasticRounding
 from .reset_mechanism import MembraneReset, MembraneSubtract
 from .spike_generation import MaxSpike, MultiSpike, SingleSpike
 from .surrogate_gradient_fn import (
+    CompactSurrogate,
     Gaussian,
     Heaviside,
     MultiGaussian,
@@ -3,13 +3,56 @@ from typing import Callable, List, Optional, Union
 
 import torch
 
+from .surrogate_gradient_fn import CompactSurrogate
+
 
 class BackwardClass:
+    @classmethod
+    def apply(cls, *args):
+        """Generate spikes. If no gradients are required, autograd is bypassed and spikes are
+        computed with plain tensor operations, without saving anything for the backward pass.
+
+        The last argument is expected to be the surrogate gradient function.
+        """
+        if not hasattr(cls, "generate_spikes") or (
+            torch.is_grad_enabled()
+            and any(torch.is_tensor(arg) and arg.requires_grad for arg in args)
+        ):
+            return super().apply(*args)
+        return cls.generate_spikes(*args[:-1])
+
+    @staticmethod
+    def save_surrogate(
+        ctx,
+        v_mem: torch.Tensor,
+        spike_threshold: Union[float, torch.Tensor],
+        surrogate_grad_fn: Callable,
+    ):
+        """Save what the backward pass needs to compute the surrogate gradient: the
+        membrane potential or, for a `CompactSurrogate`, the surrogate gradient itself.
+        """
+        ctx.spike_threshold = spike_threshold
+        ctx.surrogate_grad_fn = surrogate_grad_fn
+        if isinstance(surrogate_grad_fn, CompactSurrogate):
+            saved = surrogate_grad_fn.compress(v_mem, spike_threshold)
+            ctx.grad_shape = torch.broadcast_shapes(
+                v_mem.shape, torch.as_tensor(spike_threshold).shape
+            )
+            ctx.grad_dtype = v_mem.dtype
+            ctx.save_for_backward(*saved)
+        else:
+            ctx.save_for_backward(v_mem.clone())
+
     @staticmethod
     def backward(ctx, grad_output: torch.tensor):
         """"""
-        (v_mem,) = ctx.saved_tensors
-        grad = ctx.surrogate_grad_fn(v_mem, ctx.spike_threshold)
+        if isinstance(ctx.surrogate_grad_fn, CompactSurrogate):
+            grad = CompactSurrogate.decompress(
+                ctx.saved_tensors, ctx.grad_shape, ctx.grad_dtype
+            )
+        else:
+            (v_mem,) = ctx.saved_tensors
+            grad = ctx.surrogate_grad_fn(v_mem, ctx.spike_threshold)
         grad_input = grad_output * grad
         return grad_input, None, None, None
 
@@ -33,13 +76,17 @@ class MultiSpike(BackwardClass, torch.autograd.Function):
         surrogate_grad_fn: Callable,
     ):
         """"""
-        ctx.save_for_backward(v_mem.clone())
-        ctx.spike_threshold = spike_threshold
-        ctx.surrogate_grad_fn = surrogate_grad_fn
-        spikes = (v_mem > 0) * torch.div(
+        BackwardClass.save_surrogate(ctx, v_mem, spike_threshold, surrogate_grad_fn)
+        return MultiSpike.generate_spikes(v_mem, spike_threshold)
+
+    @staticmethod
+    def generate_spikes(
+        v_mem: torch.Tensor, spike_threshold: Union[float, torch.Tensor]
+    ) -> torch.Tensor:
+        """"""
+        return (v_mem > 0) * torch.div(
             v_mem, spike_threshold, rounding_mode="trunc"
         ).float()
-        return spikes
 
 
 class MaxSpikeInner(BackwardClass, torch.autograd.Function):
@@ -60,9 +107,18 @@ class MaxSpikeInner(BackwardClass, torch.autograd.Function):
         surrogate_grad_fn: Callable,
     ):
         """"""
-        ctx.save_for_backward(v_mem.clone())
-        ctx.spike_threshold = spike_threshold
-        ctx.surrogate_grad_fn = surrogate_grad_fn
+        BackwardClass.save_surrogate(ctx, v_mem, spike_threshold, surrogate_grad_fn)
+        return MaxSpikeInner.generate_spikes(
+            v_mem, max_num_spikes_per_bin, spike_threshold
+        )
+
+    @staticmethod
+    def generate_spikes(
+        v_mem: torch.Tensor,
+        max_num_spikes_per_bin: Optional[int],
+        spike_threshold: Union[float, torch.Tensor],
+    ) -> torch.Tensor:
+        """"""
         spikes = (v_mem > 0) * torch.div(
             v_mem, spike_threshold, rounding_mode="trunc"
         ).float()
@@ -116,8 +172,12 @@ class SingleSpike(BackwardClass, torch.autograd.Function):
         surrogate_grad_fn: Callable,
     ):
         """"""
-        ctx.save_for_backward(v_mem.clone())
-        ctx.spike_threshold = spike_threshold
-        ctx.surrogate_grad_fn = surrogate_grad_fn
-        spikes = (v_mem - spike_threshold >= 0).float()
-        return spikes
+        BackwardClass.save_surrogate(ctx, v_mem, spike_threshold, surrogate_grad_fn)
+        return SingleSpike.generate_spikes(v_mem, spike_threshold)
+
+    @staticmethod
+    def generate_spikes(
+        v_mem: torch.Tensor, spike_threshold: Union[float, torch.Tensor]
+    ) -> torch.Tensor:
+        """"""
+        return (v_mem - spike_threshold >= 0).float()
@@ -1,5 +1,6 @@
 import math
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Callable, Tuple
 
 import torch
 
@@ -128,3 +129,77 @@ class PeriodicExponential:
         surrogate = torch.exp(-torch.abs(vmem_new) / self.grad_width)
 
         return self.grad_scale * surrogate
+
+
+@dataclass
+class CompactSurrogate:
+    """Wrapper that evaluates a surrogate gradient function already during the forward pass
+    and saves the result compactly for the backward pass.
+
+    By default, spike functions save a full copy of the membrane potential at every time
+    step and evaluate the surrogate gradient function during the backward pass. With this
+    wrapper, the surrogate gradient is saved instead, in a lower precision data type and, if
+    most values are zero as for `Heaviside`, as indices and values of the non-zero entries.
+    Whichever format needs less memory is chosen at each step. For LIF and IAF layers whose time
+    constants are trained, the membrane potential is needed for their gradients and is saved
+    regardless, so that this wrapper does not reduce memory.
+
+    Example:
+        >>> layer = sinabs.layers.LIF(
+        ...     tau_mem=20.0, surrogate_grad_fn=CompactSurrogate(Heaviside(window=0.5))
+        ... )
+
+    Parameters:
+        surrogate_grad_fn: The surrogate gradient function to be evaluated
+        dtype: Data type in which surrogate gradients are saved
+        tolerance: Surrogate gradients with absolute value up to `tolerance` are set to zero,
+            such that functions without compact support, such as `SingleExponential`, can
+            be saved sparsely as well.
+    """
+
+    surrogate_grad_fn: Callable = field(default_factory=lambda: SingleExponential())
+    dtype: torch.dtype = torch.float16
+    tolerance: float = 0.0
+
+    def __call__(self, v_mem, spike_threshold):
+        return self.surrogate_grad_fn(v_mem, spike_threshold)
+
+    def compress(
+        self, v_mem: torch.Tensor, spike_threshold
+    ) -> Tuple[torch.Tensor, ...]:
+        """Surrogate gradient as a tuple with either the dense gradient or the flat indices
+        and values of its non-zero entries.
+
+        Parameters:
+            v_mem: Membrane potential
+            spike_threshold: Spike threshold
+        """
+        grad = self.surrogate_grad_fn(v_mem.detach(), spike_threshold)
+        if self.tolerance > 0:
+            grad = grad * (grad.abs() > self.tolerance)
+        grad = grad.to(self.dtype)
+
+        index_dtype = torch.int32 if grad.numel() < 2**31 else torch.int64
+        bytes_per_entry = grad.element_size()
+        bytes_per_nonzero = (
+            bytes_per_entry + torch.empty(0, dtype=index_dtype).element_size()
+        )
+        n_nonzero = int(torch.count_nonzero(grad))
+        if n_nonzero * bytes_per_nonzero >= grad.numel() * bytes_per_entry:
+            return (grad,)
+        flat_grad = grad.flatten()
+        indices = flat_grad.nonzero().squeeze(1)
+        return indices.to(index_dtype), flat_grad[indices]
+
+    @staticmethod
+    def decompress(
+        saved: Tuple[torch.Tensor, ...], shape: torch.Size, dtype: torch.dtype
+    ) -> torch.Tensor:
+        """Surrogate gradient of shape `shape` and data type `dtype` from the output of
+        `compress`."""
+        if len(saved) == 1:
+            return saved[0].to(dtype)
+        indices, values = saved
+        grad = torch.zeros(shape.numel(), dtype=dtype, device=values.device)
+        grad[indices.long()] = values.to(dtype)
+        return grad.view(shape)
@@ -68,6 +68,35 @@ def discretize_conv_spike_(
     return _discretize_conv_spk_(conv_lyr, spike_lyr, to_int=to_int)
 
 
+def fixed_point_conv_spike(
+    conv_lyr: nn.Conv2d, spike_lyr: sl.IAF
+) -> Tuple[sl.FixedPointConv2d, sl.IAF]:
+    """Discretize convolutional and spiking layers for fixed-point simulation.
+
+    This function discretizes copies of a 2D convolutional and a spiking layer like
+    `discretize_conv_spike` and returns them as layers that simulate the integer
+    arithmetic of DYNAP-CNN. Given the same integer input, their output is
+    bit-identical to what the layers deployed by `DynapcnnNetwork` produce.
+
+    Parameters
+    ----------
+    conv_lyr: nn.Conv2d
+        Convolutional layer
+    spike_lyr: sl.IAF
+        Spiking layer
+
+    Returns
+    -------
+    sl.FixedPointConv2d
+        Discretized copy of convolutional layer, computing on integers
+    sl.IAF
+        Discretized copy of spiking layer, with `fixed_point=True`
+    """
+    conv_discr, spike_discr = discretize_conv_spike(conv_lyr, spike_lyr, to_int=False)
+    spike_discr.fixed_point = True
+    return sl.FixedPointConv2d.from_conv(conv_discr), spike_discr
+
+
 def discretize_conv(
     layer: nn.Conv2d,
     spk_thr: float,
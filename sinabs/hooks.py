@@ -1,12 +1,18 @@
 from dataclasses import dataclass
 from functools import reduce
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 from warnings import warn
 
 import torch
 from torch import nn
+from torch.utils.hooks import RemovableHandle
 
-from sinabs.layers import SqueezeMixin, StatefulLayer
+from sinabs.layers import (
+    FixedPointConv2d,
+    SparseConv2d,
+    SqueezeMixin,
+    StatefulLayer,
+)
 
 
 def _extract_single_input(input_data: List[Any]) -> Any:
@@ -157,7 +163,7 @@ def firing_rate_hook(module: StatefulLayer, input_: Any, output: torch.Tensor):
         key 'firing_rate'. It is a scalar value.
     """
     data = get_hook_data_dict(module)
-    data["firing_rate"] = output.mean()
+    data["firing_rate"] = output.mean(dtype=_float_dtype(output))
 
 
 def firing_rate_per_neuron_hook(
@@ -185,10 +191,10 @@ def firing_rate_per_neuron_hook(
     data = get_hook_data_dict(module)
     if isinstance(module, SqueezeMixin):
         # Common dimension for batch and time
-        data["firing_rate_per_neuron"] = output.mean(0)
+        data["firing_rate_per_neuron"] = output.mean(0, dtype=_float_dtype(output))
     else:
         # Output is of shape (N, T, ...)
-        data["firing_rate_per_neuron"] = output.mean((0, 1))
+        data["firing_rate_per_neuron"] = output.mean((0, 1), dtype=_float_dtype(output))
 
 
 def conv_layer_synops_hook(
@@ -392,3 +398,47 @@ def register_synops_hooks(module: nn.Sequential, dt: Optional[float] = None):
             lyr.register_forward_hook(linear_layer_synops_hook)
     model_hook = ModelSynopsHook(dt)
     module.register_forward_hook(model_hook)
+
+
+def float_input_hook(module: nn.Module, input_: Tuple[Any, ...]) -> Tuple[Any, ...]:
+    """Forward pre-hook that converts integer and bool input, such as compact spikes from
+    layers with `spike_dtype`, to the data type of the weights of `module`.
+
+    Parameters:
+        module: A module with floating point weights, such as `nn.Conv2d` or `nn.Linear`
+        input_: Inputs to the module
+    Returns:
+        The inputs, converted where necessary
+    """
+    return tuple(
+        (
+            x.to(module.weight.dtype)
+            if torch.is_tensor(x) and not x.is_floating_point()
+            else x
+        )
+        for x in input_
+    )
+
+
+def register_float_input_hooks(model: nn.Module) -> List[RemovableHandle]:
+    """Register `float_input_hook` with all convolutional and linear layers of a model, such that
+    spiking layers can pass on spikes in a compact data type, which are only converted to float
+    right before they are needed. `SparseConv2d` layers accept compact spikes directly and are
+    skipped.
+
+    Parameters:
+        model: The model
+    Returns:
+        Handles of the hooks, which can be used to remove them
+    """
+    return [
+        module.register_forward_pre_hook(float_input_hook)
+        for module in model.modules()
+        if isinstance(module, (nn.modules.conv._ConvNd, nn.Linear))
+        and not isinstance(module, (FixedPointConv2d, SparseConv2d))
+    ]
+
+
+def _float_dtype(tensor: torch.Tensor) -> torch.dtype:
+    # Data type for reductions, such as the mean, of `tensor`
+    return tensor.dtype if tensor.is_floating_point() else torch.float32
@@ -0,0 +1,334 @@
+import queue
+import threading
+from contextlib import contextmanager
+from typing import List, Optional, Sequence, Tuple, Union
+
+import torch
+import torch.nn as nn
+
+from .layers import SqueezeMixin, StatefulLayer
+from .utils import reset_states
+
+
+@torch.no_grad()
+def early_exit_inference(
+    model: nn.Module,
+    input_data: torch.Tensor,
+    chunk_size: int = 10,
+    margin: Optional[float] = None,
+    confidence: Optional[float] = None,
+    min_steps: int = 0,
+) -> Tuple[torch.Tensor, torch.Tensor]:
+    """Simulate a rate-coded classifier and stop simulating each sample as soon as its class
+    is decided.
+
+    The model is run on chunks of `chunk_size` time steps, and its outputs, such as the spike
+    counts of the output layer, are summed over time. After each chunk, a sample is finished
+    if the difference between its highest and second highest count is at least `margin`, or
+    if the highest count makes up at least the fraction `confidence` of all counts. Finished
+    samples are removed from the batch, together with their neuron states, so that the
+    remaining samples are simulated with a smaller batch.
+
+    Models with squeeze layers, such as those from :func:`~sinabs.from_model`, receive input
+    of shape (batch * time, ...), all other models (batch, time, ...). States are reset
+    before the simulation.
+
+    Example:
+        >>> counts, steps = early_exit_inference(snn, data, margin=5)
+        >>> prediction = counts.argmax(1)
+        >>> steps.float().mean()  # Average number of simulated time steps
+
+    Parameters:
+        model: Spiking classifier whose output has shape (batch, time, classes), or
+            (batch * time, classes) for models with squeeze layers
+        input_data: Input of shape (batch, time, ...)
+        chunk_size: Number of time steps that are simulated between checks of the criteria
+        margin: Minimum difference between the highest and second highest count
+        confidence: Minimum fraction of the highest count among all counts
+        min_steps: Minimum number of time steps that are simulated for each sample
+
+    Returns:
+        Tuple of the counts of shape (batch, classes), summed over the simulated time steps
+        of each sample, and the number of simulated time steps per sample.
+    """
+    if margin is None and confidence is None:
+        raise ValueError("At least one of `margin` and `confidence` must be provided.")
+    batch_size, num_timesteps = input_data.shape[:2]
+    stateful_layers = [m for m in model.modules() if isinstance(m, StatefulLayer)]
+
+    counts = None
+    steps = torch.full((batch_size,), num_timesteps, device=input_data.device)
+    active = torch.arange(batch_size, device=input_data.device)
+    reset_states(model)
+    with _time_chunks(model) as run_chunk:
+        for start in range(0, num_timesteps, chunk_size):
+            chunk = input_data[active, start : start + chunk_size]
+            chunk_counts = run_chunk(chunk).sum(1)
+            if counts is None:
+                counts = chunk_counts.new_zeros((batch_size, *chunk_counts.shape[1:]))
+            counts[active] += chunk_counts
+
+            end = start + chunk.shape[1]
+            if min_steps <= end < num_timesteps:
+                done = _is_decided(counts[active], margin, confidence)
+                steps[active[done]] = end
+                active = active[~done]
+                if len(active) == 0:
+                    break
+                _select_states(stateful_layers, ~done)
+    return counts, steps
+
+
+@torch.no_grad()
+def depth_first_forward(
+    model: nn.Module,
+    input_data: torch.Tensor,
+    chunk_size: int = 1,
+    sum_over_time: bool = False,
+) -> torch.Tensor:
+    """Run a model on a long sequence in chunks of time steps, passing each chunk through all
+    layers before the next one.
+
+    In a regular forward pass, each layer processes all time steps before the next layer
+    starts, so that the activations of all time steps of a layer are held in memory at once.
+    Here, only the activations of `chunk_size` time steps are held, independent of the
+    sequence length, while neuron states carry over from chunk to chunk. Results are the same
+    as those of a single forward pass, up to floating point rounding. Smaller chunks save
+    memory, larger chunks are usually faster. Gradients are not computed.
+
+    Stateful layers continue from their current states, like in a regular forward pass. All
+    other modules have to process each time step independently, such as convolutional layers,
+    optionally wrapped in :class:`~sinabs.layers.Repeat`. Models with squeeze layers receive
+    input of shape (batch * chunk_size, ...), all other models (batch, chunk_size, ...).
+
+    Parameters:
+        model: Spiking model, e.g. an `nn.Sequential` of stateful and stateless layers
+        input_data: Input of shape (batch, time, ...), which can also be a memory-mapped tensor
+            on the CPU that is moved to the device of the model chunk by chunk
+        chunk_size: Number of time steps that are processed at once
+        sum_over_time: If True, the output is summed over time instead of being stored for
+            every time step, such that its memory does not grow with the sequence length
+
+    Returns:
+        Output of shape (batch, time, ...), or (batch, ...) if `sum_over_time` is True
+    """
+    try:
+        device = next(model.parameters()).device
+    except StopIteration:
+        device = input_data.device
+    num_timesteps = input_data.shape[1]
+    output = None
+    with _time_chunks(model) as run_chunk:
+        for start in range(0, num_timesteps, chunk_size):
+            chunk = input_data[:, start : start + chunk_size].to(device)
+            chunk_output = run_chunk(chunk)
+            if sum_over_time:
+                chunk_output = chunk_output.sum(1)
+                output = chunk_output if output is None else output.add_(chunk_output)
+                continue
+            if output is None:
+                output = chunk_output.new_empty(
+                    (len(chunk_output), num_timesteps, *chunk_output.shape[2:])
+                )
+            output[:, start : start + chunk.shape[1]] = chunk_output
+    return output
+
+
+@torch.no_grad()
+def pipelined_forward(
+    model: nn.Sequential,
+    input_data: torch.Tensor,
+    chunk_size: int = 1,
+    stages: Union[int, Sequence[int]] = 2,
+    sum_over_time: bool = False,
+) -> torch.Tensor:
+    """Run a sequential model on chunks of time steps, with groups of layers working on
+    different chunks at the same time.
+
+    The layers are split into pipeline stages, each of which runs in its own thread. While
+    the first stage processes chunk k, the second stage processes chunk k - 1, and so on,
+    such that up to `stages` chunks are processed in parallel. Each stage processes the
+    chunks in order, so that neuron states carry over from chunk to chunk as in
+    :func:`depth_first_forward`, and results are the same up to floating point rounding.
+    Gradients are not computed.
+
+    PyTorch operations release the global interpreter lock (GIL), so their work can run in
+    parallel on different CPU cores, or overlap on a GPU. The spiking layers, however, loop
+    over time steps in Python, and this part holds the GIL, so the stages contend for it.
+    The speedup is therefore bounded by the share of time spent in Python rather than by the
+    number of cores, and scaling to many cores has not been measured. For the convolutional
+    SNN in `examples/benchmarks/pipelined_forward.py`, about 13% of the time is spent in
+    Python with chunks of 10 time steps (30% for single time steps), which limits the
+    speedup to less than 8x for any number of stages. Larger chunks reduce the Python share.
+
+    Throughput is also limited by the slowest stage, so stages should have similar amounts
+    of work. It may help to limit the number of threads per operation with
+    `torch.set_num_threads`, such that the stages together use the available cores.
+
+    Example:
+        >>> torch.set_num_threads(8)
+        >>> output = pipelined_forward(snn, data, chunk_size=10, stages=4)
+
+    Parameters:
+        model: Spiking model as an `nn.Sequential`, with the same requirements as for
+            :func:`depth_first_forward`
+        input_data: Input of shape (batch, time, ...)
+        chunk_size: Number of time steps that are processed at once
+        stages: Number of stages, between which the layers are divided evenly, or the
+            indices of the layers at which a new stage begins
+        sum_over_time: If True, the output is summed over time instead of being stored for
+            every time step
+
+    Returns:
+        Output of shape (batch, time, ...), or (batch, ...) if `sum_over_time` is True
+    """
+    if not isinstance(model, nn.Sequential):
+        raise TypeError("`model` must be an `nn.Sequential`.")
+    try:
+        device = next(model.parameters()).device
+    except StopIteration:
+        device = input_data.device
+    num_timesteps = input_data.shape[1]
+    stage_modules = _split_stages(model, stages)
+    # Queues of chunks between stages. Their size limits the number of chunks in memory.
+    queues = [queue.Queue(maxsize=2) for _ in range(len(stage_modules) + 1)]
+
+    with _time_chunks(model) as run_chunk:
+
+        def run_stage(stage: nn.Module, source: queue.Queue, target: queue.Queue):
+            # Grad mode is local to each thread
+            with torch.no_grad():
+                failed = False
+                while True:
+                    chunk = source.get()
+                    if chunk is None:
+                        break
+                    if isinstance(chunk, BaseException):
+                        failed = True
+                        target.put(chunk)
+                    elif not failed:
+                        try:
+                            chunk = run_chunk(chunk, stage)
+                        except BaseException as e:
+                            # Pass the error on, but keep emptying the queue, so that
+                            # previous stages do not block
+                            chunk, failed = e, True
+                        target.put(chunk)
+                target.put(None)
+
+        workers = [
+            threading.Thread(
+                target=run_stage, args=(stage, source, target), daemon=True
+            )
+            for stage, source, target in zip(stage_modules, queues[:-1], queues[1:])
+        ]
+        for worker in workers:
+            worker.start()
+        feeder = threading.Thread(
+            target=_feed_chunks,
+            args=(input_data, chunk_size, device, queues[0]),
+            daemon=True,
+        )
+        feeder.start()
+
+        output = None
+        start = 0
+        error = None
+        while True:
+            chunk_output = queues[-1].get()
+            if chunk_output is None:
+                break
+            if error is not None:
+                continue
+            if isinstance(chunk_output, BaseException):
+                error = chunk_output
+                continue
+            length = chunk_output.shape[1]
+            if sum_over_time:
+                chunk_output = chunk_output.sum(1)
+                output = chunk_output if output is None else output.add_(chunk_output)
+            else:
+                if output is None:
+                    output = chunk_output.new_empty(
+                        (len(chunk_output), num_timesteps, *chunk_output.shape[2:])
+                    )
+                output[:, start : start + length] = chunk_output
+            start += length
+        feeder.join()
+        for worker in workers:
+            worker.join()
+    if error is not None:
+        raise error
+    return output
+
+
+def _feed_chunks(
+    input_data: torch.Tensor, chunk_size: int, device: torch.device, target: queue.Queue
+):
+    for start in range(0, input_data.shape[1], chunk_size):
+        target.put(input_data[:, start : start + chunk_size].to(device))
+    target.put(None)
+
+
+def _split_stages(
+    model: nn.Sequential, stages: Union[int, Sequence[int]]
+) -> List[nn.Sequential]:
+    # Divide the layers of `model` into consecutive groups
+    if isinstance(stages, int):
+        if stages < 1:
+            raise ValueError("`stages` must be at least 1.")
+        num_stages = min(stages, len(model))
+        starts = [round(i * len(model) / num_stages) for i in range(num_stages)]
+    else:
+        starts = sorted(set([0, *stages]))
+        if starts[-1] >= len(model):
+            raise ValueError(
+                f"Stages must begin at layers between 0 and {len(model) - 1}."
+            )
+    ends = starts[1:] + [len(model)]
+    return [model[start:end] for start, end in zip(starts, ends)]
+
+
+@contextmanager
+def _time_chunks(model: nn.Module):
+    # Function that runs `model`, or a part of it, on a chunk of shape (batch, time, ...) and
+    # returns its output of shape (batch, time, ...). Squeeze layers are set to the batch
+    # size of each chunk, and restored afterwards.
+    squeeze_layers = [m for m in model.modules() if isinstance(m, SqueezeMixin)]
+    squeeze_shapes = [(m.batch_size, m.num_timesteps) for m in squeeze_layers]
+
+    def run_chunk(chunk: torch.Tensor, module: nn.Module = model) -> torch.Tensor:
+        if not squeeze_layers:
+            return module(chunk)
+        for layer in squeeze_layers:
+            layer.batch_size, layer.num_timesteps = len(chunk), -1
+        return module(chunk.flatten(0, 1)).unflatten(0, chunk.shape[:2])
+
+    try:
+        yield run_chunk
+    finally:
+        for layer, (batch_size, num_timesteps) in zip(squeeze_layers, squeeze_shapes):
+            layer.batch_size, layer.num_timesteps = batch_size, num_timesteps
+
+
+def _is_decided(
+    counts: torch.Tensor, margin: Optional[float], confidence: Optional[float]
+) -> torch.Tensor:
+    # Whether the class of each sample is decided by its counts of shape (batch, classes)
+    counts = counts.flatten(1)
+    top_two = counts.topk(2, dim=1).values
+    decided = torch.zeros(len(counts), dtype=torch.bool, device=counts.device)
+    if margin is not None:
+        decided |= top_two[:, 0] - top_two[:, 1] >= margin
+    if confidence is not None:
+        total = counts.sum(1)
+        decided |= (total > 0) & (top_two[:, 0] >= confidence * total)
+    return decided
+
+
+def _select_states(layers, keep: torch.Tensor):
+    # Keep the states of the samples in `keep`, along the batch dimension
+    for layer in layers:
+        for name, buffer in layer.named_buffers(recurse=False):
+            if buffer.dim() > 0 and len(buffer) == len(keep):
+                setattr(layer, name, buffer[keep])
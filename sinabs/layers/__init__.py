@@ -7,7 +7,10 @@ from .lif import LIF, LIFRecurrent, LIFSqueeze
 from .merge import Merge
 from .neuromorphic_relu import NeuromorphicReLU
 from .pool2d import SpikingMaxPooling2dLayer, SumPool2d
-from .quantize import QuantizeLayer
+from .probe import StateProbe
+from .quantize import FixedPointConv2d, QuantizeLayer
 from .reshape import FlattenTime, Repeat, SqueezeMixin, UnflattenTime
+from .skip_zero import SkipZeroSteps
+from .sparse_conv import SparseConv2d
 from .stateful_layer import StatefulLayer
 from .to_spike import Img2SpikeLayer, Sig2SpikeLayer
@@ -6,6 +6,8 @@ import torch.nn as nn
 from sinabs.activation import MembraneSubtract, SingleExponential, SingleSpike
 
 from . import functional
+from .lif import _recurrent_step
+from .probe import StateProbe
 from .reshape import SqueezeMixin
 from .stateful_layer import StatefulLayer
 
@@ -56,6 +58,10 @@ class ALIF(StatefulLayer):
         train_alphas: When True, the discrete decay factor exp(-1/tau) is used for training rather than tau itself.
         norm_input: When True, normalise input current by tau. This helps when training time constants.
         record_states: When True, will record all internal states such as v_mem or i_syn in a dictionary attribute `recordings`. Default is False.
+                       A :class:`~sinabs.layers.StateProbe` can be passed instead, to record only
+                       selected states and neurons with bounded memory.
+        checkpoint_steps: Gradient checkpointing interval in time steps, or "auto". See :class:`~sinabs.layers.LIF`.
+        checkpoint_memory_budget: Memory budget in bytes for "auto" checkpointing. See :class:`~sinabs.layers.LIF`.
 
     Shape:
         - Input: :math:`(Batch, Time, Channel, Height, Width)` or :math:`(Batch, Time, Channel)`
@@ -82,7 +88,9 @@ class ALIF(StatefulLayer):
         shape: Optional[torch.Size] = None,
         train_alphas: bool = False,
         norm_input: bool = True,
-        record_states: bool = False,
+        record_states: Union[bool, StateProbe] = False,
+        checkpoint_steps: Optional[Union[int, str]] = None,
+        checkpoint_memory_budget: Optional[int] = None,
     ):
         super().__init__(
             state_names=(
@@ -112,6 +120,8 @@ class ALIF(StatefulLayer):
         self.train_alphas = train_alphas
         self.norm_input = norm_input
         self.record_states = record_states
+        self.checkpoint_steps = checkpoint_steps
+        self.checkpoint_memory_budget = checkpoint_memory_budget
         if shape:
             self.init_state_with_shape(shape)
 
@@ -169,15 +179,63 @@ class ALIF(StatefulLayer):
             b0=self.b0,
             norm_input=self.norm_input,
             record_states=self.record_states,
+            checkpoint_steps=self._resolve_checkpoint_steps(input_data),
         )
-        self.b = state["b"]
-        self.v_mem = state["v_mem"]
-        self.spike_threshold = state["spike_threshold"]
+        self._set_states(state)
         self.recordings = recordings
 
         self.firing_rate = spikes.sum() / spikes.numel()
         return spikes
 
+    def step(self, input_data: torch.Tensor) -> torch.Tensor:
+        """Process a single time step. See :meth:`~sinabs.layers.LIF.step`.
+
+        Parameters:
+            input_data: Data of one time step. Expected shape: (batch, ...)
+
+        Returns:
+            Output data with same shape as `input_data`.
+        """
+        if self.v_mem.shape != input_data.shape:
+            self._prepare_state((input_data.shape[0], 1, *input_data.shape[1:]))
+        alpha_mem, alpha_adapt, alpha_syn = self._cached(
+            "alphas",
+            lambda: (
+                self.alpha_mem_calculated,
+                self.alpha_adapt_calculated,
+                self.alpha_syn_calculated,
+            ),
+        )
+        spikes, state = functional.alif_forward_single(
+            input_data=input_data,
+            alpha_mem=alpha_mem,
+            alpha_adapt=alpha_adapt,
+            alpha_syn=alpha_syn,
+            adapt_scale=self.adapt_scale,
+            state=dict(self._buffers),
+            spike_fn=self.spike_fn,
+            reset_fn=self.reset_fn,
+            surrogate_grad_fn=self.surrogate_grad_fn,
+            min_v_mem=self.min_v_mem,
+            b0=self.b0,
+            norm_input=self.norm_input,
+        )
+        self._update_step_states(state)
+        return spikes
+
+    def _saved_bytes_per_neuron(self, dtype: torch.dtype) -> float:
+        # Memory per neuron and time step that `forward` saves for the backward pass
+        return functional.alif_saved_bytes_per_neuron(
+            alpha_mem=self.alpha_mem_calculated,
+            alpha_adapt=self.alpha_adapt_calculated,
+            alpha_syn=self.alpha_syn_calculated,
+            reset_fn=self.reset_fn,
+            min_v_mem=self.min_v_mem,
+            norm_input=self.norm_input,
+            dtype=dtype,
+            rec_connect=getattr(self, "rec_connect", None),
+        )
+
     @property
     def shape(self):
         if self.is_state_initialised():
@@ -213,6 +271,8 @@ class ALIF(StatefulLayer):
             shape=self.shape,
             min_v_mem=self.min_v_mem,
             record_states=self.record_states,
+            checkpoint_steps=self.checkpoint_steps,
+            checkpoint_memory_budget=self.checkpoint_memory_budget,
         )
         return param_dict
 
@@ -248,6 +308,8 @@ class ALIFRecurrent(ALIF):
         tau_mem: Membrane potential time constant.
         tau_adapt: Spike threshold time constant.
         rec_connect: An nn.Module which defines the recurrent connectivity, e.g. nn.Linear
+                     For an nn.Linear, which may have a torch sparse weight, inference without
+                     gradients only multiplies the weights of neurons that have spiked.
         tau_syn: Synaptic decay time constants. If None, no synaptic dynamics are used, which is the default.
         adapt_scale: The amount that the spike threshold is bumped up for every spike, after which it decays back to the initial threshold.
         spike_threshold: Spikes are emitted if v_mem is above that threshold. By default set to 1.0.
@@ -263,6 +325,10 @@ class ALIFRecurrent(ALIF):
         train_alphas: When True, the discrete decay factor exp(-1/tau) is used for training rather than tau itself.
         norm_input: When True, normalise input current by tau. This helps when training time constants.
         record_states: When True, will record all internal states such as v_mem or i_syn in a dictionary attribute `recordings`. Default is False.
+                       A :class:`~sinabs.layers.StateProbe` can be passed instead, to record only
+                       selected states and neurons with bounded memory.
+        checkpoint_steps: Gradient checkpointing interval in time steps, or "auto". See :class:`~sinabs.layers.LIF`.
+        checkpoint_memory_budget: Memory budget in bytes for "auto" checkpointing. See :class:`~sinabs.layers.LIF`.
 
     Shape:
         - Input: :math:`(Batch, Time, Channel, Height, Width)` or :math:`(Batch, Time, Channel)`
@@ -290,7 +356,9 @@ class ALIFRecurrent(ALIF):
         shape: Optional[torch.Size] = None,
         train_alphas: bool = False,
         norm_input: bool = True,
-        record_states: bool = False,
+        record_states: Union[bool, StateProbe] = False,
+        checkpoint_steps: Optional[Union[int, str]] = None,
+        checkpoint_memory_budget: Optional[int] = None,
     ):
         super().__init__(
             tau_mem=tau_mem,
@@ -306,6 +374,8 @@ class ALIFRecurrent(ALIF):
             train_alphas=train_alphas,
             norm_input=norm_input,
             record_states=record_states,
+            checkpoint_steps=checkpoint_steps,
+            checkpoint_memory_budget=checkpoint_memory_budget,
         )
         self.rec_connect = rec_connect
 
@@ -344,15 +414,25 @@ class ALIFRecurrent(ALIF):
             b0=self.b0,
             norm_input=self.norm_input,
             record_states=self.record_states,
+            checkpoint_steps=self._resolve_checkpoint_steps(input_data),
         )
-        self.b = state["b"]
-        self.v_mem = state["v_mem"]
-        self.spike_threshold = state["spike_threshold"]
+        self._set_states(state)
         self.recordings = recordings
 
         self.firing_rate = spikes.sum() / spikes.numel()
         return spikes
 
+    def step(self, input_data: torch.Tensor) -> torch.Tensor:
+        """Process a single time step. See :meth:`~sinabs.layers.LIFRecurrent.step`.
+
+        Parameters:
+            input_data: Data of one time step. Expected shape: (batch, ...)
+
+        Returns:
+            Output data with same shape as `input_data`.
+        """
+        return _recurrent_step(self, input_data, super().step)
+
 
 class ALIFSqueeze(ALIF, SqueezeMixin):
     """ALIF layer with 4-dimensional input (Batch*Time, Channel, Height, Width).
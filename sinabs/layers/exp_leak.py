@@ -3,6 +3,7 @@ from typing import Optional, Union
 import torch
 
 from .lif import LIF
+from .probe import StateProbe
 from .reshape import SqueezeMixin
 
 
@@ -24,6 +25,8 @@ class ExpLeak(LIF):
         shape: Optionally initialise the layer state with given shape. If None, will be inferred from input_size.
         norm_input: When True, normalise input current by tau. This helps when training time constants.
         record_states: When True, will record all internal states such as v_mem or i_syn in a dictionary attribute `recordings`. Default is False.
+                       A :class:`~sinabs.layers.StateProbe` can be passed instead, to record only
+                       selected states and neurons with bounded memory.
     """
 
     def __init__(
@@ -33,7 +36,7 @@ class ExpLeak(LIF):
         train_alphas: bool = False,
         min_v_mem: Optional[float] = None,
         norm_input: bool = False,
-        record_states: bool = False,
+        record_states: Union[bool, StateProbe] = False,
     ):
         super().__init__(
             tau_mem=tau_mem,
@@ -57,6 +60,10 @@ class ExpLeak(LIF):
         param_dict.pop("reset_fn")
         param_dict.pop("surrogate_grad_fn")
         param_dict.pop("spike_threshold")
+        param_dict.pop("saved_state_dtype")
+        param_dict.pop("checkpoint_steps")
+        param_dict.pop("checkpoint_memory_budget")
+        param_dict.pop("spike_dtype")
         return param_dict
 
 
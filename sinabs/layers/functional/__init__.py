@@ -1,2 +1,29 @@
-from .alif import alif_forward, alif_recurrent
-from .lif import lif_forward, lif_recurrent
+from .alif import (
+    alif_forward,
+    alif_forward_single,
+    alif_recurrent,
+    alif_saved_bytes_per_neuron,
+)
+from .bptt import LIFBPTT, lif_forward_bptt
+from .checkpoint import (
+    checkpoint_steps_for_budget,
+    checkpointed_forward,
+    resolve_checkpoint_steps,
+)
+from .conv import sparse_conv2d
+from .exp_leak import ExpLeakScan, exp_leak_forward, linear_scan
+from .iaf import (
+    events_to_sparse,
+    iaf_forward,
+    iaf_forward_fixed_point,
+    iaf_forward_sparse,
+    sparse_to_events,
+)
+from .lif import (
+    lif_forward,
+    lif_forward_inplace,
+    lif_forward_single,
+    lif_recurrent,
+    lif_saved_bytes_per_neuron,
+)
+from .spike_format import pack_spikes, unpack_spikes
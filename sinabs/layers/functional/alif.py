@@ -1,7 +1,14 @@
-from typing import Callable
+from typing import Callable, Optional
 
 import torch
 
+from sinabs.activation import MembraneSubtract
+
+from ..probe import split_record_states
+from .checkpoint import checkpointed_forward, use_checkpointing
+from .lif import _requires_grad, synaptic_current
+from .recurrent import fused_recurrent_weight, recurrent_input
+
 
 def alif_forward_single(
     input_data: torch.Tensor,
@@ -63,9 +70,49 @@ def alif_forward(
     b0: float,
     norm_input: bool,
     record_states: bool = False,
+    checkpoint_steps: Optional[int] = None,
 ):
+    if use_checkpointing(
+        checkpoint_steps,
+        input_data,
+        alpha_mem,
+        alpha_adapt,
+        alpha_syn,
+        adapt_scale,
+        min_v_mem,
+        b0,
+        *state.values(),
+    ):
+        return checkpointed_forward(
+            alif_forward,
+            input_data=input_data,
+            state=state,
+            checkpoint_steps=checkpoint_steps,
+            record_states=record_states,
+            alpha_mem=alpha_mem,
+            alpha_adapt=alpha_adapt,
+            alpha_syn=alpha_syn,
+            adapt_scale=adapt_scale,
+            spike_fn=spike_fn,
+            reset_fn=reset_fn,
+            surrogate_grad_fn=surrogate_grad_fn,
+            min_v_mem=min_v_mem,
+            b0=b0,
+            norm_input=norm_input,
+        )
+
     time_steps = input_data.shape[1]
     state_names = list(state.keys())
+    record_states, probe = split_record_states(record_states)
+
+    if alpha_syn is not None:
+        # Synaptic currents do not depend on spikes and can be computed for all time steps
+        # at once. They are then passed to the step-by-step simulation as input.
+        if norm_input:
+            alpha_syn = alpha_syn * (1 - alpha_mem)
+        input_data = synaptic_current(input_data, alpha_syn, state["i_syn"])
+        alpha_syn = None
+        norm_input = False
 
     output_spikes = []
     recordings = []
@@ -86,7 +133,10 @@ def alif_forward(
         )
         output_spikes.append(spikes)
         if record_states:
-            recordings.append(state)
+            # The state dict is modified in place at the next step
+            recordings.append(state.copy())
+        if probe is not None:
+            probe.update(state)
 
     record_dict = {}
     if record_states:
@@ -112,13 +162,64 @@ def alif_recurrent(
     b0: float,
     norm_input: bool,
     record_states: bool = False,
+    checkpoint_steps: Optional[int] = None,
 ):
     batch_size, n_time_steps, *trailing_dim = input_data.shape
+
+    if use_checkpointing(
+        checkpoint_steps,
+        input_data,
+        alpha_mem,
+        alpha_adapt,
+        alpha_syn,
+        adapt_scale,
+        min_v_mem,
+        b0,
+        *state.values(),
+        *rec_connect.parameters(),
+    ):
+        # The recurrent input is carried from one chunk to the next along with the state
+        rec_out = torch.zeros((batch_size, *trailing_dim), device=input_data.device)
+        state = dict(state, rec_out=rec_out)
+        output_spikes, state, record_dict = checkpointed_forward(
+            alif_recurrent,
+            input_data=input_data,
+            state=state,
+            checkpoint_steps=checkpoint_steps,
+            record_states=record_states,
+            alpha_mem=alpha_mem,
+            alpha_adapt=alpha_adapt,
+            alpha_syn=alpha_syn,
+            adapt_scale=adapt_scale,
+            spike_fn=spike_fn,
+            reset_fn=reset_fn,
+            surrogate_grad_fn=surrogate_grad_fn,
+            min_v_mem=min_v_mem,
+            rec_connect=rec_connect,
+            b0=b0,
+            norm_input=norm_input,
+        )
+        state.pop("rec_out")
+        return output_spikes, state, record_dict
+
+    state = state.copy()
+    carry_rec_out = "rec_out" in state
+    if carry_rec_out:
+        rec_out = state.pop("rec_out")
+    else:
+        rec_out = torch.zeros((batch_size, *trailing_dim), device=input_data.device)
     state_names = list(state.keys())
+    record_states, probe = split_record_states(record_states)
+
+    rec_weights = None
+    if not _requires_grad(
+        input_data, alpha_mem, alpha_adapt, alpha_syn, adapt_scale, b0, *state.values()
+    ):
+        # Only multiply the weights of neurons that have spiked
+        rec_weights = fused_recurrent_weight(rec_connect, trailing_dim)
 
     output_spikes = []
     recordings = []
-    rec_out = torch.zeros((batch_size, *trailing_dim), device=input_data.device)
     for step in range(n_time_steps):
         total_input = input_data[:, step] + rec_out
 
@@ -138,10 +239,16 @@ def alif_recurrent(
         )
         output_spikes.append(spikes)
         if record_states:
-            recordings.append(state)
+            # The state dict is modified in place at the next step
+            recordings.append(state.copy())
+        if probe is not None:
+            probe.update(state)
 
         # compute recurrent output that will be added to the input at the next time step
-        rec_out = rec_connect(spikes).reshape((batch_size, *trailing_dim))
+        if rec_weights is not None:
+            rec_out = recurrent_input(spikes, *rec_weights)
+        else:
+            rec_out = rec_connect(spikes).reshape((batch_size, *trailing_dim))
 
     record_dict = {}
     if record_states:
@@ -149,4 +256,53 @@ def alif_recurrent(
             record_dict[state_name] = torch.stack(
                 [item[state_name] for item in recordings], 1
             )
+    if carry_rec_out:
+        state["rec_out"] = rec_out
     return torch.stack(output_spikes, 1), state, record_dict
+
+
+def alif_saved_bytes_per_neuron(
+    alpha_mem: torch.Tensor,
+    alpha_adapt: torch.Tensor,
+    alpha_syn: Optional[torch.Tensor],
+    reset_fn: Callable,
+    min_v_mem: Optional[float],
+    norm_input: bool,
+    dtype: torch.dtype = torch.float32,
+    rec_connect: Optional[torch.nn.Module] = None,
+) -> float:
+    """Memory per neuron and time step that `alif_forward`, or `alif_recurrent` if
+    `rec_connect` is given, saves for the backward pass without gradient checkpointing.
+    The input itself is not included.
+
+    Parameters are the same as for `alif_forward` and `alif_recurrent`, with `dtype` the data
+    type of input and states.
+
+    Returns:
+        Memory in bytes
+    """
+    grad_alpha_mem = alpha_mem.requires_grad
+    grad_alpha_adapt = alpha_adapt.requires_grad
+    grad_alpha_syn = alpha_syn is not None and alpha_syn.requires_grad
+    # The spike function saves the membrane potential, the reset function the threshold
+    # for `MembraneSubtract` or a mask of the neurons that did not spike otherwise
+    n_tensors = 2 + grad_alpha_mem + grad_alpha_adapt
+    # Spikes are saved for the reset, the gradient w.r.t. `alpha_adapt` and `rec_connect`
+    n_tensors += (
+        isinstance(reset_fn, MembraneSubtract)
+        or grad_alpha_adapt
+        or (
+            rec_connect is not None
+            and any(p.requires_grad for p in rec_connect.parameters())
+        )
+    )
+    if rec_connect is None:
+        # `synaptic_current` saves the currents for the gradient w.r.t. its decay factor
+        n_tensors += alpha_syn is not None and (
+            grad_alpha_syn or (norm_input and grad_alpha_mem)
+        )
+    else:
+        # The summed input is a new tensor, saved for the gradients w.r.t. the decay factors
+        n_tensors += grad_alpha_syn + (norm_input and grad_alpha_mem)
+    n_tensors += min_v_mem is not None
+    return n_tensors * torch.empty(0, dtype=dtype).element_size()
@@ -0,0 +1,254 @@
+import warnings
+from typing import Callable, Optional, Union
+
+import torch
+
+from sinabs.activation import CompactSurrogate, MembraneSubtract
+
+
+class LIFBPTT(torch.autograd.Function):
+    """Autograd function for the membrane dynamics of LIF neurons over a whole sequence.
+
+    Instead of recording every intermediate result of every time step in the autograd graph,
+    only the membrane potential before spiking is saved for each time step. During the backward
+    pass spikes, reset and clipping are recomputed from it, step by step in reverse time.
+
+    If the surrogate gradient function is a `CompactSurrogate` and no gradient w.r.t.
+    `alpha_mem` is required, the compressed surrogate gradient of each time step is saved
+    instead, together with boolean masks of the neurons that did not spike, for
+    `MembraneReset`, and that were not clipped at `min_v_mem`.
+
+    Supports spike functions that derive from `BackwardClass`, i.e. `MultiSpike`,
+    `SingleSpike` and `MaxSpike`, and `MembraneSubtract` and `MembraneReset` as reset functions.
+    """
+
+    @staticmethod
+    def forward(
+        ctx,
+        input_data: torch.Tensor,
+        alpha_mem: torch.Tensor,
+        v_mem: torch.Tensor,
+        spike_threshold: Union[float, torch.Tensor],
+        spike_fn: Callable,
+        reset_fn: Callable,
+        surrogate_grad_fn: Callable,
+        min_v_mem: Optional[Union[float, torch.Tensor]],
+        saved_state_dtype: Optional[torch.dtype],
+    ):
+        """"""
+        saved_state_dtype = saved_state_dtype or input_data.dtype
+        n_time_steps = input_data.shape[1]
+        v_mem_init = v_mem
+        # The gradient w.r.t. alpha_mem requires the membrane potential of each time step
+        compact = isinstance(surrogate_grad_fn, CompactSurrogate)
+        compact = compact and not ctx.needs_input_grad[1]
+        subtract = isinstance(reset_fn, MembraneSubtract)
+
+        if compact:
+            surrogates = []
+            no_spike = None
+            if not subtract:
+                no_spike = torch.empty_like(input_data, dtype=torch.bool)
+            not_clipped = None
+            if min_v_mem is not None:
+                not_clipped = torch.empty_like(input_data, dtype=torch.bool)
+        else:
+            v_mem_pre_spike = torch.empty_like(input_data, dtype=saved_state_dtype)
+        output_spikes = []
+        for step in range(n_time_steps):
+            v_mem = alpha_mem * v_mem + input_data[:, step]
+            if compact:
+                surrogates.append(surrogate_grad_fn.compress(v_mem, spike_threshold))
+            else:
+                v_mem_pre_spike[:, step] = v_mem
+            spikes, v_mem = _spike_and_reset(
+                v_mem, spike_threshold, spike_fn, reset_fn, surrogate_grad_fn
+            )
+            if compact and no_spike is not None:
+                no_spike[:, step] = spikes == 0
+            if min_v_mem is not None:
+                if compact:
+                    not_clipped[:, step] = v_mem - min_v_mem > 0
+                v_mem = torch.nn.functional.relu(v_mem - min_v_mem) + min_v_mem
+            output_spikes.append(spikes)
+
+        if compact:
+            ctx.surrogate_lengths = [len(saved) for saved in surrogates]
+            ctx.step_shape = torch.broadcast_shapes(
+                v_mem.shape, torch.as_tensor(spike_threshold).shape
+            )
+            ctx.save_for_backward(
+                alpha_mem,
+                no_spike,
+                not_clipped,
+                *[tensor for saved in surrogates for tensor in saved],
+            )
+        else:
+            # The initial state is only needed for the gradient w.r.t. alpha_mem
+            ctx.save_for_backward(
+                alpha_mem,
+                v_mem_pre_spike,
+                v_mem_init if ctx.needs_input_grad[1] else None,
+            )
+        ctx.compact = compact
+        ctx.input_shape = input_data.shape
+        ctx.spike_threshold = spike_threshold
+        ctx.spike_fn = spike_fn
+        ctx.reset_fn = reset_fn
+        ctx.surrogate_grad_fn = surrogate_grad_fn
+        ctx.min_v_mem = min_v_mem
+        ctx.dtype = input_data.dtype
+        return torch.stack(output_spikes, 1), v_mem
+
+    @staticmethod
+    def backward(ctx, grad_spikes: torch.Tensor, grad_v_mem: torch.Tensor):
+        """"""
+        threshold = ctx.spike_threshold
+        subtract = isinstance(ctx.reset_fn, MembraneSubtract)
+        if subtract and ctx.reset_fn.subtract_value is not None:
+            subtract_value = ctx.reset_fn.subtract_value
+        else:
+            subtract_value = threshold
+        compute_grad_alpha = ctx.needs_input_grad[1]
+
+        if ctx.compact:
+            alpha_mem, no_spike, not_clipped, *surrogate_tensors = ctx.saved_tensors
+            surrogates = []
+            for length in ctx.surrogate_lengths:
+                surrogates.append(surrogate_tensors[:length])
+                surrogate_tensors = surrogate_tensors[length:]
+        else:
+            alpha_mem, v_mem_pre_spike, v_mem_init = ctx.saved_tensors
+
+        grad_input = torch.empty(
+            ctx.input_shape, dtype=ctx.dtype, device=grad_spikes.device
+        )
+        grad_alpha = 0
+        grad_v_mem_pre_spike = None
+        for step in reversed(range(ctx.input_shape[1])):
+            if ctx.compact:
+                surrogate = CompactSurrogate.decompress(
+                    surrogates[step], ctx.step_shape, ctx.dtype
+                )
+                if ctx.min_v_mem is not None:
+                    grad_v_mem = grad_v_mem * not_clipped[:, step]
+                if not subtract:
+                    keep = no_spike[:, step]
+            else:
+                v_mem = v_mem_pre_spike[:, step].to(ctx.dtype)
+                spikes, v_mem_reset = _spike_and_reset(
+                    v_mem, threshold, ctx.spike_fn, ctx.reset_fn, ctx.surrogate_grad_fn
+                )
+
+                if compute_grad_alpha and grad_v_mem_pre_spike is not None:
+                    # Membrane potential after this step enters the next step through
+                    # alpha_mem
+                    grad_alpha = grad_alpha + grad_v_mem_pre_spike * _clip(
+                        v_mem_reset, ctx.min_v_mem
+                    )
+
+                # Gradient w.r.t. membrane potential before clipping
+                if ctx.min_v_mem is not None:
+                    grad_v_mem = grad_v_mem * (v_mem_reset - ctx.min_v_mem > 0)
+                surrogate = ctx.surrogate_grad_fn(v_mem, threshold)
+                keep = spikes == 0
+
+            # Gradient w.r.t. membrane potential before spiking
+            if subtract:
+                grad_v_mem_pre_spike = (
+                    grad_v_mem
+                    + (grad_spikes[:, step] - grad_v_mem * subtract_value) * surrogate
+                )
+            else:
+                grad_v_mem_pre_spike = (
+                    grad_v_mem * keep + grad_spikes[:, step] * surrogate
+                )
+
+            grad_input[:, step] = grad_v_mem_pre_spike
+            grad_v_mem = alpha_mem * grad_v_mem_pre_spike
+
+        if compute_grad_alpha:
+            grad_alpha = grad_alpha + grad_v_mem_pre_spike * v_mem_init
+            grad_alpha = grad_alpha.sum_to_size(alpha_mem.shape)
+        else:
+            grad_alpha = None
+
+        return grad_input, grad_alpha, grad_v_mem, None, None, None, None, None, None
+
+
+def _spike_and_reset(v_mem, spike_threshold, spike_fn, reset_fn, surrogate_grad_fn):
+    spikes = spike_fn.apply(v_mem, spike_threshold, surrogate_grad_fn)
+    v_mem = reset_fn(spikes, {"v_mem": v_mem}, spike_threshold)["v_mem"]
+    return spikes, v_mem
+
+
+def _clip(v_mem, min_v_mem):
+    if min_v_mem is None:
+        return v_mem
+    return torch.nn.functional.relu(v_mem - min_v_mem) + min_v_mem
+
+
+def lif_forward_bptt(
+    input_data: torch.Tensor,
+    alpha_mem: Union[float, torch.Tensor],
+    state: dict,
+    spike_threshold: Union[float, torch.Tensor],
+    spike_fn: Callable,
+    reset_fn: Callable,
+    surrogate_grad_fn: Callable,
+    min_v_mem: Optional[Union[float, torch.Tensor]],
+    norm_input: bool,
+    saved_state_dtype: Optional[torch.dtype] = None,
+):
+    """Forward pass of LIF neurons without synaptic dynamics, for training with BPTT.
+
+    Uses `LIFBPTT`, which only saves the membrane potential of each time step for the backward
+    pass, instead of several tensors per time step. Gradients are the same as for `lif_forward`.
+    With a `CompactSurrogate`, the compressed surrogate gradients are saved instead, unless the
+    time constants are trained.
+
+    Parameters:
+        input_data: Input of shape (batch, time, ...)
+        alpha_mem: Membrane decay factor, scalar or broadcastable to (batch, ...)
+        state: Dict with neuron state. Must contain "v_mem" of shape (batch, ...)
+        spike_threshold: Spike threshold, scalar or broadcastable to (batch, ...)
+        spike_fn: Spike function, one of `MultiSpike`, `SingleSpike` or a `MaxSpike` instance
+        reset_fn: Reset function, instance of `MembraneSubtract` or `MembraneReset`
+        surrogate_grad_fn: Surrogate gradient function
+        min_v_mem: Optional lower bound for the membrane potential
+        norm_input: If True, scale input by (1 - alpha_mem)
+        saved_state_dtype: Data type in which membrane potentials are saved for the backward
+            pass. A lower precision such as `torch.bfloat16` reduces memory further, but
+            gradients are then only approximate. If None, the input data type is used.
+
+    Returns:
+        Output spikes, final state and an empty dict of recordings
+    """
+    alpha_mem = torch.as_tensor(alpha_mem, device=input_data.device)
+    if (
+        isinstance(surrogate_grad_fn, CompactSurrogate)
+        and torch.is_grad_enabled()
+        and alpha_mem.requires_grad
+    ):
+        warnings.warn(
+            "`CompactSurrogate` does not reduce memory for neurons with trained time "
+            "constants, because the gradient of the time constants requires the membrane "
+            "potential of each time step."
+        )
+    if norm_input:
+        input_data = (1 - alpha_mem) * input_data
+
+    spikes, v_mem = LIFBPTT.apply(
+        input_data,
+        alpha_mem,
+        state["v_mem"],
+        spike_threshold,
+        spike_fn,
+        reset_fn,
+        surrogate_grad_fn,
+        min_v_mem,
+        saved_state_dtype,
+    )
+    state = state.copy()
+    state["v_mem"] = v_mem
+    return spikes, state, dict()
@@ -0,0 +1,186 @@
+import math
+import warnings
+from functools import partial
+from typing import Callable, Optional, Union
+
+import torch
+from torch.utils.checkpoint import checkpoint
+
+from ..probe import StateProbe
+
+
+def checkpointed_forward(
+    forward_fn: Callable,
+    input_data: torch.Tensor,
+    state: dict,
+    checkpoint_steps: int,
+    record_states: Union[bool, StateProbe] = False,
+    **kwargs,
+):
+    """Run `forward_fn` on chunks of `checkpoint_steps` time steps with gradient checkpointing.
+
+    Only the states at chunk boundaries are kept for the backward pass. Intermediate results
+    within a chunk are recomputed during the backward pass, so memory grows with
+    T / checkpoint_steps + checkpoint_steps instead of T, while gradients stay exact.
+
+    Parameters:
+        forward_fn: Function with signature `forward_fn(input_data, state, record_states, **kwargs)`
+            that returns output, new state and a dict of recordings, such as `lif_forward`.
+        input_data: Input of shape (batch, time, ...)
+        state: Dict with neuron states at the first time step
+        checkpoint_steps: Number of time steps per chunk
+        record_states: If True, return the states at each time step. Can also be a
+            `StateProbe`, which is only updated during the forward pass.
+        kwargs: Passed on to `forward_fn`
+
+    Returns:
+        Output, final state and a dict of recorded states
+    """
+    outputs = []
+    recordings = []
+    for chunk in torch.split(input_data, checkpoint_steps, dim=1):
+        output, state, record_dict = checkpoint(
+            _run_chunk,
+            forward_fn,
+            chunk,
+            state,
+            record_states,
+            kwargs,
+            [],
+            use_reentrant=False,
+        )
+        outputs.append(output)
+        recordings.append(record_dict)
+
+    record_dict = dict()
+    if record_states:
+        record_dict = {
+            name: torch.cat([recs[name] for recs in recordings], 1)
+            for name in recordings[0]
+        }
+    return torch.cat(outputs, 1), state, record_dict
+
+
+def use_checkpointing(
+    checkpoint_steps: Optional[int], input_data: torch.Tensor, *tensors
+) -> bool:
+    """Whether the sequence is split into more than one chunk and gradients are needed for
+    any of `input_data` and `tensors`."""
+    if checkpoint_steps is None or checkpoint_steps >= input_data.shape[1]:
+        return False
+    return torch.is_grad_enabled() and any(
+        torch.is_tensor(t) and t.requires_grad for t in (input_data, *tensors)
+    )
+
+
+def _run_chunk(
+    forward_fn: Callable,
+    input_data: torch.Tensor,
+    state: dict,
+    record_states: Union[bool, StateProbe],
+    kwargs: dict,
+    previous_runs: list,
+):
+    # The state dict is copied because it is reused when the chunk is recomputed
+    run = partial(
+        forward_fn,
+        input_data=input_data,
+        state=dict(state),
+        record_states=record_states,
+        **kwargs,
+    )
+    if previous_runs and isinstance(record_states, StateProbe):
+        # Probes must not record the time steps again when they are recomputed
+        with record_states.paused():
+            return run()
+    previous_runs.append(True)
+    return run()
+
+
+def resolve_checkpoint_steps(
+    checkpoint_steps: Optional[Union[int, str]],
+    input_data: torch.Tensor,
+    num_states: int,
+    saved_bytes_per_neuron: Optional[float] = None,
+    memory_budget: Optional[int] = None,
+) -> Optional[int]:
+    """Determine the number of time steps per checkpointed chunk.
+
+    Parameters:
+        checkpoint_steps: Either a fixed number of time steps, "auto" to choose it based on
+            `memory_budget`, or None for no checkpointing.
+        input_data: Input of shape (batch, time, ...)
+        num_states: Number of neuron state tensors that are stored at each chunk boundary
+        saved_bytes_per_neuron: Memory per neuron and time step that the forward function
+            saves for the backward pass when a chunk is recomputed, such as from
+            `lif_saved_bytes_per_neuron`. Required for "auto".
+        memory_budget: Memory in bytes that the layer may use for the backward pass. If None,
+            the number of steps that minimizes memory is used.
+
+    Returns:
+        Number of time steps per chunk, or None for no checkpointing.
+    """
+    if checkpoint_steps == "auto":
+        if saved_bytes_per_neuron is None:
+            raise ValueError(
+                "`saved_bytes_per_neuron` is required for automatic checkpointing."
+            )
+        neurons = input_data[:, 0].numel()
+        return checkpoint_steps_for_budget(
+            n_time_steps=input_data.shape[1],
+            bytes_per_step=max(1, math.ceil(neurons * saved_bytes_per_neuron)),
+            bytes_per_checkpoint=num_states * neurons * input_data.element_size(),
+            memory_budget=memory_budget,
+        )
+    if checkpoint_steps is not None and (
+        not isinstance(checkpoint_steps, int) or checkpoint_steps < 1
+    ):
+        raise ValueError(
+            f"`checkpoint_steps` must be a positive integer, 'auto' or None, "
+            f"not {checkpoint_steps}."
+        )
+    return checkpoint_steps
+
+
+def checkpoint_steps_for_budget(
+    n_time_steps: int,
+    bytes_per_step: int,
+    bytes_per_checkpoint: int,
+    memory_budget: Optional[int] = None,
+) -> int:
+    """Choose the number of time steps per checkpointed chunk.
+
+    Memory for the backward pass is estimated as `ceil(T / K) * bytes_per_checkpoint` for the
+    states at chunk boundaries plus `K * bytes_per_step` for recomputing one chunk of K steps.
+
+    Parameters:
+        n_time_steps: Number of time steps T
+        bytes_per_step: Memory saved for the backward pass per time step
+        bytes_per_checkpoint: Memory needed to store the states at one chunk boundary
+        memory_budget: Available memory in bytes. If None, memory use is minimized.
+
+    Returns:
+        The largest number of steps per chunk that fits into `memory_budget`. If there is none,
+        or no budget is given, the number of steps with the lowest memory estimate.
+    """
+
+    def memory(steps: int) -> int:
+        return math.ceil(n_time_steps / steps) * bytes_per_checkpoint + (
+            steps * bytes_per_step
+        )
+
+    optimal_steps = math.sqrt(n_time_steps * bytes_per_checkpoint / bytes_per_step)
+    candidates = {max(1, math.floor(optimal_steps)), max(1, math.ceil(optimal_steps))}
+    min_memory_steps = min(candidates, key=memory)
+    if memory_budget is None:
+        return min_memory_steps
+
+    for steps in range(n_time_steps, 0, -1):
+        if memory(steps) <= memory_budget:
+            return steps
+
+    warnings.warn(
+        f"Memory budget of {memory_budget} bytes is too small. Using {min_memory_steps} "
+        f"steps per checkpoint, which requires an estimated {memory(min_memory_steps)} bytes."
+    )
+    return min_memory_steps
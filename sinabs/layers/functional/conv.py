@@ -0,0 +1,91 @@
+from typing import Optional, Tuple
+
+import torch
+
+
+def sparse_conv2d(
+    input_data: torch.Tensor,
+    weight: torch.Tensor,
+    bias: Optional[torch.Tensor] = None,
+    stride: Tuple[int, int] = (1, 1),
+    padding: Tuple[int, int, int, int] = (0, 0, 0, 0),
+    dilation: Tuple[int, int] = (1, 1),
+    groups: int = 1,
+) -> torch.Tensor:
+    """Event-driven 2D convolution, which only processes non-zero input values.
+
+    Each non-zero input contributes its value times the kernel weights to the output
+    positions within its reach. These contributions are gathered into a sparse matrix, with
+    one row per output position that receives input and one column per input channel and
+    kernel position, which is multiplied with the weights. The number of operations is therefore proportional to the
+    number of non-zero inputs instead of the input size. Results are the same as for
+    `torch.nn.functional.conv2d` up to floating point rounding.
+
+    Gradients are computed for `weight` and `bias`, but not for the input data.
+
+    Parameters:
+        input_data: Input of shape (batch, channels, height, width) of any data type, or a
+            torch sparse COO tensor
+        weight: Convolution weights of shape (out_channels, in_channels / groups, kH, kW)
+        bias: Optional bias of shape (out_channels,)
+        stride: Stride along height and width
+        padding: Zero padding (left, right, top, bottom), as in `torch.nn.functional.pad`
+        dilation: Dilation along height and width
+        groups: Number of blocked connections from input to output channels
+
+    Returns:
+        Output of shape (batch, out_channels, out_height, out_width)
+    """
+    batch_size, in_channels, height, width = input_data.shape
+    out_channels, in_channels_group, kernel_h, kernel_w = weight.shape
+    kernel_size = kernel_h * kernel_w
+    pad_left, pad_right, pad_top, pad_bottom = padding
+    out_h = height + pad_top + pad_bottom - dilation[0] * (kernel_h - 1) - 1
+    out_h = out_h // stride[0] + 1
+    out_w = width + pad_left + pad_right - dilation[1] * (kernel_w - 1) - 1
+    out_w = out_w // stride[1] + 1
+
+    if input_data.layout == torch.sparse_coo:
+        input_data = input_data.coalesce()
+        (sample, channel, row, col), values = input_data.indices(), input_data.values()
+    else:
+        sample, channel, row, col = input_data.nonzero(as_tuple=True)
+        values = input_data[sample, channel, row, col]
+
+    # Output positions of each event and kernel position, of shape (events, kH * kW)
+    device = weight.device
+    kernel_row = torch.arange(kernel_h, device=device).repeat_interleave(kernel_w)
+    kernel_col = torch.arange(kernel_w, device=device).repeat(kernel_h)
+    out_row = (row + pad_top).unsqueeze(1) - kernel_row * dilation[0]
+    out_col = (col + pad_left).unsqueeze(1) - kernel_col * dilation[1]
+    valid = (out_row >= 0) & (out_col >= 0)
+    if stride[0] > 1 or stride[1] > 1:
+        valid &= (out_row % stride[0] == 0) & (out_col % stride[1] == 0)
+        out_row = out_row.div(stride[0], rounding_mode="floor")
+        out_col = out_col.div(stride[1], rounding_mode="floor")
+    valid &= (out_row < out_h) & (out_col < out_w)
+    position = (sample.unsqueeze(1) * out_h + out_row) * out_w + out_col
+    column = channel.unsqueeze(1) * kernel_size + torch.arange(
+        kernel_size, device=device
+    )
+
+    # Only output positions that receive input are computed
+    rows, row_index = torch.unique(position[valid], return_inverse=True)
+    contributions = torch.sparse_coo_tensor(
+        torch.stack((row_index, column[valid])),
+        values.to(weight.dtype).unsqueeze(1).expand(-1, kernel_size)[valid],
+        (len(rows), in_channels * kernel_size),
+    )
+    # Weights of shape (in_channels * kH * kW, out_channels), block diagonal for groups > 1
+    weight_matrix = torch.block_diag(
+        *weight.view(groups, out_channels // groups, -1).transpose(1, 2)
+    )
+    result = torch.sparse.mm(contributions, weight_matrix)
+
+    shape = (batch_size, out_channels, out_h * out_w)
+    if bias is None:
+        output = weight.new_zeros(shape)
+    else:
+        output = bias.view(1, -1, 1).expand(shape).contiguous()
+    output[rows // (out_h * out_w), :, rows % (out_h * out_w)] += result
+    return output.view(batch_size, out_channels, out_h, out_w)
@@ -0,0 +1,139 @@
+from typing import Optional, Union
+
+import torch
+
+from ..probe import split_record_states
+
+
+def linear_scan(input_data: torch.Tensor, alpha: Union[float, torch.Tensor]):
+    """Solve the linear recurrence v(t) = alpha * v(t-1) + x(t) with v(-1) = 0 along dimension 1.
+
+    Uses a parallel prefix scan (Hillis-Steele), which needs ceil(log2(T)) vectorized
+    steps instead of a loop over all T time steps.
+
+    Parameters:
+        input_data: Tensor x of shape (batch, time, ...)
+        alpha: Decay factor, scalar or broadcastable to (batch, ...)
+
+    Returns:
+        Tensor v with same shape as `input_data`.
+    """
+    n_time_steps = input_data.shape[1]
+    output = input_data.clone()
+    decay = alpha
+    shift = 1
+    while shift < n_time_steps:
+        output[:, shift:] = output[:, shift:] + decay * output[:, :-shift]
+        decay = decay * decay
+        shift *= 2
+    return output
+
+
+class ExpLeakScan(torch.autograd.Function):
+    """Autograd function for leaky integration v(t) = alpha * v(t-1) + x(t), both in forward and
+    backward pass computed with a parallel prefix scan over time."""
+
+    @staticmethod
+    def forward(
+        ctx,
+        input_data: torch.Tensor,
+        alpha: torch.Tensor,
+        v_mem: torch.Tensor,
+    ):
+        """"""
+        input_data = input_data.clone()
+        input_data[:, 0] += alpha * v_mem
+        output = linear_scan(input_data, alpha)
+        if ctx.needs_input_grad[1]:
+            ctx.save_for_backward(alpha, v_mem, output)
+        else:
+            ctx.save_for_backward(alpha)
+        return output
+
+    @staticmethod
+    def backward(ctx, grad_output: torch.Tensor):
+        """"""
+        alpha, *saved_for_alpha = ctx.saved_tensors
+        # Gradients propagate backwards in time with the same recurrence
+        grad_input = linear_scan(grad_output.flip(1), alpha).flip(1)
+        grad_v_mem = alpha * grad_input[:, 0] if ctx.needs_input_grad[2] else None
+
+        grad_alpha = None
+        if ctx.needs_input_grad[1]:
+            v_mem, output = saved_for_alpha
+            v_previous = torch.cat((v_mem.unsqueeze(1), output[:, :-1]), dim=1)
+            grad_alpha = (grad_input * v_previous).sum(1).sum_to_size(alpha.shape)
+
+        return grad_input, grad_alpha, grad_v_mem
+
+
+def exp_leak_forward(
+    input_data: torch.Tensor,
+    alpha_mem: Union[float, torch.Tensor],
+    state: dict,
+    min_v_mem: Optional[Union[float, torch.Tensor]] = None,
+    norm_input: bool = False,
+    record_states: bool = False,
+):
+    """Forward pass of non-spiking leaky integrators, such as `ExpLeak`.
+
+    The whole time series is computed with a parallel prefix scan over time, which needs
+    O(log T) sequential steps instead of O(T). Gradients are computed with a scan as well. If
+    the membrane potential drops below `min_v_mem`, the clipping makes the dynamics non-linear
+    and the step-by-step simulation is used instead.
+
+    Parameters:
+        input_data: Input of shape (batch, time, ...)
+        alpha_mem: Membrane decay factor, scalar or broadcastable to (batch, ...)
+        state: Dict with neuron state. Must contain "v_mem" of shape (batch, ...)
+        min_v_mem: Optional lower bound for the membrane potential
+        norm_input: If True, scale input by (1 - alpha_mem)
+        record_states: If True, return the membrane potential at each time step
+
+    Returns:
+        Membrane potential at each time step, final state and a dict of recorded states
+    """
+    alpha_mem = torch.as_tensor(alpha_mem, device=input_data.device)
+    if norm_input:
+        input_data = (1 - alpha_mem) * input_data
+
+    v_mem = ExpLeakScan.apply(input_data, alpha_mem, state["v_mem"])
+
+    if min_v_mem is not None and (v_mem < min_v_mem).any():
+        return _exp_leak_forward_loop(
+            input_data, alpha_mem, state, min_v_mem, record_states
+        )
+
+    state = state.copy()
+    state["v_mem"] = v_mem[:, -1].clone()
+    record_states, probe = split_record_states(record_states)
+    if probe is not None:
+        probe.update_sequence({"v_mem": v_mem})
+    record_dict = {"v_mem": v_mem} if record_states else dict()
+    return v_mem, state, record_dict
+
+
+def _exp_leak_forward_loop(
+    input_data: torch.Tensor,
+    alpha_mem: torch.Tensor,
+    state: dict,
+    min_v_mem: Union[float, torch.Tensor],
+    record_states: bool,
+):
+    record_states, probe = split_record_states(record_states)
+    v_mem = state["v_mem"]
+    output = []
+    recordings = []
+    for step in range(input_data.shape[1]):
+        v_mem = alpha_mem * v_mem + input_data[:, step]
+        output.append(v_mem)
+        v_mem = torch.nn.functional.relu(v_mem - min_v_mem) + min_v_mem
+        if record_states:
+            recordings.append(v_mem)
+        if probe is not None:
+            probe.update({"v_mem": v_mem})
+
+    state = state.copy()
+    state["v_mem"] = v_mem
+    record_dict = {"v_mem": torch.stack(recordings, 1)} if record_states else dict()
+    return torch.stack(output, 1), state, record_dict
@@ -0,0 +1,415 @@
+from typing import Callable, List, Optional, Sequence, Tuple, Union
+
+import torch
+
+from sinabs.activation import (
+    MaxSpike,
+    MembraneReset,
+    MembraneSubtract,
+    MultiSpike,
+    SingleSpike,
+)
+
+from ..probe import split_record_states
+
+# Number of time steps that `iaf_forward` processes at once in its loop over time chunks
+TIME_CHUNK_SIZE = 16
+
+
+def iaf_forward_single(
+    input_data: torch.Tensor,
+    state: dict,
+    spike_threshold: Union[float, torch.Tensor],
+    min_v_mem: Optional[Union[float, torch.Tensor]],
+):
+    # Integrate
+    v_mem = state["v_mem"] + input_data
+
+    # Multiple spikes per time step and subtractive reset
+    spikes = (v_mem > 0) * torch.div(v_mem, spike_threshold, rounding_mode="trunc")
+    v_mem = v_mem - spikes * spike_threshold
+
+    if min_v_mem is not None:
+        v_mem = torch.nn.functional.relu(v_mem - min_v_mem) + min_v_mem
+
+    state = state.copy()
+    state["v_mem"] = v_mem
+    return spikes, state
+
+
+def iaf_forward(
+    input_data: torch.Tensor,
+    state: dict,
+    spike_threshold: Union[float, torch.Tensor],
+    min_v_mem: Optional[Union[float, torch.Tensor]] = None,
+    record_states: bool = False,
+    spike_dtype: Optional[torch.dtype] = None,
+):
+    """Closed-form forward pass of integrate-and-fire neurons with `MultiSpike` spike generation
+    and `MembraneSubtract` reset.
+
+    Without leak, the number of spikes a neuron has emitted up to time t only depends on its
+    cumulative input: N(t) = max(0, max_{t' <= t} floor(V(t') / threshold)), where V(t) is the
+    initial membrane potential plus the cumulative input up to t. All output spikes and membrane
+    potentials can therefore be computed with a handful of vectorized operations instead of a
+    loop over time. If the membrane potential would drop below `min_v_mem` at any point, the
+    dynamics are no longer a function of the cumulative input and the step-by-step simulation is
+    used instead.
+
+    No surrogate gradients are provided, so this should only be used when no backward pass is
+    needed. Results can differ from the step-by-step simulation for inputs that hit a threshold
+    crossing within floating point precision.
+
+    Parameters:
+        input_data: Input of shape (batch, time, ...)
+        state: Dict with neuron state. Must contain "v_mem" of shape (batch, ...)
+        spike_threshold: Spike threshold, scalar or broadcastable to (batch, ...)
+        min_v_mem: Optional lower bound for the membrane potential
+        record_states: If True, return the membrane potential at each time step
+        spike_dtype: Data type of the output spikes, such as `torch.uint8`. Unless membrane
+            potentials are recorded, spike counts are computed in the memory of the membrane
+            potentials and converted once, such that no spike tensor of the input data type
+            is allocated. If None, the input data type is used.
+
+    Returns:
+        Output spikes, final state and a dict of recorded states
+    """
+    # Scans along the last dimension are considerably faster, so time is moved to the back.
+    # Membrane potential without any reset: V(t) = v_mem(0) + sum_{t' <= t} x(t')
+    v_integrated = torch.cumsum(input_data.movedim(1, -1), dim=-1)
+    v_integrated += state["v_mem"].unsqueeze(-1)
+    threshold = _time_last(spike_threshold)
+
+    # Cumulative number of spikes
+    n_spikes = torch.div(v_integrated, threshold).floor_().clamp_(min=0)
+    # The running maximum and v_mem are computed in place, in chunks of time steps, to bound
+    # the memory of intermediate results. `torch.cummax` also returns int64 indices.
+    for start in range(0, n_spikes.shape[-1], TIME_CHUNK_SIZE):
+        end = start + TIME_CHUNK_SIZE
+        n_chunk = n_spikes[..., start:end]
+        n_max = torch.cummax(n_chunk, dim=-1).values
+        if start > 0:
+            torch.maximum(n_max, n_spikes[..., start - 1 : start], out=n_max)
+        n_chunk.copy_(n_max)
+        v_integrated[..., start:end].sub_(n_chunk * threshold)
+    v_mem = v_integrated
+
+    if min_v_mem is not None and (v_mem < _time_last(min_v_mem)).any():
+        return _iaf_forward_loop(
+            input_data, state, spike_threshold, min_v_mem, record_states, spike_dtype
+        )
+
+    state = state.copy()
+    state["v_mem"] = v_mem[..., -1].clone()
+    record_states, probe = split_record_states(record_states)
+    if probe is not None:
+        probe.update_sequence({"v_mem": v_mem.movedim(-1, 1)})
+    record_dict = {"v_mem": v_mem.movedim(-1, 1)} if record_states else dict()
+
+    # Spikes per time step, written to the memory of v_mem if it is not recorded
+    spikes = torch.empty_like(v_mem) if record_states else v_mem
+    spikes[..., 0] = n_spikes[..., 0]
+    torch.sub(n_spikes[..., 1:], n_spikes[..., :-1], out=spikes[..., 1:])
+    del n_spikes
+    spikes = spikes.movedim(-1, 1)
+    if spike_dtype is not None:
+        spikes = spikes.to(spike_dtype)
+    return spikes, state, record_dict
+
+
+def _time_last(param: Union[float, torch.Tensor]) -> Union[float, torch.Tensor]:
+    # Append a singleton time dimension to non-scalar parameters
+    if torch.is_tensor(param) and param.dim() > 0:
+        return param.unsqueeze(-1)
+    return param
+
+
+def _iaf_forward_loop(
+    input_data: torch.Tensor,
+    state: dict,
+    spike_threshold: Union[float, torch.Tensor],
+    min_v_mem: Optional[Union[float, torch.Tensor]],
+    record_states: bool,
+    spike_dtype: Optional[torch.dtype] = None,
+):
+    state_names = list(state.keys())
+    record_states, probe = split_record_states(record_states)
+
+    output_spikes = []
+    recordings = []
+    for step in range(input_data.shape[1]):
+        spikes, state = iaf_forward_single(
+            input_data[:, step], state, spike_threshold, min_v_mem
+        )
+        output_spikes.append(spikes if spike_dtype is None else spikes.to(spike_dtype))
+        if record_states:
+            recordings.append(state)
+        if probe is not None:
+            probe.update(state)
+
+    record_dict = {}
+    if record_states:
+        for state_name in state_names:
+            record_dict[state_name] = torch.stack(
+                [item[state_name] for item in recordings], 1
+            )
+    return torch.stack(output_spikes, 1), state, record_dict
+
+
+def iaf_forward_sparse(
+    input_events: Sequence[Tuple[torch.Tensor, torch.Tensor]],
+    state: dict,
+    spike_threshold: Union[float, torch.Tensor],
+    spike_fn: Callable,
+    reset_fn: Callable,
+    surrogate_grad_fn: Callable,
+    min_v_mem: Optional[Union[float, torch.Tensor]] = None,
+):
+    """Event-driven forward pass of integrate-and-fire neurons for sparse input.
+
+    Without leak, a neuron can only change its state or emit spikes in a time step in which it
+    receives input, unless it is still above threshold or below `min_v_mem` from an earlier time
+    step. Only these neurons are updated, thresholded and reset at each time step, which is
+    faster than updating all neurons if the input is sufficiently sparse. Results are the same as
+    for the dense step-by-step simulation, as long as the reset function does not change neurons
+    that do not spike. `MembraneReset` with a non-zero `reset_value`, which is added to all
+    neurons at every time step, is therefore not supported.
+
+    Input and output are given as events: a sequence with one `(indices, values)` tuple per
+    time step, where `indices` are indices into the flattened state of shape (batch * neurons)
+    and `values` the corresponding inputs or spikes. Use `sparse_to_events` and
+    `events_to_sparse` to convert from and to torch sparse tensors.
+
+    Parameters:
+        input_events: Input events for each time step
+        state: Dict with neuron state. Must contain "v_mem" of shape (batch, ...)
+        spike_threshold: Spike threshold, scalar or broadcastable to (batch, ...)
+        spike_fn: Spike function, such as `MultiSpike`
+        reset_fn: Element-wise reset function, such as `MembraneSubtract`, or `MembraneReset`
+            with a `reset_value` of 0
+        surrogate_grad_fn: Surrogate gradient function
+        min_v_mem: Optional lower bound for the membrane potential, scalar or broadcastable
+            to (batch, ...)
+
+    Returns:
+        Output spike events for each time step and final state
+    """
+    if isinstance(reset_fn, MembraneReset) and reset_fn.reset_value != 0:
+        raise ValueError(
+            "Event-driven simulation does not support `MembraneReset` with a non-zero "
+            "`reset_value`, which changes all neurons at every time step."
+        )
+    v_mem = state["v_mem"].clone()
+    # All updates go through a flat view of the membrane potential
+    v_flat = v_mem.view(-1)
+    threshold = _flat_param(spike_threshold, v_mem)
+    v_min = _flat_param(min_v_mem, v_mem)
+
+    # Neurons that need to be updated even without input
+    pending = v_flat >= threshold
+    if min_v_mem is not None:
+        pending |= v_flat < v_min
+    pending = pending.nonzero().squeeze(1)
+
+    output_events = []
+    for indices, values in input_events:
+        v_flat.index_add_(0, indices, values.to(v_mem.dtype))
+        active = torch.cat((indices, pending)).unique()
+
+        v_active = v_flat[active]
+        threshold_active = _gather(threshold, active)
+        spikes = spike_fn.apply(v_active, threshold_active, surrogate_grad_fn)
+        v_active = reset_fn(spikes, {"v_mem": v_active}, threshold_active)["v_mem"]
+        if min_v_mem is not None:
+            v_min_active = _gather(v_min, active)
+            v_active = torch.nn.functional.relu(v_active - v_min_active) + v_min_active
+        v_flat[active] = v_active
+
+        spiking = spikes != 0
+        output_events.append((active[spiking], spikes[spiking]))
+        pending = active[v_active >= threshold_active]
+
+    state = state.copy()
+    state["v_mem"] = v_mem
+    return output_events, state
+
+
+def sparse_to_events(
+    input_data: torch.Tensor,
+) -> List[Tuple[torch.Tensor, torch.Tensor]]:
+    """Convert a sparse tensor of shape (batch, time, ...) to a list with one (indices, values)
+    tuple per time step, where indices are indices into the flattened (batch * neurons) state.
+
+    Parameters:
+        input_data: Torch sparse tensor in COO or any other layout that can be converted to COO
+
+    Returns:
+        List of (indices, values) tuples
+    """
+    if input_data.layout != torch.sparse_coo:
+        input_data = input_data.to_sparse()
+    input_data = input_data.coalesce()
+    batch_size, n_time_steps, *neuron_shape = input_data.shape
+    indices = input_data.indices()
+    values = input_data.values()
+
+    neuron_index = indices[0]
+    for dim, size in zip(indices[2:], neuron_shape):
+        neuron_index = neuron_index * size + dim
+
+    time_index = indices[1]
+    # The order of events within a time step does not matter
+    order = torch.argsort(time_index)
+    counts = torch.bincount(time_index, minlength=n_time_steps).tolist()
+    return list(zip(neuron_index[order].split(counts), values[order].split(counts)))
+
+
+def events_to_sparse(
+    events: Sequence[Tuple[torch.Tensor, torch.Tensor]], shape: Sequence[int]
+) -> torch.Tensor:
+    """Convert a list of (indices, values) tuples, one per time step, to a sparse COO tensor.
+
+    Parameters:
+        events: Sequence of (indices, values) tuples, with indices into the flattened
+            (batch * neurons) state.
+        shape: Shape (batch, ...) of the neuron state
+
+    Returns:
+        Sparse COO tensor of shape (batch, time, ...)
+    """
+    batch_size, *neuron_shape = shape
+    flat_index = torch.cat([indices for indices, _ in events])
+    time_index = torch.cat(
+        [torch.full_like(indices, step) for step, (indices, _) in enumerate(events)]
+    )
+
+    coordinates = []
+    for size in reversed(neuron_shape):
+        coordinates.append(flat_index % size)
+        flat_index = flat_index // size
+    coordinates += [time_index, flat_index]
+    return torch.sparse_coo_tensor(
+        torch.stack(coordinates[::-1]),
+        torch.cat([values for _, values in events]),
+        size=(batch_size, len(events), *neuron_shape),
+    ).coalesce()
+
+
+def iaf_forward_fixed_point(
+    input_data: torch.Tensor,
+    state: dict,
+    spike_threshold: Union[int, torch.Tensor],
+    spike_fn: Callable,
+    reset_fn: Callable,
+    min_v_mem: Optional[Union[int, torch.Tensor]] = None,
+    record_states: bool = False,
+):
+    """Forward pass of integrate-and-fire neurons in fixed-point arithmetic.
+
+    The membrane potential is stored with the integer data type of `state["v_mem"]`, such as
+    `torch.int16`, and saturates at the limits of that type instead of overflowing, like on
+    DYNAP-CNN hardware. With integer valued parameters and without saturation, results are
+    identical to the floating point simulation.
+
+    Parameters:
+        input_data: Integer input of shape (batch, time, ...)
+        state: Dict with neuron state. Must contain "v_mem" of shape (batch, ...), with an
+            integer data type.
+        spike_threshold: Integer spike threshold, scalar or broadcastable to (batch, ...)
+        spike_fn: `MultiSpike`, `SingleSpike` or a `MaxSpike` instance
+        reset_fn: Instance of `MembraneSubtract` or `MembraneReset`
+        min_v_mem: Optional integer lower bound for the membrane potential
+        record_states: If True, return the membrane potential at each time step
+
+    Returns:
+        Output spikes with the data type of the state, final state and a dict of recorded states
+    """
+    if input_data.is_floating_point():
+        raise TypeError("Input to fixed-point simulation must be of integer type.")
+    state_dtype = state["v_mem"].dtype
+    if state_dtype.is_floating_point:
+        raise TypeError("State of fixed-point simulation must be of integer type.")
+    limits = torch.iinfo(state_dtype)
+    record_states, probe = split_record_states(record_states)
+
+    # Intermediate results are computed in 32 bit before saturating to the state data type
+    input_data = input_data.to(torch.int32)
+    v_mem = state["v_mem"].to(torch.int32)
+    threshold = _to_int(spike_threshold, v_mem.device)
+    if isinstance(reset_fn, MembraneSubtract) and reset_fn.subtract_value is not None:
+        subtract_value = _to_int(reset_fn.subtract_value, v_mem.device)
+    else:
+        subtract_value = threshold
+
+    output_spikes = torch.empty_like(input_data, dtype=state_dtype)
+    if record_states:
+        v_mem_recorded = torch.empty_like(input_data, dtype=state_dtype)
+    for step in range(input_data.shape[1]):
+        v_mem.add_(input_data[:, step]).clamp_(limits.min, limits.max)
+
+        spikes = _fixed_point_spikes(v_mem, threshold, spike_fn)
+        if isinstance(reset_fn, MembraneSubtract):
+            v_mem.sub_(spikes * subtract_value)
+        elif isinstance(reset_fn, MembraneReset):
+            v_mem.mul_(spikes == 0).add_(_to_int(reset_fn.reset_value, v_mem.device))
+        else:
+            raise ValueError(
+                "Fixed-point simulation only supports `MembraneSubtract` and "
+                "`MembraneReset` as reset functions."
+            )
+        if min_v_mem is not None:
+            torch.maximum(v_mem, _to_int(min_v_mem, v_mem.device), out=v_mem)
+
+        output_spikes[:, step] = spikes
+        if record_states:
+            v_mem_recorded[:, step] = v_mem
+        if probe is not None:
+            probe.update({"v_mem": v_mem})
+
+    state = state.copy()
+    state["v_mem"] = v_mem.to(state_dtype)
+    record_dict = {"v_mem": v_mem_recorded} if record_states else dict()
+    return output_spikes, state, record_dict
+
+
+def _fixed_point_spikes(
+    v_mem: torch.Tensor, threshold: torch.Tensor, spike_fn: Callable
+) -> torch.Tensor:
+    if spike_fn is SingleSpike:
+        return (v_mem >= threshold).to(v_mem.dtype)
+    if spike_fn is MultiSpike or isinstance(spike_fn, MaxSpike):
+        spikes = torch.div(v_mem, threshold, rounding_mode="trunc").clamp_(min=0)
+        if isinstance(spike_fn, MaxSpike) and spike_fn.max_num_spikes_per_bin:
+            spikes.clamp_(max=spike_fn.max_num_spikes_per_bin)
+        return spikes
+    raise ValueError(
+        "Fixed-point simulation only supports `MultiSpike`, `SingleSpike` and "
+        "`MaxSpike` as spike functions."
+    )
+
+
+def _to_int(param: Union[float, torch.Tensor], device: torch.device) -> torch.Tensor:
+    # Integer valued parameters, such as thresholds of discretized layers, as 32 bit tensor
+    param = torch.as_tensor(param, device=device)
+    if param.is_floating_point():
+        if not torch.equal(param, param.round()):
+            raise ValueError(
+                "Parameters of fixed-point simulation must have integer values."
+            )
+        param = param.round()
+    return param.to(torch.int32)
+
+
+def _flat_param(
+    param: Optional[Union[float, torch.Tensor]], state: torch.Tensor
+) -> Optional[Union[float, torch.Tensor]]:
+    # Broadcast non-scalar parameters to the state and flatten them
+    if torch.is_tensor(param) and param.numel() > 1:
+        return torch.broadcast_to(param, state.shape).reshape(-1).to(state.device)
+    return param
+
+
+def _gather(param: Union[float, torch.Tensor], indices: torch.Tensor):
+    if torch.is_tensor(param) and param.numel() > 1:
+        return param[indices]
+    return param
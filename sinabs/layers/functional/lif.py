@@ -1,7 +1,22 @@
-from typing import Callable, Optional
+from typing import Callable, Optional, Tuple, Union
 
 import torch
 
+from sinabs.activation import (
+    CompactSurrogate,
+    MaxSpike,
+    MembraneReset,
+    MembraneSubtract,
+    MultiSpike,
+    SingleSpike,
+)
+
+from ..probe import StateProbe, split_record_states
+from .bptt import lif_forward_bptt
+from .checkpoint import checkpointed_forward, use_checkpointing
+from .exp_leak import ExpLeakScan, exp_leak_forward
+from .recurrent import fused_recurrent_weight, recurrent_input
+
 
 def lif_forward_single(
     input_data: torch.Tensor,
@@ -45,6 +60,196 @@ def lif_forward_single(
     return spikes, state
 
 
+def synaptic_current(
+    input_data: torch.Tensor,
+    alpha_syn: Union[float, torch.Tensor],
+    i_syn: torch.Tensor,
+) -> torch.Tensor:
+    """Synaptic current i_syn(t) = alpha_syn * (i_syn(t-1) + x(t)) for all time steps.
+
+    Parameters:
+        input_data: Input of shape (batch, time, ...)
+        alpha_syn: Synaptic decay factor, scalar or broadcastable to (batch, ...)
+        i_syn: Synaptic current before the first time step, of shape (batch, ...)
+
+    Returns:
+        Synaptic current with same shape as `input_data`.
+    """
+    alpha_syn = torch.as_tensor(alpha_syn, device=input_data.device)
+    return ExpLeakScan.apply(alpha_syn * input_data, alpha_syn, i_syn)
+
+
+def _requires_grad(*tensors) -> bool:
+    """Whether gradients are going to be computed for any of the given tensors."""
+    return torch.is_grad_enabled() and any(
+        torch.is_tensor(t) and t.requires_grad for t in tensors
+    )
+
+
+def _is_inplace_compatible(
+    input_data: torch.Tensor,
+    alpha_mem: float,
+    alpha_syn: float,
+    state: dict,
+    spike_threshold: float,
+    spike_fn: Callable,
+    reset_fn: Callable,
+) -> bool:
+    """Whether the dynamics can be simulated with the in-place `lif_forward_inplace`."""
+    if not (spike_fn in (MultiSpike, SingleSpike) or isinstance(spike_fn, MaxSpike)):
+        return False
+    if type(reset_fn) not in (MembraneSubtract, MembraneReset):
+        return False
+    return not _requires_grad(
+        input_data, alpha_mem, alpha_syn, spike_threshold, *state.values()
+    )
+
+
+def _is_bptt_compatible(
+    spike_threshold: float,
+    spike_fn: Callable,
+    reset_fn: Callable,
+    surrogate_grad_fn: Callable,
+    min_v_mem: Optional[float],
+    record_states: bool,
+) -> bool:
+    """Whether the dynamics can be simulated with the memory efficient `lif_forward_bptt`."""
+    if record_states or surrogate_grad_fn is None:
+        return False
+    if not (spike_fn in (MultiSpike, SingleSpike) or isinstance(spike_fn, MaxSpike)):
+        return False
+    if type(reset_fn) not in (MembraneSubtract, MembraneReset):
+        return False
+    subtract_value = getattr(reset_fn, "subtract_value", None)
+    return not any(
+        torch.is_tensor(t) and t.requires_grad
+        for t in (spike_threshold, min_v_mem, subtract_value)
+    )
+
+
+def lif_forward_inplace(
+    input_data: torch.Tensor,
+    alpha_mem: Union[float, torch.Tensor],
+    alpha_syn: Optional[Union[float, torch.Tensor]],
+    state: dict,
+    spike_threshold: Union[float, torch.Tensor],
+    spike_fn: Callable,
+    reset_fn: Callable,
+    min_v_mem: Optional[Union[float, torch.Tensor]],
+    norm_input: bool,
+    record_states: bool = False,
+    rec_weights: Optional[Tuple[torch.Tensor, Optional[torch.Tensor]]] = None,
+    spike_dtype: Optional[torch.dtype] = None,
+):
+    """Forward pass of LIF neurons for inference, without gradients.
+
+    Output and recordings are preallocated and all states are updated in place, such that
+    after the initial copy of the state no memory is allocated in the loop over time steps.
+    Supports the `MultiSpike`, `SingleSpike` and `MaxSpike` spike functions and the
+    `MembraneSubtract` and `MembraneReset` reset functions. Results are the same as those of
+    `lif_forward`, or `lif_recurrent` if `rec_weights` are given.
+
+    Parameters:
+        input_data: Input of shape (batch, time, ...)
+        alpha_mem: Membrane decay factor, scalar or broadcastable to (batch, ...)
+        alpha_syn: Synaptic decay factor. If None, no synaptic dynamics are used.
+        state: Dict with neuron state "v_mem" and, if `alpha_syn` is given, "i_syn"
+        spike_threshold: Spike threshold, scalar or broadcastable to (batch, ...)
+        spike_fn: Spike function, one of `MultiSpike`, `SingleSpike` or a `MaxSpike` instance
+        reset_fn: Reset function, instance of `MembraneSubtract` or `MembraneReset`
+        min_v_mem: Optional lower bound for the membrane potential
+        norm_input: If True, scale synaptic input by (1 - alpha_mem)
+        record_states: If True, return the states at each time step. Can also be a
+            `StateProbe` that is updated after each time step.
+        rec_weights: Optional weight and bias of linear recurrent connections, from
+            `fused_recurrent_weight`. The recurrent input is accumulated into a buffer
+            that is added to the input of the next time step.
+        spike_dtype: Data type of the output spikes, such as `torch.uint8` or, for
+            `SingleSpike`, `torch.bool`. Spikes are computed in the input data type for each
+            time step and only then converted. If None, the input data type is used.
+
+    Returns:
+        Output spikes, final state and a dict of recorded states
+    """
+    record_states, probe = split_record_states(record_states)
+    state_names = list(state.keys())
+    state = {name: buffer.clone() for name, buffer in state.items()}
+    v_mem = state["v_mem"]
+    i_syn = state.get("i_syn")
+
+    output_spikes = torch.empty_like(input_data, dtype=spike_dtype)
+    record_dict = dict()
+    if record_states:
+        record_dict = {name: torch.empty_like(input_data) for name in state_names}
+
+    leaky = not bool(torch.all(torch.as_tensor(alpha_mem) == 1))
+    input_scale = (1 - alpha_mem) if norm_input else None
+    if isinstance(reset_fn, MembraneSubtract) and reset_fn.subtract_value is not None:
+        subtract_value = reset_fn.subtract_value
+    else:
+        subtract_value = spike_threshold
+    max_num_spikes = getattr(spike_fn, "max_num_spikes_per_bin", None)
+
+    # Buffers for intermediate results
+    buffer = torch.empty_like(v_mem)
+    no_spike = torch.empty_like(v_mem, dtype=torch.bool)
+    convert_spikes = output_spikes.dtype != input_data.dtype
+    if convert_spikes:
+        spikes = torch.empty_like(v_mem)
+    if rec_weights is not None:
+        rec_input = torch.zeros_like(v_mem)
+
+    for step in range(input_data.shape[1]):
+        if not convert_spikes:
+            spikes = output_spikes[:, step]
+        step_input = input_data[:, step]
+        if rec_weights is not None:
+            step_input = rec_input.add_(step_input)
+
+        # Synaptic current and membrane potential
+        if i_syn is not None:
+            synaptic_input = i_syn.add_(step_input).mul_(alpha_syn)
+        else:
+            synaptic_input = step_input
+        if input_scale is not None:
+            synaptic_input = torch.mul(input_scale, synaptic_input, out=buffer)
+        if leaky:
+            v_mem.mul_(alpha_mem)
+        v_mem.add_(synaptic_input)
+
+        # Spike generation
+        if spike_fn is SingleSpike:
+            torch.sub(v_mem, spike_threshold, out=spikes).ge_(0)
+        else:
+            torch.div(v_mem, spike_threshold, rounding_mode="trunc", out=spikes)
+            spikes.clamp_(min=0)
+            if max_num_spikes is not None:
+                spikes.clamp_(max=max_num_spikes)
+
+        # Reset
+        if isinstance(reset_fn, MembraneSubtract):
+            v_mem.sub_(torch.mul(spikes, subtract_value, out=buffer))
+        else:
+            v_mem.mul_(torch.eq(spikes, 0, out=no_spike)).add_(reset_fn.reset_value)
+
+        if min_v_mem is not None:
+            v_mem.sub_(min_v_mem).clamp_(min=0).add_(min_v_mem)
+
+        if rec_weights is not None:
+            # Recurrent input for the next time step
+            recurrent_input(spikes, *rec_weights, out=rec_input)
+        if convert_spikes:
+            output_spikes[:, step] = spikes
+
+        if record_states:
+            for name in state_names:
+                record_dict[name][:, step].copy_(state[name])
+        if probe is not None:
+            probe.update(state)
+
+    return output_spikes, state, record_dict
+
+
 def lif_forward(
     input_data: torch.Tensor,
     alpha_mem: float,
@@ -57,9 +262,152 @@ def lif_forward(
     min_v_mem: float,
     norm_input: bool,
     record_states: bool = False,
+    saved_state_dtype: Optional[torch.dtype] = None,
+    checkpoint_steps: Optional[int] = None,
+    spike_dtype: Optional[torch.dtype] = None,
 ):
+    """Forward pass of LIF neurons over a sequence of time steps.
+
+    Depending on neuron configuration and whether gradients are required, one of the
+    following engines is used:
+
+    - `exp_leak_forward` for non-spiking neurons without synaptic dynamics
+    - `lif_forward_inplace` for supported spike and reset functions, without gradients
+    - `lif_forward_bptt` for supported spike and reset functions, with gradients
+    - otherwise, `lif_forward_single` is called for each time step.
+
+    Synaptic currents are computed for all time steps at once, before the membrane dynamics.
+    This differs from the step-by-step update by floating point rounding, so in single
+    precision the odd spike of a neuron close to threshold can differ. `lif_forward_bptt`
+    follows the same order of operations as `lif_forward_single`.
+
+    Parameters:
+        input_data: Input of shape (batch, time, ...)
+        alpha_mem: Membrane decay factor, scalar or broadcastable to (batch, ...)
+        alpha_syn: Synaptic decay factor. If None, no synaptic dynamics are used.
+        state: Dict with neuron state "v_mem" and, if `alpha_syn` is given, "i_syn"
+        spike_threshold: Spike threshold, scalar or broadcastable to (batch, ...)
+        spike_fn: Spike function. If None, the membrane potential is returned.
+        reset_fn: Reset function
+        surrogate_grad_fn: Surrogate gradient function
+        min_v_mem: Optional lower bound for the membrane potential
+        norm_input: If True, scale synaptic input by (1 - alpha_mem)
+        record_states: If True, return the states at each time step. Can also be a
+            `StateProbe` that is updated after each time step instead.
+        saved_state_dtype: Data type in which `lif_forward_bptt` saves membrane potentials for
+            the backward pass. If None, the input data type is used.
+        checkpoint_steps: If given, and gradients are required, the sequence is simulated in
+            chunks of this many time steps with gradient checkpointing. Only the states between
+            chunks are kept for the backward pass and each chunk is recomputed during backward.
+        spike_dtype: Data type in which `lif_forward_inplace` returns spikes. Other engines
+            return spikes in the input data type.
+
+    Returns:
+        Output spikes, final state and a dict of recorded states
+    """
+    if use_checkpointing(
+        checkpoint_steps,
+        input_data,
+        alpha_mem,
+        alpha_syn,
+        spike_threshold,
+        min_v_mem,
+        *state.values(),
+    ):
+        return checkpointed_forward(
+            lif_forward,
+            input_data=input_data,
+            state=state,
+            checkpoint_steps=checkpoint_steps,
+            record_states=record_states,
+            alpha_mem=alpha_mem,
+            alpha_syn=alpha_syn,
+            spike_threshold=spike_threshold,
+            spike_fn=spike_fn,
+            reset_fn=reset_fn,
+            surrogate_grad_fn=surrogate_grad_fn,
+            min_v_mem=min_v_mem,
+            norm_input=norm_input,
+            saved_state_dtype=saved_state_dtype,
+        )
+
+    if spike_fn is None and alpha_syn is None:
+        # Non-spiking leaky integrator without synaptic dynamics is a linear recurrence
+        return exp_leak_forward(
+            input_data=input_data,
+            alpha_mem=alpha_mem,
+            state=state,
+            min_v_mem=min_v_mem,
+            norm_input=norm_input,
+            record_states=record_states,
+        )
+
+    if _is_inplace_compatible(
+        input_data, alpha_mem, alpha_syn, state, spike_threshold, spike_fn, reset_fn
+    ):
+        return lif_forward_inplace(
+            input_data=input_data,
+            alpha_mem=alpha_mem,
+            alpha_syn=alpha_syn,
+            state=state,
+            spike_threshold=spike_threshold,
+            spike_fn=spike_fn,
+            reset_fn=reset_fn,
+            min_v_mem=min_v_mem,
+            norm_input=norm_input,
+            record_states=record_states,
+            spike_dtype=spike_dtype,
+        )
+
+    if alpha_syn is not None:
+        # Synaptic currents do not depend on spikes and can be computed for all time steps
+        # at once. The membrane dynamics are then simulated with the currents as input.
+        i_syn = synaptic_current(input_data, alpha_syn, state["i_syn"])
+        spikes, state, record_dict = lif_forward(
+            input_data=i_syn,
+            alpha_mem=alpha_mem,
+            alpha_syn=None,
+            state={k: v for k, v in state.items() if k != "i_syn"},
+            spike_threshold=spike_threshold,
+            spike_fn=spike_fn,
+            reset_fn=reset_fn,
+            surrogate_grad_fn=surrogate_grad_fn,
+            min_v_mem=min_v_mem,
+            norm_input=norm_input,
+            record_states=record_states,
+            saved_state_dtype=saved_state_dtype,
+        )
+        state["i_syn"] = i_syn[:, -1].clone()
+        if isinstance(record_states, StateProbe):
+            record_states.update_sequence({"i_syn": i_syn})
+        elif record_states:
+            record_dict["i_syn"] = i_syn
+        return spikes, state, record_dict
+
+    if _is_bptt_compatible(
+        spike_threshold,
+        spike_fn,
+        reset_fn,
+        surrogate_grad_fn,
+        min_v_mem,
+        record_states,
+    ):
+        return lif_forward_bptt(
+            input_data=input_data,
+            alpha_mem=alpha_mem,
+            state=state,
+            spike_threshold=spike_threshold,
+            spike_fn=spike_fn,
+            reset_fn=reset_fn,
+            surrogate_grad_fn=surrogate_grad_fn,
+            min_v_mem=min_v_mem,
+            norm_input=norm_input,
+            saved_state_dtype=saved_state_dtype,
+        )
+
     n_time_steps = input_data.shape[1]
     state_names = list(state.keys())
+    record_states, probe = split_record_states(record_states)
 
     output_spikes = []
     if record_states:
@@ -82,6 +430,8 @@ def lif_forward(
         if record_states:
             for name in state_names:
                 recordings[name].append(state[name].clone())
+        if probe is not None:
+            probe.update(state)
 
     if record_states:
         record_dict = {name: torch.stack(vals, 1) for name, vals in recordings.items()}
@@ -104,13 +454,89 @@ def lif_recurrent(
     norm_input: bool,
     rec_connect: torch.nn.Module,
     record_states: bool = False,
+    checkpoint_steps: Optional[int] = None,
 ):
+    """Forward pass of LIF neurons with recurrent connections.
+
+    The output of `rec_connect` for the spikes of one time step is added to the input of the
+    next time step. If `rec_connect` is a `torch.nn.Linear` layer, with dense or sparse weight,
+    and no gradients are required, the fused `lif_forward_inplace` engine is used, which only
+    multiplies the weights of neurons that have spiked. Otherwise, `lif_forward_single` is
+    called for each time step.
+
+    Parameters are the same as for `lif_forward`, except for `rec_connect`, the module that
+    defines the recurrent connectivity.
+
+    Returns:
+        Output spikes, final state and a dict of recorded states
+    """
     batch_size, n_time_steps, *trailing_dim = input_data.shape
+
+    if use_checkpointing(
+        checkpoint_steps,
+        input_data,
+        alpha_mem,
+        alpha_syn,
+        spike_threshold,
+        min_v_mem,
+        *state.values(),
+        *rec_connect.parameters(),
+    ):
+        # The recurrent input is carried from one chunk to the next along with the state
+        rec_out = torch.zeros((batch_size, *trailing_dim), device=input_data.device)
+        state = dict(state, rec_out=rec_out)
+        output_spikes, state, record_dict = checkpointed_forward(
+            lif_recurrent,
+            input_data=input_data,
+            state=state,
+            checkpoint_steps=checkpoint_steps,
+            record_states=record_states,
+            alpha_mem=alpha_mem,
+            alpha_syn=alpha_syn,
+            spike_threshold=spike_threshold,
+            spike_fn=spike_fn,
+            reset_fn=reset_fn,
+            surrogate_grad_fn=surrogate_grad_fn,
+            min_v_mem=min_v_mem,
+            norm_input=norm_input,
+            rec_connect=rec_connect,
+        )
+        state.pop("rec_out")
+        return output_spikes, state, record_dict
+
+    rec_weights = fused_recurrent_weight(rec_connect, trailing_dim)
+    if (
+        rec_weights is not None
+        and "rec_out" not in state
+        and _is_inplace_compatible(
+            input_data, alpha_mem, alpha_syn, state, spike_threshold, spike_fn, reset_fn
+        )
+    ):
+        return lif_forward_inplace(
+            input_data=input_data,
+            alpha_mem=alpha_mem,
+            alpha_syn=alpha_syn,
+            state=state,
+            spike_threshold=spike_threshold,
+            spike_fn=spike_fn,
+            reset_fn=reset_fn,
+            min_v_mem=min_v_mem,
+            norm_input=norm_input,
+            record_states=record_states,
+            rec_weights=rec_weights,
+        )
+
+    state = state.copy()
+    carry_rec_out = "rec_out" in state
+    if carry_rec_out:
+        rec_out = state.pop("rec_out")
+    else:
+        rec_out = torch.zeros((batch_size, *trailing_dim), device=input_data.device)
     state_names = list(state.keys())
+    record_states, probe = split_record_states(record_states)
 
     output_spikes = []
     recordings = []
-    rec_out = torch.zeros((batch_size, *trailing_dim), device=input_data.device)
     for step in range(n_time_steps):
         total_input = input_data[:, step] + rec_out
 
@@ -128,7 +554,10 @@ def lif_recurrent(
         )
         output_spikes.append(spikes)
         if record_states:
-            recordings.append(state)
+            # The state dict is modified in place at the next step
+            recordings.append(state.copy())
+        if probe is not None:
+            probe.update(state)
 
         # compute recurrent output that will be added to the input at the next time step
         rec_out = rec_connect(spikes).reshape((batch_size, *trailing_dim))
@@ -139,4 +568,70 @@ def lif_recurrent(
             record_dict[state_name] = torch.stack(
                 [item[state_name] for item in recordings], 1
             )
+    if carry_rec_out:
+        state["rec_out"] = rec_out
     return torch.stack(output_spikes, 1), state, record_dict
+
+
+def lif_saved_bytes_per_neuron(
+    alpha_mem: Union[float, torch.Tensor],
+    alpha_syn: Optional[Union[float, torch.Tensor]],
+    spike_threshold: Union[float, torch.Tensor],
+    spike_fn: Callable,
+    reset_fn: Callable,
+    surrogate_grad_fn: Callable,
+    min_v_mem: Optional[Union[float, torch.Tensor]],
+    norm_input: bool,
+    record_states: bool = False,
+    saved_state_dtype: Optional[torch.dtype] = None,
+    dtype: torch.dtype = torch.float32,
+    rec_connect: Optional[torch.nn.Module] = None,
+) -> float:
+    """Memory per neuron and time step that `lif_forward`, or `lif_recurrent` if
+    `rec_connect` is given, saves for the backward pass without gradient checkpointing.
+
+    The engine is chosen as in `lif_forward` with gradients enabled. The input itself is
+    not included. For a `CompactSurrogate`, the size of dense surrogate gradients is used,
+    which is an upper bound.
+
+    Parameters are the same as for `lif_forward` and `lif_recurrent`, with `dtype` the data
+    type of input and states.
+
+    Returns:
+        Memory in bytes
+    """
+    state_size = torch.empty(0, dtype=dtype).element_size()
+    grad_alpha_mem = torch.is_tensor(alpha_mem) and alpha_mem.requires_grad
+    grad_alpha_syn = torch.is_tensor(alpha_syn) and alpha_syn.requires_grad
+    saved = 0
+    if alpha_syn is not None and rec_connect is None:
+        # `synaptic_current` saves the currents for the gradient w.r.t. `alpha_syn`
+        saved += state_size * grad_alpha_syn
+        alpha_syn = None
+    if spike_fn is None and alpha_syn is None and rec_connect is None:
+        # `exp_leak_forward` saves the membrane potential for the gradient w.r.t. `alpha_mem`
+        return saved + state_size * grad_alpha_mem
+
+    bptt_compatible = _is_bptt_compatible(
+        spike_threshold, spike_fn, reset_fn, surrogate_grad_fn, min_v_mem, record_states
+    )
+    if rec_connect is None and bptt_compatible:
+        if isinstance(surrogate_grad_fn, CompactSurrogate) and not grad_alpha_mem:
+            # Surrogate gradients and boolean masks for reset and clipping
+            saved += torch.empty(0, dtype=surrogate_grad_fn.dtype).element_size()
+            saved += not isinstance(reset_fn, MembraneSubtract)
+            return saved + (min_v_mem is not None)
+        saved_dtype = saved_state_dtype or dtype
+        return saved + torch.empty(0, dtype=saved_dtype).element_size()
+
+    # Tensors saved by the operations of `lif_forward_single` at each time step. The
+    # spike function saves the membrane potential.
+    n_tensors = 1
+    if rec_connect is not None:
+        # The summed input is a new tensor, saved for the gradients w.r.t. the decay factors
+        n_tensors += grad_alpha_syn + (norm_input and grad_alpha_mem)
+        n_tensors += any(p.requires_grad for p in rec_connect.parameters())
+    n_tensors += grad_alpha_mem
+    n_tensors += not isinstance(reset_fn, MembraneSubtract)
+    n_tensors += min_v_mem is not None
+    return saved + n_tensors * state_size
@@ -0,0 +1,88 @@
+import weakref
+from typing import Optional, Tuple
+
+import torch
+import torch.nn as nn
+
+# Prepared weights for each `rec_connect` module, together with the parameter versions
+# they were computed from
+_fused_weights = weakref.WeakKeyDictionary()
+
+
+def fused_recurrent_weight(
+    rec_connect: nn.Module, trailing_dim: Tuple[int, ...]
+) -> Optional[Tuple[torch.Tensor, Optional[torch.Tensor]]]:
+    """Weight and bias of `rec_connect` prepared for `recurrent_input`, if the recurrent
+    connections can be computed by the fused recurrent engines.
+
+    This is the case if `rec_connect` is a `torch.nn.Linear` layer, with dense or sparse
+    weight, that connects neurons with a single trailing dimension and does not require
+    gradients.
+
+    The prepared weights are cached for each module and only recomputed if a parameter has
+    been replaced, moved or modified in place.
+
+    Parameters:
+        rec_connect: Module that defines the recurrent connectivity
+        trailing_dim: Shape of the neuron state without batch dimension
+
+    Returns:
+        Tuple of weight and bias, or None if the fused engines cannot be used.
+    """
+    if type(rec_connect) is not nn.Linear or len(trailing_dim) != 1:
+        return None
+    if torch.is_grad_enabled() and any(
+        p.requires_grad for p in rec_connect.parameters()
+    ):
+        return None
+    params = [p for p in (rec_connect.weight, rec_connect.bias) if p is not None]
+    key = tuple((id(p), p._version, p.device, p.dtype) for p in params)
+    cached = _fused_weights.get(rec_connect)
+    if cached is None or cached[0] != key:
+        cached = (key, _prepare_weight(rec_connect))
+        _fused_weights[rec_connect] = cached
+    return cached[1]
+
+
+def _prepare_weight(
+    rec_connect: nn.Linear,
+) -> Tuple[torch.Tensor, Optional[torch.Tensor]]:
+    weight = rec_connect.weight.detach()
+    if weight.layout == torch.strided:
+        # Transposed, such that the weights of each presynaptic neuron are contiguous
+        weight = weight.t().contiguous()
+    else:
+        weight = weight.to_sparse_csr()
+    bias = None if rec_connect.bias is None else rec_connect.bias.detach()
+    return weight, bias
+
+
+def recurrent_input(
+    spikes: torch.Tensor,
+    weight: torch.Tensor,
+    bias: Optional[torch.Tensor],
+    out: Optional[torch.Tensor] = None,
+) -> torch.Tensor:
+    """Recurrent input `spikes @ W.T + bias` for weights from `fused_recurrent_weight`.
+
+    For dense weights, spikes are converted to a sparse tensor, so that only the weights of
+    neurons that have spiked are multiplied. For sparse weights, only the non-zero weights
+    are multiplied.
+
+    Parameters:
+        spikes: Spikes of shape (batch, neurons)
+        weight: Transposed dense weight of shape (neurons, neurons), or sparse CSR weight
+        bias: Optional bias of shape (neurons,)
+        out: Optional contiguous tensor of shape (batch, neurons) into which the result
+            is accumulated directly, without allocating an intermediate result
+
+    Returns:
+        Recurrent input of shape (batch, neurons)
+    """
+    if weight.layout == torch.strided:
+        result = torch.mm(spikes.to_sparse(), weight, out=out)
+    else:
+        # Computed as (W @ spikes.T).T, with the transposed result written to `out`
+        out_t = None if out is None else out.t()
+        result = torch.mm(weight, spikes.t(), out=out_t).t()
+    return result if bias is None else result.add_(bias)
@@ -0,0 +1,43 @@
+import torch
+
+
+def pack_spikes(spikes: torch.Tensor) -> torch.Tensor:
+    """Pack binary spikes into bits, such that 8 spikes take up a single byte.
+
+    Spikes are flattened, so the original shape has to be passed to `unpack_spikes`. Use this
+    format to store or transfer spikes of `SingleSpike` layers. Spike counts larger than one are
+    clipped to one.
+
+    Parameters:
+        spikes: Binary spikes of any shape and data type
+
+    Returns:
+        Flat uint8 tensor with `ceil(spikes.numel() / 8)` elements
+    """
+    flat_spikes = spikes.flatten() != 0
+    padding = -len(flat_spikes) % 8
+    if padding:
+        flat_spikes = torch.cat((flat_spikes, flat_spikes.new_zeros(padding)))
+    bits = flat_spikes.view(-1, 8).to(torch.uint8) << _bit_positions(spikes.device)
+    return bits.sum(1, dtype=torch.uint8)
+
+
+def unpack_spikes(
+    packed: torch.Tensor, shape: torch.Size, dtype: torch.dtype = torch.float32
+) -> torch.Tensor:
+    """Unpack spikes from `pack_spikes`.
+
+    Parameters:
+        packed: Bit-packed spikes
+        shape: Shape of the original spike tensor
+        dtype: Data type of the unpacked spikes
+
+    Returns:
+        Spikes of shape `shape`
+    """
+    bits = (packed.unsqueeze(1) >> _bit_positions(packed.device)) & 1
+    return bits.flatten()[: torch.Size(shape).numel()].view(shape).to(dtype)
+
+
+def _bit_positions(device) -> torch.Tensor:
+    return torch.arange(8, dtype=torch.uint8, device=device)
@@ -1,12 +1,20 @@
-from typing import Callable, Optional
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
 
 import numpy as np
 import torch
 
-from sinabs.activation import MembraneSubtract, MultiSpike, SingleExponential
+from sinabs.activation import (
+    MembraneReset,
+    MembraneSubtract,
+    MultiSpike,
+    SingleExponential,
+)
 
+from . import functional
 from .lif import LIF, LIFRecurrent
+from .probe import StateProbe
 from .reshape import SqueezeMixin
+from .skip_zero import nonzero_slices
 
 
 class IAF(LIF):
@@ -22,6 +30,17 @@ class IAF(LIF):
 
     where :math:`\\sum z(t)` represents the sum of all input currents at time :math:`t`.
 
+    Input can also be given as a torch sparse tensor, or as a sequence of `(indices, values)`
+    tuples per time step (see :func:`~sinabs.layers.functional.iaf_forward_sparse`). Only
+    neurons that receive input are then updated at each time step, which is faster for sparse,
+    event-based input and gives the same result. Output is returned in the same format. This is
+    not supported for `MembraneReset` with a non-zero `reset_value`.
+
+    With `fixed_point=True`, the layer simulates the integer arithmetic of DYNAP-CNN: `v_mem` is
+    stored as int16 and saturates instead of overflowing, and input must be of integer type (see
+    :func:`~sinabs.layers.functional.iaf_forward_fixed_point`). Thresholds must be integer valued,
+    as after :func:`~sinabs.backend.dynapcnn.discretize.discretize_conv_spike`.
+
     Parameters:
         spike_threshold: Spikes are emitted if v_mem is above that threshold. By default set to 1.0.
         spike_fn: Choose a Sinabs or custom torch.autograd.Function that takes a dict of states,
@@ -36,6 +55,34 @@ class IAF(LIF):
         shape: Optionally initialise the layer state with given shape. If None, will be inferred from input_size.
         record_states: When True, will record all internal states such as v_mem or i_syn in a dictionary attribute
                        `recordings`. Default is False.
+                       A :class:`~sinabs.layers.StateProbe` can be passed instead, to record only
+                       selected states and neurons with bounded memory.
+                       Training is slower with a probe, see :class:`~sinabs.layers.LIF`.
+        saved_state_dtype: Data type in which membrane potentials are stored for the backward pass.
+                           A lower precision such as torch.bfloat16 saves memory during training, at the
+                           cost of approximate gradients. If None (default), the input data type is used.
+        checkpoint_steps: Gradient checkpointing interval in time steps, or "auto". See :class:`~sinabs.layers.LIF`.
+        checkpoint_memory_budget: Memory budget in bytes for "auto" checkpointing. See :class:`~sinabs.layers.LIF`.
+        fixed_point: If True, simulate the layer in int16 fixed-point arithmetic, bit-identical
+                     to DYNAP-CNN hardware. Cannot be used for training. Default is False.
+        spike_dtype: Data type of the output spikes if no gradients are required, such as
+                     torch.uint8, or torch.bool for SingleSpike. See :class:`~sinabs.layers.LIF`.
+                     If None (default), spikes have the data type of the input.
+        skip_zero_steps: If True, time steps in which no neuron of the batch receives input are
+                         skipped when gradients are disabled, as long as no neuron is above
+                         threshold, such that they would not change the states. This speeds up
+                         the simulation of input with many empty time steps, e.g. from event
+                         cameras. Only used with `MembraneSubtract` or `MembraneReset` with a
+                         `reset_value` of 0 and without synaptic dynamics or `record_states`,
+                         otherwise all time steps are simulated. Default is False.
+        closed_form: If True, spikes and membrane potentials are computed from the cumulative
+                     input with :func:`~sinabs.layers.functional.iaf_forward` when gradients are
+                     disabled, instead of a loop over time steps. This is faster for small layers
+                     and long sequences, but the cumulative sum is rounded differently, so spikes
+                     of neurons within floating point precision of the threshold can differ from
+                     the step-by-step simulation. Only used with `MultiSpike`, `MembraneSubtract`
+                     without `subtract_value` and without synaptic dynamics, otherwise the
+                     default engine is used. Default is False.
 
     Shape:
         - Input: :math:`(Batch, Time, Channel, Height, Width)` or :math:`(Batch, Time, Channel)`
@@ -55,7 +102,14 @@ class IAF(LIF):
         tau_syn: Optional[float] = None,
         min_v_mem: Optional[float] = None,
         shape: Optional[torch.Size] = None,
-        record_states: bool = False,
+        record_states: Union[bool, StateProbe] = False,
+        saved_state_dtype: Optional[torch.dtype] = None,
+        checkpoint_steps: Optional[Union[int, str]] = None,
+        checkpoint_memory_budget: Optional[int] = None,
+        fixed_point: bool = False,
+        spike_dtype: Optional[torch.dtype] = None,
+        skip_zero_steps: bool = False,
+        closed_form: bool = False,
     ):
         super().__init__(
             tau_mem=np.inf,
@@ -68,21 +122,220 @@ class IAF(LIF):
             shape=shape,
             norm_input=False,
             record_states=record_states,
+            saved_state_dtype=saved_state_dtype,
+            checkpoint_steps=checkpoint_steps,
+            checkpoint_memory_budget=checkpoint_memory_budget,
+            spike_dtype=spike_dtype,
         )
         # IAF does not have time constants
         self.tau_mem = None
+        self.fixed_point = fixed_point
+        self.skip_zero_steps = skip_zero_steps
+        self.closed_form = closed_form
 
     @property
     def alpha_mem_calculated(self):
         """Always returns a tensor of 1."""
         return torch.tensor(1.0)
 
+    def forward(
+        self,
+        input_data: Union[torch.Tensor, Sequence[Tuple[torch.Tensor, torch.Tensor]]],
+    ) -> Union[torch.Tensor, List[Tuple[torch.Tensor, torch.Tensor]]]:
+        """
+        Parameters:
+            input_data: Data to be processed. Expected shape: (batch, time, ...). Sparse
+                tensors, or a sequence of `(indices, values)` tuples per time step, are
+                processed event-driven with `functional.iaf_forward_sparse`.
+
+        Returns:
+            Output data with same shape and format as `input_data`.
+        """
+        if self.fixed_point:
+            return self._forward_fixed_point(input_data)
+        if torch.is_tensor(input_data) and input_data.layout == torch.strided:
+            if self.skip_zero_steps and not torch.is_grad_enabled():
+                return self._forward_skip_zero_steps(input_data)
+            if self.closed_form:
+                return self._forward_closed_form(input_data)
+            return super().forward(input_data)
+
+        if self.tau_syn is not None or self.record_states:
+            raise ValueError(
+                "Sparse input is not supported with synaptic dynamics or `record_states`."
+            )
+        if torch.is_tensor(input_data):
+            self._prepare_state(input_data.shape)
+            input_events = functional.sparse_to_events(input_data)
+        elif self.is_state_initialised():
+            input_events = input_data
+        else:
+            raise ValueError(
+                "Neuron states need to be initialized with the `shape` argument "
+                "before events can be used as input."
+            )
+
+        output_events, state = functional.iaf_forward_sparse(
+            input_events=input_events,
+            state=dict(self.named_buffers()),
+            spike_threshold=self.spike_threshold,
+            spike_fn=self.spike_fn,
+            reset_fn=self.reset_fn,
+            surrogate_grad_fn=self.surrogate_grad_fn,
+            min_v_mem=self.min_v_mem,
+        )
+        self._set_states(state)
+        self.recordings = dict()
+
+        n_spikes = torch.cat([spikes for _, spikes in output_events]).sum()
+        self.firing_rate = n_spikes / (self.v_mem.numel() * len(output_events))
+        if torch.is_tensor(input_data):
+            return functional.events_to_sparse(output_events, self.v_mem.shape)
+        return output_events
+
+    def step(self, input_data: torch.Tensor) -> torch.Tensor:
+        """Process a single time step. See :meth:`~sinabs.layers.LIF.step`.
+
+        Parameters:
+            input_data: Data of one time step. Expected shape: (batch, ...)
+
+        Returns:
+            Output data with same shape as `input_data`.
+        """
+        if self.fixed_point:
+            return self._forward_fixed_point(input_data.unsqueeze(1)).squeeze(1)
+        return super().step(input_data)
+
+    def _forward_skip_zero_steps(self, input_data: torch.Tensor) -> torch.Tensor:
+        # All time steps are simulated where skipping is not supported
+        if (
+            self.tau_syn is not None
+            or self.record_states
+            or not self._reset_keeps_zero_steps()
+        ):
+            return super().forward(input_data)
+        batch_size, time_steps = input_data.shape[:2]
+        active = nonzero_slices(input_data.flatten(0, 1))
+        active = active.view(batch_size, time_steps).any(0).tolist()
+        if all(active):
+            return super().forward(input_data)
+
+        self._prepare_state(input_data.shape)
+        state = dict(self.named_buffers())
+        spikes = torch.zeros_like(input_data)
+        start = 0
+        while start < time_steps:
+            end = start + 1
+            if active[start] or self._zero_step_changes_state(state):
+                while end < time_steps and active[end]:
+                    end += 1
+                spikes[:, start:end], state, _ = functional.lif_forward(
+                    input_data=input_data[:, start:end],
+                    alpha_mem=self.alpha_mem_calculated,
+                    alpha_syn=None,
+                    state=state,
+                    spike_threshold=self.spike_threshold,
+                    spike_fn=self.spike_fn,
+                    reset_fn=self.reset_fn,
+                    surrogate_grad_fn=self.surrogate_grad_fn,
+                    min_v_mem=self.min_v_mem,
+                    norm_input=False,
+                )
+            else:
+                # Time steps without input do not change the states
+                while end < time_steps and not active[end]:
+                    end += 1
+            start = end
+        self._set_states(state)
+        self.recordings = dict()
+
+        self.firing_rate = spikes.sum() / spikes.numel()
+        return self._compact_spikes(spikes)
+
+    def _is_closed_form_compatible(self, input_data: torch.Tensor) -> bool:
+        # Whether `functional.iaf_forward` simulates the same dynamics as the default engine
+        if self.spike_fn is not MultiSpike or self.tau_syn is not None:
+            return False
+        if type(self.reset_fn) is not MembraneSubtract:
+            return False
+        if self.reset_fn.subtract_value is not None:
+            return False
+        return not (
+            torch.is_grad_enabled()
+            and any(
+                torch.is_tensor(t) and t.requires_grad
+                for t in (input_data, self.spike_threshold, self.v_mem)
+            )
+        )
+
+    def _forward_closed_form(self, input_data: torch.Tensor) -> torch.Tensor:
+        self._prepare_state(input_data.shape)
+        if not self._is_closed_form_compatible(input_data):
+            return super().forward(input_data)
+        spikes, state, recordings = functional.iaf_forward(
+            input_data=input_data,
+            state=dict(self.named_buffers()),
+            spike_threshold=self.spike_threshold,
+            min_v_mem=self.min_v_mem,
+            record_states=self.record_states,
+            spike_dtype=self.spike_dtype,
+        )
+        self._set_states(state)
+        self.recordings = recordings
+        self.firing_rate = spikes.sum() / spikes.numel()
+        return spikes
+
+    def _reset_keeps_zero_steps(self) -> bool:
+        # Whether the reset function leaves neurons below threshold unchanged. A non-zero
+        # `reset_value` of `MembraneReset` is added to all neurons at every time step.
+        if isinstance(self.reset_fn, MembraneReset):
+            return self.reset_fn.reset_value == 0
+        return isinstance(self.reset_fn, MembraneSubtract)
+
+    def _zero_step_changes_state(self, state: Dict[str, torch.Tensor]) -> bool:
+        # Whether a time step without input would change the states, because neurons are
+        # above threshold or below `min_v_mem`
+        v_mem = state["v_mem"]
+        if (v_mem >= self.spike_threshold).any():
+            return True
+        return self.min_v_mem is not None and bool((v_mem < self.min_v_mem).any())
+
+    def _forward_fixed_point(self, input_data: torch.Tensor) -> torch.Tensor:
+        if self.tau_syn is not None:
+            raise ValueError(
+                "Fixed-point simulation is not supported with synaptic dynamics."
+            )
+        self._prepare_state(input_data.shape)
+        if self.v_mem.is_floating_point():
+            # States from floating point simulation or `reset_states` are converted once
+            limits = torch.iinfo(torch.int16)
+            self.v_mem = (
+                self.v_mem.round().clamp(limits.min, limits.max).to(torch.int16)
+            )
+
+        spikes, state, recordings = functional.iaf_forward_fixed_point(
+            input_data=input_data,
+            state=dict(self.named_buffers()),
+            spike_threshold=self.spike_threshold,
+            spike_fn=self.spike_fn,
+            reset_fn=self.reset_fn,
+            min_v_mem=self.min_v_mem,
+            record_states=self.record_states,
+        )
+        self._set_states(state)
+        self.recordings = recordings
+        self.firing_rate = spikes.sum() / spikes.numel()
+        return self._compact_spikes(spikes)
+
     @property
     def _param_dict(self) -> dict:
         param_dict = super()._param_dict
         param_dict.pop("tau_mem")
         param_dict.pop("train_alphas")
         param_dict.pop("norm_input")
+        param_dict["fixed_point"] = self.fixed_point
+        param_dict["skip_zero_steps"] = self.skip_zero_steps
+        param_dict["closed_form"] = self.closed_form
         return param_dict
 
 
@@ -101,6 +354,8 @@ class IAFRecurrent(LIFRecurrent):
 
     Parameters:
         rec_connect: An nn.Module which defines the recurrent connectivity, e.g. nn.Linear
+                     For an nn.Linear, which may have a torch sparse weight, inference without
+                     gradients only multiplies the weights of neurons that have spiked.
         spike_threshold: Spikes are emitted if v_mem is above that threshold. By default set to 1.0.
         spike_fn: Choose a Sinabs or custom torch.autograd.Function that takes a dict of states,
                   a spike threshold and a surrogate gradient function and returns spikes. Be aware
@@ -113,6 +368,10 @@ class IAFRecurrent(LIFRecurrent):
         min_v_mem: Lower bound for membrane potential v_mem, clipped at every time step.
         shape: Optionally initialise the layer state with given shape. If None, will be inferred from input_size.
         record_states: When True, will record all internal states such as v_mem or i_syn in a dictionary attribute `recordings`. Default is False.
+                       A :class:`~sinabs.layers.StateProbe` can be passed instead, to record only
+                       selected states and neurons with bounded memory.
+        checkpoint_steps: Gradient checkpointing interval in time steps, or "auto". See :class:`~sinabs.layers.LIF`.
+        checkpoint_memory_budget: Memory budget in bytes for "auto" checkpointing. See :class:`~sinabs.layers.LIF`.
 
     Shape:
         - Input: :math:`(Batch, Time, Channel, Height, Width)` or :math:`(Batch, Time, Channel)`
@@ -133,7 +392,9 @@ class IAFRecurrent(LIFRecurrent):
         tau_syn: Optional[float] = None,
         min_v_mem: Optional[float] = None,
         shape: Optional[torch.Size] = None,
-        record_states: bool = False,
+        record_states: Union[bool, StateProbe] = False,
+        checkpoint_steps: Optional[Union[int, str]] = None,
+        checkpoint_memory_budget: Optional[int] = None,
     ):
         super().__init__(
             rec_connect=rec_connect,
@@ -147,6 +408,8 @@ class IAFRecurrent(LIFRecurrent):
             shape=shape,
             norm_input=False,
             record_states=record_states,
+            checkpoint_steps=checkpoint_steps,
+            checkpoint_memory_budget=checkpoint_memory_budget,
         )
         # IAF does not have time constants
         self.tau_mem = None
@@ -6,6 +6,7 @@ import torch.nn as nn
 from sinabs.activation import MembraneSubtract, MultiSpike, SingleExponential
 
 from . import functional
+from .probe import StateProbe
 from .reshape import SqueezeMixin
 from .stateful_layer import StatefulLayer
 
@@ -48,6 +49,24 @@ class LIF(StatefulLayer):
         norm_input: When True, normalise input current by tau. This helps when training time constants.
         record_states: When True, will record all internal states such as v_mem or i_syn in a dictionary
             attribute `recordings`. Default is False.
+            A :class:`~sinabs.layers.StateProbe` can be passed instead, to record only
+            selected states and neurons with bounded memory.
+            A probe requires the state after every time step, so training does not use the
+            faster `functional.lif_forward_bptt` engine while a probe is attached.
+        saved_state_dtype: Data type in which membrane potentials are stored for the backward pass.
+            A lower precision such as torch.bfloat16 saves memory during training, at the cost of
+            approximate gradients. If None (default), the input data type is used.
+        checkpoint_steps: If given, neuron states are only stored every `checkpoint_steps` time steps
+            for the backward pass and the steps in between are recomputed during the backward pass.
+            This reduces memory during training at the cost of additional computation. Set to "auto"
+            to choose the number of steps from `checkpoint_memory_budget`. Default is None.
+        checkpoint_memory_budget: Memory in bytes that may be used for the backward pass of this layer
+            if `checkpoint_steps` is "auto". If None (default), memory consumption is minimized.
+        spike_dtype: Data type of the output spikes if no gradients are required, such as torch.uint8,
+            or torch.bool for SingleSpike, which need a quarter of the memory of float32 spikes.
+            Modules with floating point weights, such as convolutional layers, need float input,
+            see :func:`~sinabs.hooks.register_float_input_hooks`. If None (default), spikes have
+            the data type of the input.
 
     Shape:
         - Input: :math:`(Batch, Time, Channel, Height, Width)` or :math:`(Batch, Time, Channel)`
@@ -70,7 +89,11 @@ class LIF(StatefulLayer):
         train_alphas: bool = False,
         shape: Optional[torch.Size] = None,
         norm_input: bool = True,
-        record_states: bool = False,
+        record_states: Union[bool, StateProbe] = False,
+        saved_state_dtype: Optional[torch.dtype] = None,
+        checkpoint_steps: Optional[Union[int, str]] = None,
+        checkpoint_memory_budget: Optional[int] = None,
+        spike_dtype: Optional[torch.dtype] = None,
     ):
         super().__init__(
             state_names=["v_mem", "i_syn"] if tau_syn is not None else ["v_mem"]
@@ -99,6 +122,10 @@ class LIF(StatefulLayer):
         self.train_alphas = train_alphas
         self.norm_input = norm_input
         self.record_states = record_states
+        self.saved_state_dtype = saved_state_dtype
+        self.checkpoint_steps = checkpoint_steps
+        self.checkpoint_memory_budget = checkpoint_memory_budget
+        self.spike_dtype = spike_dtype
         self.min_v_mem = (
             nn.Parameter(torch.as_tensor(min_v_mem), requires_grad=False)
             if min_v_mem is not None
@@ -161,21 +188,7 @@ class LIF(StatefulLayer):
         Returns:
             Output data with same shape as `input_data`.
         """
-        batch_size, time_steps, *trailing_dim = input_data.shape
-
-        # Ensure the state is initialized.
-        if not self.is_state_initialised():
-            self.init_state_with_shape((batch_size, *trailing_dim))
-
-        if not self.state_has_shape((batch_size, *trailing_dim)):
-            # If the trailing dim has changed, we reinitialize the states.
-            if not self.has_trailing_dimension(trailing_dim):
-                self.init_state_with_shape((batch_size, *trailing_dim))
-            # Otherwise only the batch size has changed.
-            else:
-                self.handle_state_batch_size_mismatch(
-                    batch_size
-                )  # with the input batch size
+        self._prepare_state(input_data.shape)
 
         alpha_mem = self.alpha_mem_calculated
         alpha_syn = self.alpha_syn_calculated
@@ -192,13 +205,73 @@ class LIF(StatefulLayer):
             min_v_mem=self.min_v_mem,
             norm_input=self.norm_input,
             record_states=self.record_states,
+            saved_state_dtype=self.saved_state_dtype,
+            checkpoint_steps=self._resolve_checkpoint_steps(input_data),
+            spike_dtype=self.spike_dtype,
         )
-        self.v_mem = state["v_mem"]
-        self.i_syn = state["i_syn"] if alpha_syn is not None else None
+        self._set_states(state)
+        if alpha_syn is None:
+            self.i_syn = None
         self.recordings = recordings
 
-        self.firing_rate = spikes.mean()
-        return spikes
+        self.firing_rate = spikes.sum() / spikes.numel()
+        return self._compact_spikes(spikes)
+
+    def step(self, input_data: torch.Tensor) -> torch.Tensor:
+        """Process a single time step, e.g. for closed-loop applications with batch size 1.
+
+        Compared to `forward`, the state shapes are only checked when they differ from the
+        input shape, and decay factors are only recomputed when parameters have changed.
+        `firing_rate` is not updated and forward hooks are not called.
+
+        Parameters:
+            input_data: Data of one time step. Expected shape: (batch, ...)
+
+        Returns:
+            Output data with same shape as `input_data`.
+        """
+        if self.v_mem.shape != input_data.shape:
+            self._prepare_state((input_data.shape[0], 1, *input_data.shape[1:]))
+        alpha_mem, alpha_syn = self._cached(
+            "alphas", lambda: (self.alpha_mem_calculated, self.alpha_syn_calculated)
+        )
+        spikes, state = functional.lif_forward_single(
+            input_data=input_data,
+            alpha_mem=alpha_mem,
+            alpha_syn=alpha_syn,
+            state=dict(self._buffers),
+            spike_threshold=self.spike_threshold,
+            spike_fn=self.spike_fn,
+            reset_fn=self.reset_fn,
+            surrogate_grad_fn=self.surrogate_grad_fn,
+            min_v_mem=self.min_v_mem,
+            norm_input=self.norm_input,
+        )
+        self._update_step_states(state)
+        return self._compact_spikes(spikes)
+
+    def _compact_spikes(self, spikes: torch.Tensor) -> torch.Tensor:
+        # Convert spikes to `spike_dtype`, unless gradients need to be propagated
+        if self.spike_dtype is None or spikes.requires_grad:
+            return spikes
+        return spikes.to(self.spike_dtype)
+
+    def _saved_bytes_per_neuron(self, dtype: torch.dtype) -> float:
+        # Memory per neuron and time step that `forward` saves for the backward pass
+        return functional.lif_saved_bytes_per_neuron(
+            alpha_mem=self.alpha_mem_calculated,
+            alpha_syn=self.alpha_syn_calculated,
+            spike_threshold=self.spike_threshold,
+            spike_fn=self.spike_fn,
+            reset_fn=self.reset_fn,
+            surrogate_grad_fn=self.surrogate_grad_fn,
+            min_v_mem=self.min_v_mem,
+            norm_input=self.norm_input,
+            record_states=self.record_states,
+            saved_state_dtype=self.saved_state_dtype,
+            dtype=dtype,
+            rec_connect=getattr(self, "rec_connect", None),
+        )
 
     @property
     def shape(self):
@@ -229,6 +302,10 @@ class LIF(StatefulLayer):
             min_v_mem=self.min_v_mem,
             norm_input=self.norm_input,
             record_states=self.record_states,
+            saved_state_dtype=self.saved_state_dtype,
+            checkpoint_steps=self.checkpoint_steps,
+            checkpoint_memory_budget=self.checkpoint_memory_budget,
+            spike_dtype=self.spike_dtype,
         )
         return param_dict
 
@@ -257,6 +334,8 @@ class LIFRecurrent(LIF):
     Parameters:
         tau_mem: Membrane potential time constant.
         rec_connect: An nn.Module which defines the recurrent connectivity, e.g. nn.Linear
+                     For an nn.Linear, which may have a torch sparse weight, inference without
+                     gradients only multiplies the weights of neurons that have spiked.
         tau_syn: Synaptic decay time constants. If None, no synaptic dynamics are used, which is the default.
         spike_threshold: Spikes are emitted if v_mem is above that threshold. By default set to 1.0.
         spike_fn: Specify how many spikes per time step per neuron can be emitted.
@@ -267,6 +346,10 @@ class LIFRecurrent(LIF):
         shape: Optionally initialise the layer state with given shape. If None, will be inferred from input_size.
         norm_input: When True, normalise input current by tau. This helps when training time constants.
         record_states: When True, will record all internal states such as v_mem or i_syn in a dictionary attribute `recordings`. Default is False.
+                       A :class:`~sinabs.layers.StateProbe` can be passed instead, to record only
+                       selected states and neurons with bounded memory.
+        checkpoint_steps: Gradient checkpointing interval in time steps, or "auto". See :class:`~sinabs.layers.LIF`.
+        checkpoint_memory_budget: Memory budget in bytes for "auto" checkpointing. See :class:`~sinabs.layers.LIF`.
 
     Shape:
         - Input: :math:`(Batch, Time, Channel, Height, Width)` or :math:`(Batch, Time, Channel)`
@@ -290,7 +373,9 @@ class LIFRecurrent(LIF):
         train_alphas: bool = False,
         shape: Optional[torch.Size] = None,
         norm_input: bool = True,
-        record_states: bool = False,
+        record_states: Union[bool, StateProbe] = False,
+        checkpoint_steps: Optional[Union[int, str]] = None,
+        checkpoint_memory_budget: Optional[int] = None,
     ):
         super().__init__(
             tau_mem=tau_mem,
@@ -304,6 +389,8 @@ class LIFRecurrent(LIF):
             train_alphas=train_alphas,
             norm_input=norm_input,
             record_states=record_states,
+            checkpoint_steps=checkpoint_steps,
+            checkpoint_memory_budget=checkpoint_memory_budget,
         )
         self.rec_connect = rec_connect
 
@@ -339,17 +426,34 @@ class LIFRecurrent(LIF):
             norm_input=self.norm_input,
             rec_connect=self.rec_connect,
             record_states=self.record_states,
+            checkpoint_steps=self._resolve_checkpoint_steps(input_data),
         )
-        self.v_mem = state["v_mem"]
-        self.i_syn = state["i_syn"] if alpha_syn is not None else None
+        self._set_states(state)
+        if alpha_syn is None:
+            self.i_syn = None
         self.recordings = recordings
 
         self.firing_rate = spikes.sum() / spikes.numel()
         return spikes
 
+    def step(self, input_data: torch.Tensor) -> torch.Tensor:
+        """Process a single time step. The output of `rec_connect` is carried over to the
+        next call of `step`, unless the states are replaced in between, e.g. by a reset.
+
+        Parameters:
+            input_data: Data of one time step. Expected shape: (batch, ...)
+
+        Returns:
+            Output data with same shape as `input_data`.
+        """
+        return _recurrent_step(self, input_data, super().step)
+
     @property
     def _param_dict(self) -> dict:
         param_dict = super()._param_dict
+        # Recurrent layers are simulated step by step
+        param_dict.pop("saved_state_dtype")
+        param_dict.pop("spike_dtype")
         param_dict.update(rec_connect=self.rec_connect)
         return param_dict
 
@@ -388,3 +492,18 @@ class LIFSqueeze(LIF, SqueezeMixin):
     @property
     def _param_dict(self) -> dict:
         return self.squeeze_param_dict(super()._param_dict)
+
+
+def _recurrent_step(
+    layer: StatefulLayer, input_data: torch.Tensor, step: Callable
+) -> torch.Tensor:
+    """Single time step of a recurrent layer, with the output of `layer.rec_connect` for the
+    spikes of the previous step added to the input. It is discarded if the states of the layer
+    have been replaced since, e.g. by a reset."""
+    v_mem, rec_out = layer._step_cache.get("rec_out", (None, None))
+    if v_mem is layer.v_mem and rec_out.shape == input_data.shape:
+        input_data = input_data + rec_out
+    spikes = step(input_data)
+    rec_out = layer.rec_connect(spikes).reshape(spikes.shape)
+    layer._step_cache["rec_out"] = (layer.v_mem, rec_out)
+    return spikes
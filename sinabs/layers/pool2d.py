@@ -95,6 +95,9 @@ class SumPool2d(torch.nn.LPPool2d):
     """Non-spiking sumpooling layer to be used in analogue Torch models. It is identical to
     torch.nn.LPPool2d with p=1.
 
+    Integer or bool input, such as spikes of layers with `spike_dtype`, is summed without
+    conversion of the output to float. Sums of bool input are returned as uint8.
+
     Parameters:
         kernel_size: the size of the window
         stride: the stride of the window. Default value is kernel_size
@@ -103,3 +106,11 @@ class SumPool2d(torch.nn.LPPool2d):
 
     def __init__(self, kernel_size, stride=None, ceil_mode=False):
         super().__init__(1, kernel_size, stride, ceil_mode)
+
+    def forward(self, input_data: torch.Tensor) -> torch.Tensor:
+        if input_data.is_floating_point():
+            return super().forward(input_data)
+        # Compact spikes are summed as float and converted back
+        output = super().forward(input_data.float()).round()
+        dtype = torch.uint8 if input_data.dtype == torch.bool else input_data.dtype
+        return output.to(dtype)
@@ -0,0 +1,204 @@
+from contextlib import contextmanager
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import torch
+
+REDUCTIONS = (None, "mean", "max", "histogram")
+
+
+class StateProbe:
+    """Record selected neuron states of a spiking layer with bounded memory.
+
+    An instance can be passed as `record_states` to spiking layers such as
+    :class:`~sinabs.layers.LIF` or :class:`~sinabs.layers.ALIF`. Instead of storing every
+    state of every neuron at every time step, the probe is updated after each simulated time
+    step and only keeps the selected states of the selected neurons, either for a fixed number
+    of recent time steps or as running reductions over time. Memory is allocated once, when the
+    probe sees the first time step.
+
+    Time steps are counted across forward passes until `reset` is called, so `every` and the
+    ring buffer continue seamlessly when a long sequence is processed in several windows.
+
+    Layers with a probe are simulated step by step. For :class:`~sinabs.layers.LIF` and
+    :class:`~sinabs.layers.IAF` this means that training does not use the faster
+    `functional.lif_forward_bptt` engine, so the backward pass is slower while a probe is
+    attached.
+
+    Example:
+        >>> probe = StateProbe(states=["v_mem"], index=(slice(None), 0), every=10)
+        >>> layer = sinabs.layers.LIF(tau_mem=20.0, record_states=probe)
+        >>> layer(data)
+        >>> probe.recordings["v_mem"]  # (time, batch, height, width) of channel 0
+
+    Parameters:
+        states: Names of the states to record, such as "v_mem", "i_syn" or "b".
+        index: Index into state tensors of shape (batch, ...) that selects the neurons to be
+            recorded, e.g. `(slice(None), 0)` for the first channel of every sample or
+            `(0, [3, 7])` for neurons 3 and 7 of the first sample. If None, all neurons are
+            recorded.
+        every: Only every `every`-th time step is recorded.
+        reduction: If None, recorded states are kept in a ring buffer. "mean" and "max" keep a
+            running mean or maximum over time for each selected neuron. "histogram" counts the
+            values of all selected neurons and time steps in `bins` bins over `value_range`.
+        buffer_size: Number of recorded time steps that are kept if `reduction` is None. Once
+            the buffer is full, the oldest time steps are overwritten.
+        bins: Number of histogram bins.
+        value_range: Lower and upper edge of the histogram. Values outside are ignored.
+    """
+
+    def __init__(
+        self,
+        states: Sequence[str] = ("v_mem",),
+        index: Optional[Union[int, slice, Tuple]] = None,
+        every: int = 1,
+        reduction: Optional[str] = None,
+        buffer_size: int = 1000,
+        bins: int = 100,
+        value_range: Optional[Tuple[float, float]] = None,
+    ):
+        if reduction not in REDUCTIONS:
+            raise ValueError(f"`reduction` must be one of {REDUCTIONS}.")
+        if reduction == "histogram" and value_range is None:
+            raise ValueError("`value_range` is required for histograms.")
+        if every < 1 or buffer_size < 1:
+            raise ValueError("`every` and `buffer_size` must be positive.")
+        self.states = list(states)
+        self.index = index
+        self.every = every
+        self.reduction = reduction
+        self.buffer_size = buffer_size
+        self.bins = bins
+        self.value_range = value_range
+        self._paused = False
+        self.reset()
+
+    def reset(self):
+        """Discard all recordings and start counting time steps from zero."""
+        self._buffers: Dict[str, torch.Tensor] = dict()
+        self._steps: Dict[str, torch.Tensor] = dict()
+        self._n_steps: Dict[str, int] = dict()
+        self._n_recorded: Dict[str, int] = dict()
+
+    def update(self, state: Dict[str, torch.Tensor]):
+        """Record one time step.
+
+        Parameters:
+            state: Dict of states of shape (batch, ...) after the time step. States that are
+                not probed, or not contained in `state`, are ignored.
+        """
+        if self._paused:
+            return
+        for name in self.states:
+            if name not in state:
+                continue
+            step = self._n_steps.get(name, 0)
+            self._n_steps[name] = step + 1
+            if step % self.every == 0:
+                with torch.no_grad():
+                    self._record(name, self._select(state[name]), step)
+
+    def update_sequence(self, states: Dict[str, torch.Tensor]):
+        """Record consecutive time steps.
+
+        Parameters:
+            states: Dict of states of shape (batch, time, ...)
+        """
+        n_time_steps = next(iter(states.values())).shape[1]
+        for step in range(n_time_steps):
+            self.update({name: value[:, step] for name, value in states.items()})
+
+    @property
+    def recordings(self) -> Dict[str, torch.Tensor]:
+        """Dict with results for each recorded state.
+
+        Without reduction, the recorded states of the selected neurons, in chronological order,
+        with time as the first dimension. With "mean" or "max" reduction, the reduced value for
+        each selected neuron. For histograms, the counts in each bin.
+        """
+        results = dict()
+        for name, buffer in self._buffers.items():
+            n_recorded = self._n_recorded[name]
+            if self.reduction is None:
+                results[name] = _chronological(buffer, n_recorded)
+            elif self.reduction == "mean":
+                results[name] = buffer / n_recorded
+            else:
+                results[name] = buffer.clone()
+        return results
+
+    @property
+    def steps(self) -> Dict[str, torch.Tensor]:
+        """Time steps of the entries of `recordings`, if `reduction` is None."""
+        return {
+            name: _chronological(steps, self._n_recorded[name])
+            for name, steps in self._steps.items()
+        }
+
+    @property
+    def bin_edges(self) -> torch.Tensor:
+        """Edges of the histogram bins."""
+        return torch.linspace(*self.value_range, self.bins + 1)
+
+    @contextmanager
+    def paused(self):
+        """Context in which updates are ignored, e.g. when time steps are recomputed."""
+        paused, self._paused = self._paused, True
+        try:
+            yield self
+        finally:
+            self._paused = paused
+
+    def _select(self, value: torch.Tensor) -> torch.Tensor:
+        value = value.detach()
+        if self.index is None:
+            return value
+        return value[self.index]
+
+    def _record(self, name: str, value: torch.Tensor, step: int):
+        buffer = self._buffers.get(name)
+        n_recorded = self._n_recorded.get(name, 0)
+        if self.reduction is None:
+            if buffer is None:
+                buffer = value.new_empty((self.buffer_size, *value.shape))
+                self._steps[name] = torch.empty(self.buffer_size, dtype=torch.long)
+            position = n_recorded % self.buffer_size
+            buffer[position] = value
+            self._steps[name][position] = step
+        elif self.reduction == "histogram":
+            counts = torch.histc(value.float(), self.bins, *self.value_range).to(
+                torch.long
+            )
+            buffer = counts if buffer is None else buffer.add_(counts)
+        elif buffer is None:
+            buffer = value.clone() if value.is_floating_point() else value.float()
+        elif self.reduction == "mean":
+            buffer.add_(value)
+        else:
+            torch.maximum(buffer, value, out=buffer)
+        self._buffers[name] = buffer
+        self._n_recorded[name] = n_recorded + 1
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(states={self.states}, index={self.index}, "
+            f"every={self.every}, reduction={self.reduction})"
+        )
+
+
+def split_record_states(
+    record_states: Union[bool, StateProbe],
+) -> Tuple[bool, Optional[StateProbe]]:
+    """Split the `record_states` argument of the functional forward passes into a flag whether
+    all states are to be recorded and an optional probe that is to be updated."""
+    if isinstance(record_states, StateProbe):
+        return False, record_states
+    return bool(record_states), None
+
+
+def _chronological(buffer: torch.Tensor, n_recorded: int) -> torch.Tensor:
+    # Entries of a ring buffer from oldest to newest
+    size = len(buffer)
+    if n_recorded <= size:
+        return buffer[:n_recorded].clone()
+    position = n_recorded % size
+    return torch.cat((buffer[position:], buffer[:position]))
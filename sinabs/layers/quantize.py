@@ -1,3 +1,4 @@
+import torch
 import torch.nn as nn
 
 from sinabs.activation import Quantize
@@ -19,3 +20,52 @@ class QuantizeLayer(nn.Module):
             return Quantize.apply(data)
         else:
             return data
+
+
+class FixedPointConv2d(nn.Conv2d):
+    """2D convolution on integer input with integer valued weights and bias, such as the
+    convolutional layer of DYNAP-CNN after
+    :func:`~sinabs.backend.dynapcnn.discretize.discretize_conv_spike`.
+
+    The result is returned as int32 tensor, to be passed on to an
+    :class:`~sinabs.layers.IAF` layer with `fixed_point=True`. As long as the sums do not
+    exceed 2^24, the float convolution is exact, so the result is bit-identical to integer
+    arithmetic.
+
+    Takes the same parameters as `torch.nn.Conv2d`.
+    """
+
+    def forward(self, data: torch.Tensor) -> torch.Tensor:
+        if data.is_floating_point():
+            raise TypeError("Input to `FixedPointConv2d` must be of integer type.")
+        output = super().forward(data.to(self.weight.dtype))
+        return output.round().to(torch.int32)
+
+    @classmethod
+    def from_conv(cls, conv: nn.Conv2d) -> "FixedPointConv2d":
+        """Create a `FixedPointConv2d` with the same configuration and parameters as `conv`.
+
+        Parameters:
+            conv: Convolutional layer with integer valued weights and bias
+        """
+        for param in conv.parameters():
+            if not torch.equal(param, param.round()):
+                raise ValueError(
+                    "Weights and bias of `conv` must have integer values. "
+                    "Consider discretizing the layer first."
+                )
+        layer = cls(
+            in_channels=conv.in_channels,
+            out_channels=conv.out_channels,
+            kernel_size=conv.kernel_size,
+            stride=conv.stride,
+            padding=conv.padding,
+            dilation=conv.dilation,
+            groups=conv.groups,
+            bias=conv.bias is not None,
+            padding_mode=conv.padding_mode,
+            device=conv.weight.device,
+            dtype=conv.weight.dtype,
+        )
+        layer.load_state_dict(conv.state_dict())
+        return layer.requires_grad_(False)
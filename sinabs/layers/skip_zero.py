@@ -0,0 +1,68 @@
+import torch
+import torch.nn as nn
+
+
+class SkipZeroSteps(nn.Module):
+    """Utility layer which wraps a module, such as a convolutional or
+    :class:`~sinabs.layers.SumPool2d` layer, and only applies it to the non-zero slices of its
+    input.
+
+    Input in the (Batch*Time, ...) layout of squeeze layers, e.g. from event cameras, often
+    contains time steps without any events. The wrapped module is only applied to the slices
+    along the first dimension that contain non-zero values. The output for empty slices is
+    computed once, from a single zero slice, which is zero for layers without bias. If the
+    input requires gradients, the module is applied to all slices.
+
+    The wrapped module has to process each slice independently and must not have any state,
+    as is the case for convolutional, pooling and linear layers. Combine with
+    `skip_zero_steps=True` of :class:`~sinabs.layers.IAF` layers, to also skip the neuron
+    updates for time steps without input.
+
+    Example:
+        >>> model = sinabs.conversion.replace_module(model, nn.Conv2d, SkipZeroSteps)
+
+    Parameters:
+        module: The module to be wrapped
+    """
+
+    def __init__(self, module: nn.Module):
+        super().__init__()
+        self.module = module
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        if torch.is_grad_enabled() and x.requires_grad:
+            # Input gradients of empty slices are not necessarily zero
+            return self.module(x)
+        active = nonzero_slices(x)
+        num_active = int(active.sum())
+        if num_active == len(x):
+            return self.module(x)
+
+        zero_output = self.module(torch.zeros_like(x[:1]))
+        if num_active == 0:
+            return zero_output.expand(len(x), *zero_output.shape[1:]).clone()
+        active_output = self.module(x[active])
+        if zero_output.any():
+            output = zero_output.expand(len(x), *zero_output.shape[1:]).clone()
+        else:
+            output = zero_output.new_zeros((len(x), *zero_output.shape[1:]))
+        return output.index_copy_(0, active.nonzero().squeeze(1), active_output)
+
+    def __repr__(self):
+        return "SkipZeroSteps " + self.module.__repr__()
+
+
+def nonzero_slices(x: torch.Tensor) -> torch.Tensor:
+    """Whether each slice of `x` along the first dimension contains non-zero values.
+
+    Parameters:
+        x: Tensor of shape (N, ...)
+
+    Returns:
+        Bool tensor of shape (N,)
+    """
+    flat = x.flatten(1)
+    if flat.dtype == torch.bool:
+        return flat.any(1)
+    # Faster than `any` for floating point data
+    return (flat.amax(1) != 0) | (flat.amin(1) != 0)
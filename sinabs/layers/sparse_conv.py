@@ -0,0 +1,91 @@
+import torch
+import torch.nn as nn
+
+from . import functional
+
+
+class SparseConv2d(nn.Conv2d):
+    """2D convolution that processes sparse input, such as spikes, event-driven.
+
+    Drop-in replacement for `torch.nn.Conv2d`. At each call, the fraction of non-zero input
+    values is measured. If it does not exceed `max_density`, only the non-zero inputs are
+    processed with :func:`~sinabs.layers.functional.sparse_conv2d`, otherwise the dense
+    convolution of `torch.nn.Conv2d` is used. Both give the same results, up to floating point
+    rounding.
+
+    Input is expected in the (batch * time, channels, height, width) layout of
+    :class:`~sinabs.layers.IAFSqueeze` and other squeeze layers. Spikes of integer or bool data
+    type are accepted as well. Input given as torch sparse COO tensor is always processed
+    event-driven.
+
+    The event-driven convolution does not compute gradients with respect to the input, so
+    the dense convolution is used whenever the input requires gradients. It also requires
+    `padding_mode="zeros"`.
+
+    Parameters:
+        max_density: Maximum fraction of non-zero input values for which the event-driven
+            convolution is used. Where the event-driven convolution becomes slower than the
+            dense one depends on the hardware and the layer shape. It can be measured with
+            `examples/benchmarks/sparse_conv_crossover.py`.
+        args: Passed on to `torch.nn.Conv2d`
+        kwargs: Passed on to `torch.nn.Conv2d`
+    """
+
+    def __init__(self, *args, max_density: float = 0.002, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_density = max_density
+
+    def forward(self, input_data: torch.Tensor) -> torch.Tensor:
+        if self.use_sparse(input_data):
+            return functional.sparse_conv2d(
+                input_data,
+                self.weight,
+                self.bias,
+                stride=self.stride,
+                padding=self._reversed_padding_repeated_twice,
+                dilation=self.dilation,
+                groups=self.groups,
+            )
+        if input_data.layout != torch.strided:
+            input_data = input_data.to_dense()
+        return super().forward(input_data.to(self.weight.dtype))
+
+    def use_sparse(self, input_data: torch.Tensor) -> bool:
+        """Whether `input_data` is processed by the event-driven convolution.
+
+        Parameters:
+            input_data: Input of shape (batch * time, channels, height, width)
+        """
+        if self.padding_mode != "zeros":
+            return False
+        if torch.is_grad_enabled() and input_data.requires_grad:
+            return False
+        if input_data.layout == torch.sparse_coo:
+            return True
+        return torch.count_nonzero(input_data) <= self.max_density * input_data.numel()
+
+    @classmethod
+    def from_conv(cls, conv: nn.Conv2d, max_density: float = 0.002) -> "SparseConv2d":
+        """Create a `SparseConv2d` with the same configuration and parameters as `conv`.
+
+        Parameters:
+            conv: Convolutional layer
+            max_density: Maximum fraction of non-zero input values for which the
+                event-driven convolution is used.
+        """
+        layer = cls(
+            in_channels=conv.in_channels,
+            out_channels=conv.out_channels,
+            kernel_size=conv.kernel_size,
+            stride=conv.stride,
+            padding=conv.padding,
+            dilation=conv.dilation,
+            groups=conv.groups,
+            bias=conv.bias is not None,
+            padding_mode=conv.padding_mode,
+            max_density=max_density,
+            device=conv.weight.device,
+            dtype=conv.weight.dtype,
+        )
+        layer.load_state_dict(conv.state_dict())
+        return layer
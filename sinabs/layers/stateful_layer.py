@@ -1,8 +1,11 @@
 import random
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 import torch
 
+from . import functional
+from .probe import split_record_states
+
 
 class StatefulLayer(torch.nn.Module):
     """A base class that instantiates buffers/states which update at every time step and provides
@@ -17,6 +20,10 @@ class StatefulLayer(torch.nn.Module):
 
         for state_name in state_names:
             self.register_buffer(state_name, torch.zeros((0)))
+        self._step_cache = dict()
+        # If True, new states are copied into the existing buffers where possible, such
+        # that they stay in memory managed elsewhere, e.g. by a `StateArena`
+        self._states_in_place = False
 
     def zero_grad(self, set_to_none: bool = False) -> None:
         r"""Zero's the gradients for buffers/state along with the parameters.
@@ -41,6 +48,72 @@ class StatefulLayer(torch.nn.Module):
             "No forward method has been implemented for this class"
         )
 
+    def step(self, input_data: torch.Tensor) -> torch.Tensor:
+        """
+        Not implemented - You need to implement a step method in child class
+        """
+        raise NotImplementedError(
+            f"{self.__class__.__name__} does not support single time steps."
+        )
+
+    def _cached(self, name: str, compute: Callable):
+        # Result of `compute`, which depends on the parameters of the layer. It is only
+        # recomputed if a parameter was replaced or modified in place, or needs gradients.
+        params = [p for p in self._parameters.values() if p is not None]
+        if torch.is_grad_enabled() and any(p.requires_grad for p in params):
+            return compute()
+        key = tuple((id(p), p._version) for p in params)
+        cached = self._step_cache.get(name)
+        if cached is None or cached[0] != key:
+            cached = (key, compute())
+            self._step_cache[name] = cached
+        return cached[1]
+
+    def _resolve_checkpoint_steps(self, input_data: torch.Tensor) -> Optional[int]:
+        # Time steps per checkpointed chunk, for layers with `checkpoint_steps`. The memory
+        # saved for the backward pass is only estimated for "auto", as that adds noticeable
+        # overhead to forward passes of few time steps.
+        saved_bytes_per_neuron = None
+        if self.checkpoint_steps == "auto":
+            saved_bytes_per_neuron = self._saved_bytes_per_neuron(input_data.dtype)
+        return functional.resolve_checkpoint_steps(
+            self.checkpoint_steps,
+            input_data,
+            num_states=len(list(self.buffers())),
+            saved_bytes_per_neuron=saved_bytes_per_neuron,
+            memory_budget=self.checkpoint_memory_budget,
+        )
+
+    def _set_states(self, state: Dict[str, torch.Tensor]):
+        # Set the states after a forward pass or a call to `step`. Buffers are assigned
+        # directly, bypassing `__setattr__`, for lower latency.
+        for name, value in state.items():
+            buffer = self._buffers.get(name)
+            if value is buffer or name not in self._buffers:
+                continue
+            if (
+                self._states_in_place
+                and buffer is not None
+                and buffer.shape == value.shape
+                and buffer.dtype == value.dtype
+                and buffer.device == value.device
+                and not buffer.requires_grad
+                and not (value.requires_grad and torch.is_grad_enabled())
+            ):
+                with torch.no_grad():
+                    buffer.copy_(value)
+            else:
+                self._buffers[name] = value
+
+    def _update_step_states(self, state: Dict[str, torch.Tensor]):
+        # Set the states after a call to `step`
+        record_states, probe = split_record_states(self.record_states)
+        self._set_states(state)
+        if record_states:
+            self.recordings = {name: state[name].unsqueeze(1) for name in self._buffers}
+        if probe is not None:
+            probe.update(state)
+
     def is_state_initialised(self) -> bool:
         """Checks if buffers are of shape 0 and returns True only if none of them are."""
         for buffer in self.buffers():
@@ -84,6 +157,18 @@ class StatefulLayer(torch.nn.Module):
                 return False
         return True
 
+    def _prepare_state(self, input_shape: torch.Size):
+        # Initialize or resize the state for input of shape (batch, time, ...)
+        batch_size, time_steps, *trailing_dim = input_shape
+        if not self.is_state_initialised() or not self.has_trailing_dimension(
+            trailing_dim
+        ):
+            # If the trailing dim has changed, we reinitialize the states.
+            self.init_state_with_shape((batch_size, *trailing_dim))
+        elif not self.state_has_shape((batch_size, *trailing_dim)):
+            # Otherwise only the batch size has changed.
+            self.handle_state_batch_size_mismatch(batch_size)
+
     def init_state_with_shape(self, shape, randomize: bool = False) -> None:
         """Initialise state/buffers with either zeros or random tensor of specific shape."""
         for name, buffer in self.named_buffers():
@@ -112,18 +197,19 @@ class StatefulLayer(torch.nn.Module):
         """
         if self.is_state_initialised():
             for name, buffer in self.named_buffers():
-                if randomize:
-                    if value_ranges and name in value_ranges:
-                        min_value, max_value = value_ranges[name]
+                # States are modified in place, so that they can be views, e.g. into a
+                # `StateArena`
+                with torch.no_grad():
+                    if randomize:
+                        if value_ranges and name in value_ranges:
+                            min_value, max_value = value_ranges[name]
+                        else:
+                            min_value, max_value = (0.0, 1.0)
+                        buffer.uniform_(min_value, max_value)
                     else:
-                        min_value, max_value = (0.0, 1.0)
-                    # Initialize with uniform distribution
-                    torch.nn.init.uniform_(buffer)
-                    # Rescale the value
-                    buffer.data = buffer * (max_value - min_value) + min_value
-                else:
-                    buffer.zero_()
-                buffer.detach_()
+                        buffer.zero_()
+                if buffer.requires_grad:
+                    buffer.detach_()
 
     def __repr__(self):
         param_strings = [
@@ -160,6 +246,18 @@ class StatefulLayer(torch.nn.Module):
 
         return copy
 
+    def _load_from_state_dict(self, state_dict, prefix, *args, **kwargs):
+        # States may have any shape, so adopt the shapes from the state dict
+        for name, buffer in self.named_buffers(recurse=False):
+            state = state_dict.get(prefix + name)
+            if state is not None and state.shape != buffer.shape:
+                setattr(
+                    self,
+                    name,
+                    torch.empty(state.shape, dtype=buffer.dtype, device=buffer.device),
+                )
+        super()._load_from_state_dict(state_dict, prefix, *args, **kwargs)
+
     @property
     def _param_dict(self) -> dict:
         """Dict of all parameters relevant for creating a new instance with same parameters as
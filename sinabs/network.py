@@ -1,11 +1,13 @@
+import math
 import warnings
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Callable, Dict, List, Optional, Tuple, Union
 
 import numpy as np
 import torch
 import torch.nn as nn
 
 from .layers import StatefulLayer
+from .layers.functional import checkpoint_steps_for_budget
 from .synopcounter import SNNAnalyzer
 from .utils import get_activations, get_network_activations
 
@@ -37,6 +39,7 @@ class Network(torch.nn.Module):
         self.analog_model: nn.Module = analog_model
         self.input_shape = input_shape
 
+        self._step_modules: Optional[List[nn.Module]] = None
         self.synops = synops
         if synops:
             self.synops_counter = SNNAnalyzer(self.spiking_model)
@@ -51,8 +54,23 @@ class Network(torch.nn.Module):
         return list(self.spiking_model.named_children())
 
     def _compute_shapes(self, input_shape, batch_size=1, num_timesteps=1):
+        # Besides the output shape of each module, the sizes of the outputs per sample and
+        # time step are recorded in the order of execution, for `estimate_memory`
+        activation_sizes = []
+        inner_modules = {
+            inner
+            for layer in self.spiking_model.modules()
+            if isinstance(layer, StatefulLayer)
+            for inner in layer.modules()
+            if inner is not layer
+        }
+
         def hook(module, inp, out):
             module.out_shape = out.shape[1:]
+            is_leaf = isinstance(module, StatefulLayer) or not any(module.children())
+            if is_leaf and module not in inner_modules:
+                numel = out.numel() // (batch_size * num_timesteps)
+                activation_sizes.append((module, numel, out.element_size()))
 
         hook_list = []
         for layer in self.spiking_model.modules():
@@ -69,14 +87,210 @@ class Network(torch.nn.Module):
         shape = [batch_size * num_timesteps] + list(input_shape)
         dummy_input = torch.zeros(shape, requires_grad=False).to(device)
         # do a forward pass
-        self(dummy_input)
+        with torch.no_grad():
+            self(dummy_input)
 
         [this_hook.remove() for this_hook in hook_list]
+        state_bytes = sum(
+            buffer.numel() * buffer.element_size()
+            for layer in self.spiking_model.modules()
+            if isinstance(layer, StatefulLayer)
+            for buffer in layer.buffers(recurse=False)
+        )
+        self._memory_profile = (
+            dummy_input[0].numel() * dummy_input.element_size(),
+            activation_sizes,
+            state_bytes // batch_size,
+        )
 
     def forward(self, tsrInput) -> torch.Tensor:
         """Forward pass for this model."""
         return self.spiking_model(tsrInput)
 
+    def step(self, input_data: torch.Tensor) -> torch.Tensor:
+        """Process a single time step, e.g. for closed-loop applications with batch size 1.
+
+        Stateful layers are advanced by their `step` method and all other modules are applied
+        to the input of shape (batch, ...) directly. The model therefore needs to be a
+        (nested) `nn.Sequential` whose other modules process each sample independently, such
+        as convolutional, pooling and linear layers. The list of modules is built at the first
+        call.
+
+        Parameters:
+            input_data: Data of one time step. Expected shape: (batch, ...)
+
+        Returns:
+            Output of the model for this time step
+        """
+        if self._step_modules is None:
+            self._step_modules = _sequential_modules(self.spiking_model)
+        for module in self._step_modules:
+            if isinstance(module, StatefulLayer):
+                input_data = module.step(input_data)
+            else:
+                input_data = module(input_data)
+        return input_data
+
+    def estimate_memory(
+        self,
+        batch_size: int,
+        num_timesteps: int,
+        chunk_size: Optional[int] = None,
+        training: bool = False,
+    ) -> int:
+        """Estimate the peak memory of a forward pass, and of the backward pass if `training`.
+
+        The estimate is based on the output shapes of all layers, as found by a forward pass
+        with input of shape `input_shape`, and includes parameters, neuron states, recorded
+        states and tensors saved for the backward pass of spiking layers. During inference,
+        only the input and output of one layer are held at a time, for a sequential model,
+        and spikes are counted in the `spike_dtype` of each layer. During training, all
+        activations are held until the backward pass, together with the tensors that the
+        simulation engine of each spiking layer saves. With gradient checkpointing, these
+        are replaced by the states at chunk boundaries and the recomputation of the largest
+        chunk. Memory of optimizers and temporary tensors within layers is not included.
+
+        Parameters:
+            batch_size: Number of samples
+            num_timesteps: Number of time steps per sample
+            chunk_size: Number of time steps per chunk for inference with
+                :func:`~sinabs.depth_first_forward`. If None, all time steps are processed
+                at once.
+            training: If True, estimate the memory of a forward and backward pass
+
+        Returns:
+            Estimated peak memory in bytes
+        """
+        if training:
+            return self._training_memory(batch_size, num_timesteps)
+        fixed, per_sample, per_step = self._memory_terms()
+        if chunk_size is None:
+            chunk_size = num_timesteps
+        chunk_size = min(chunk_size, num_timesteps)
+        return fixed + batch_size * (per_sample + chunk_size * per_step)
+
+    def plan_memory(
+        self,
+        memory_budget: int,
+        num_timesteps: int,
+        batch_size: Optional[int] = None,
+        training: bool = False,
+    ) -> Tuple[int, int]:
+        """Choose the batch size and number of time steps per chunk for inference with
+        :func:`~sinabs.depth_first_forward`, such that the memory from `estimate_memory`
+        fits into `memory_budget`.
+
+        If `batch_size` is None, the largest batch size for which all time steps can be
+        processed at once is chosen. If not even a single sample fits, time steps are
+        processed in chunks. For training, time steps are not chunked.
+
+        Example:
+            >>> batch_size, chunk_size = net.plan_memory(2**30, num_timesteps=1000)
+            >>> output = depth_first_forward(net.spiking_model, data, chunk_size=chunk_size)
+
+        Parameters:
+            memory_budget: Available memory in bytes
+            num_timesteps: Number of time steps per sample
+            batch_size: If given, only the number of time steps per chunk is chosen
+            training: If True, plan for a forward and backward pass
+
+        Returns:
+            Tuple of the batch size and the number of time steps per chunk
+        """
+        if training:
+            chunk_size = num_timesteps
+            if batch_size is None:
+                batch_size = _largest_batch_size(
+                    lambda size: self._training_memory(size, num_timesteps),
+                    memory_budget,
+                )
+        else:
+            fixed, per_sample, per_step = self._memory_terms()
+            available = memory_budget - fixed
+            if batch_size is None:
+                batch_size = max(
+                    1, available // (per_sample + num_timesteps * per_step)
+                )
+            chunk_size = (available // batch_size - per_sample) // per_step
+            chunk_size = min(max(1, chunk_size), num_timesteps)
+        required = self.estimate_memory(batch_size, num_timesteps, chunk_size, training)
+        if required > memory_budget:
+            warnings.warn(
+                f"Memory budget of {memory_budget} bytes is too small. A batch size of "
+                f"{batch_size} with {chunk_size} time steps per chunk requires an "
+                f"estimated {required} bytes."
+            )
+        return batch_size, chunk_size
+
+    def _get_memory_profile(self):
+        if getattr(self, "_memory_profile", None) is None:
+            if self.input_shape is None:
+                raise ValueError("`input_shape` is required to estimate memory.")
+            self._compute_shapes(self.input_shape)
+        return self._memory_profile
+
+    def _memory_terms(self) -> Tuple[int, int, int]:
+        # Memory in bytes for inference that is independent of the input, per sample, and
+        # per sample and time step
+        input_bytes, activation_sizes, state_bytes = self._get_memory_profile()
+
+        parameter_bytes = sum(p.numel() * p.element_size() for p in self.parameters())
+        step_bytes = [input_bytes]
+        # Memory per step that is held in addition to the layer outputs
+        retained_bytes = 0
+        for module, numel, element_size in activation_sizes:
+            if isinstance(module, StatefulLayer):
+                num_states = len(list(module.buffers(recurse=False)))
+                state_size = next(module.buffers(recurse=False)).element_size()
+                # Spikes are passed on in the data type of the states, or in the current
+                # `spike_dtype` of the layer
+                spike_dtype = getattr(module, "spike_dtype", None)
+                if spike_dtype is None:
+                    element_size = state_size
+                else:
+                    element_size = torch.empty(0, dtype=spike_dtype).element_size()
+                if module.record_states is True:
+                    retained_bytes += num_states * numel * state_size
+            step_bytes.append(numel * element_size)
+
+        layer_bytes = max(a + b for a, b in zip(step_bytes, step_bytes[1:] + [0]))
+        return parameter_bytes, state_bytes, math.ceil(layer_bytes + retained_bytes)
+
+    def _training_memory(self, batch_size: int, num_timesteps: int) -> int:
+        # Memory in bytes of a forward and backward pass
+        input_bytes, activation_sizes, state_bytes = self._get_memory_profile()
+
+        parameter_bytes = sum(p.numel() * p.element_size() for p in self.parameters())
+        # All layer outputs are held until the backward pass
+        step_bytes = input_bytes
+        saved_bytes = 0
+        # Memory for the recomputation of one checkpointed chunk during the backward pass
+        recompute_bytes = 0
+        for module, numel, element_size in activation_sizes:
+            if not isinstance(module, StatefulLayer):
+                step_bytes += numel * element_size
+                continue
+            buffers = list(module.buffers(recurse=False))
+            state_size = buffers[0].element_size()
+            # Spikes are passed on in the data type of the states
+            step_bytes += numel * state_size
+            neurons = batch_size * numel
+            if module.record_states is True:
+                saved_bytes += len(buffers) * neurons * num_timesteps * state_size
+            per_step = neurons * module._saved_bytes_per_neuron(buffers[0].dtype)
+            checkpoint_bytes = len(buffers) * neurons * state_size
+            steps = _checkpoint_steps(module, num_timesteps, per_step, checkpoint_bytes)
+            if steps is None or steps >= num_timesteps:
+                saved_bytes += num_timesteps * per_step
+            else:
+                # Only the states at chunk boundaries are kept
+                saved_bytes += math.ceil(num_timesteps / steps) * checkpoint_bytes
+                recompute_bytes = max(recompute_bytes, steps * per_step)
+
+        held_bytes = batch_size * (state_bytes + num_timesteps * step_bytes)
+        total = 2 * parameter_bytes + held_bytes + saved_bytes + recompute_bytes
+        return math.ceil(total)
+
     def compare_activations(
         self,
         data,
@@ -204,6 +418,54 @@ class Network(torch.nn.Module):
         return self.synops_counter.get_synops()
 
 
+def _checkpoint_steps(
+    layer: StatefulLayer, num_timesteps: int, step_bytes: float, checkpoint_bytes: int
+) -> Optional[int]:
+    # Number of time steps per checkpointed chunk that `layer` uses, see
+    # `functional.resolve_checkpoint_steps`
+    checkpoint_steps = getattr(layer, "checkpoint_steps", None)
+    if checkpoint_steps != "auto":
+        return checkpoint_steps
+    with warnings.catch_warnings():
+        # A budget that is too small is reported by the layer itself
+        warnings.simplefilter("ignore")
+        return checkpoint_steps_for_budget(
+            n_time_steps=num_timesteps,
+            bytes_per_step=max(1, math.ceil(step_bytes)),
+            bytes_per_checkpoint=checkpoint_bytes,
+            memory_budget=layer.checkpoint_memory_budget,
+        )
+
+
+def _largest_batch_size(memory: Callable[[int], int], memory_budget: int) -> int:
+    # Largest batch size, at least 1, for which `memory` fits into `memory_budget`. Memory
+    # grows with the batch size, but not necessarily linearly.
+    low, high = 1, 2
+    while memory(high) <= memory_budget:
+        low, high = high, 2 * high
+    while high - low > 1:
+        middle = (low + high) // 2
+        if memory(middle) <= memory_budget:
+            low = middle
+        else:
+            high = middle
+    return low
+
+
+def _sequential_modules(model: nn.Module) -> List[nn.Module]:
+    # Flat list of the modules of a nested sequential model
+    if isinstance(model, StatefulLayer):
+        return [model]
+    if isinstance(model, nn.Sequential):
+        return [m for child in model for m in _sequential_modules(child)]
+    if any(isinstance(m, StatefulLayer) for m in model.modules()):
+        raise ValueError(
+            "`step` requires stateful layers to be part of an `nn.Sequential` model, "
+            f"but found them within {model.__class__.__name__}."
+        )
+    return [model]
+
+
 # def get_parent_module_by_name(
 #    root: torch.nn.Module, name: str
 # ) -> Tuple[torch.nn.Module, str]:
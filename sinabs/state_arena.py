@@ -0,0 +1,189 @@
+from collections import defaultdict
+from typing import Dict, List, Tuple, Union
+
+import torch
+import torch.nn as nn
+
+from .layers import StatefulLayer
+
+
+class StateArena:
+    """Back the states of all stateful layers of a model with one contiguous tensor.
+
+    The states of each layer become views into a flat tensor per data type and device, such
+    that model-wide operations such as `reset`, `detach`, `snapshot` and `to` act on a single
+    tensor instead of many small ones. After each forward pass or `step` of a layer, its new
+    states are written in place into its views of the arena. This adds one copy of the states
+    per call, which is small compared to the simulation of the time steps, about 1% for
+    single time steps in `examples/benchmarks/state_arena_overhead.py`. When the shapes of
+    the states change in a forward pass, for instance because of a different batch size, the
+    arena is reallocated. After a shape change in `step`, states are only moved back into
+    the arena by the next forward pass or call to `detach`, `reset`, `snapshot` or `to`.
+
+    While gradients are being recorded, the states of a layer carry their computational graph
+    and cannot be copied in place. They are then only moved back into the arena by the next
+    call to `detach`, `reset`, `snapshot` or `to`.
+
+    Example:
+        >>> arena = StateArena(model)
+        >>> model(data)
+        >>> snapshot = arena.snapshot()
+        >>> arena.reset()
+
+    Parameters:
+        model: The model, containing stateful layers
+    """
+
+    def __init__(self, model: nn.Module):
+        self.model = model
+        self.layers = [m for m in model.modules() if isinstance(m, StatefulLayer)]
+        for layer in self.layers:
+            layer._states_in_place = True
+        self._arenas: Dict[Tuple[torch.dtype, torch.device], torch.Tensor] = dict()
+        self._views: Dict[StatefulLayer, Dict[str, torch.Tensor]] = dict()
+        self._handles = [
+            layer.register_forward_hook(self._forward_hook) for layer in self.layers
+        ]
+        self._allocate()
+
+    def reset(self):
+        """Set all states to zero."""
+        self._sync(copy=False)
+        for arena in self._arenas.values():
+            arena.zero_()
+
+    def detach(self):
+        """Detach all states from the computational graph, without changing their values."""
+        self._sync()
+
+    def snapshot(self) -> Dict[Tuple[torch.dtype, torch.device], torch.Tensor]:
+        """Copy of all states, with one tensor per data type and device."""
+        self._sync()
+        return {key: arena.clone() for key, arena in self._arenas.items()}
+
+    def restore(self, snapshot: Dict[Tuple[torch.dtype, torch.device], torch.Tensor]):
+        """Set all states to the values of a snapshot.
+
+        Parameters:
+            snapshot: Snapshot from `snapshot`, taken with states of the same shapes
+        """
+        self._sync(copy=False)
+        if snapshot.keys() != self._arenas.keys() or any(
+            snapshot[key].shape != arena.shape for key, arena in self._arenas.items()
+        ):
+            raise ValueError("Snapshot does not match the current state shapes.")
+        for key, arena in self._arenas.items():
+            arena.copy_(snapshot[key])
+
+    def to(self, device: Union[torch.device, str]) -> "StateArena":
+        """Move all states to `device`.
+
+        Parameters:
+            device: Target device
+        """
+        self._sync()
+        dtypes = [dtype for dtype, _ in self._arenas]
+        if len(set(dtypes)) < len(dtypes):
+            # Arenas of the same data type on different devices are merged
+            for layer, name, *_ in self._layout:
+                setattr(layer, name, getattr(layer, name).to(device))
+            self._allocate()
+            return self
+
+        moved = {key: arena.to(device) for key, arena in self._arenas.items()}
+        self._arenas = {(key[0], arena.device): arena for key, arena in moved.items()}
+        self._layout = [
+            (layer, name, (key[0], moved[key].device), offset, shape)
+            for layer, name, key, offset, shape in self._layout
+        ]
+        self._point_views()
+        return self
+
+    def remove(self):
+        """Stop writing states into the arena after forward passes and steps."""
+        for handle in self._handles:
+            handle.remove()
+        self._handles = []
+        for layer in self.layers:
+            layer._states_in_place = False
+
+    @property
+    def memory(self) -> int:
+        """Memory in bytes that is allocated for the states."""
+        return sum(a.numel() * a.element_size() for a in self._arenas.values())
+
+    def _forward_hook(self, layer: StatefulLayer, input_, output):
+        if any(
+            buffer.requires_grad and torch.is_grad_enabled()
+            for buffer in layer.buffers(recurse=False)
+        ):
+            # Copying would modify tensors that are needed for the backward pass
+            return
+        if not self._layer_fits(layer):
+            self._allocate()
+            return
+        # States are usually written into the views by the layer itself. They are only
+        # replaced, and copied here, after they were needed for a backward pass.
+        with torch.no_grad():
+            for name, view in self._views[layer].items():
+                buffer = getattr(layer, name)
+                if buffer is not view:
+                    view.copy_(buffer)
+                    setattr(layer, name, view)
+
+    def _layer_fits(self, layer: StatefulLayer) -> bool:
+        views = self._views.get(layer, dict())
+        for name, buffer in layer.named_buffers(recurse=False):
+            view = views.get(name)
+            if (
+                view is None
+                or view.shape != buffer.shape
+                or view.dtype != buffer.dtype
+                or view.device != buffer.device
+            ):
+                return False
+        return True
+
+    def _sync(self, copy: bool = True):
+        # Make sure all states are views into the arena, copying their values if `copy`
+        if not all(self._layer_fits(layer) for layer in self.layers):
+            self._allocate(copy=copy)
+            return
+        with torch.no_grad():
+            for layer, views in self._views.items():
+                for name, view in views.items():
+                    buffer = getattr(layer, name)
+                    if buffer is not view:
+                        if copy:
+                            view.copy_(buffer)
+                        setattr(layer, name, view)
+
+    def _allocate(self, copy: bool = True):
+        sizes = defaultdict(int)
+        layout: List[Tuple[StatefulLayer, str, tuple, int, torch.Size]] = []
+        for layer in self.layers:
+            for name, buffer in layer.named_buffers(recurse=False):
+                key = (buffer.dtype, buffer.device)
+                layout.append((layer, name, key, sizes[key], buffer.shape))
+                sizes[key] += buffer.numel()
+
+        self._arenas = {
+            key: torch.zeros(size, dtype=key[0], device=key[1])
+            for key, size in sizes.items()
+        }
+        self._layout = layout
+        if copy:
+            with torch.no_grad():
+                for layer, name, key, offset, shape in self._layout:
+                    buffer = getattr(layer, name)
+                    self._arenas[key][offset : offset + buffer.numel()].copy_(
+                        buffer.flatten()
+                    )
+        self._point_views()
+
+    def _point_views(self):
+        self._views = defaultdict(dict)
+        for layer, name, key, offset, shape in self._layout:
+            view = self._arenas[key][offset : offset + shape.numel()].view(shape)
+            self._views[layer][name] = view
+            setattr(layer, name, view)
@@ -0,0 +1,215 @@
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple, Union
+
+import torch
+import torch.nn as nn
+
+from .layers import StatefulLayer
+from .utils import set_batch_size
+
+
+class StateBank:
+    """Keep the neuron states of many independent sessions, such as sensor streams, for one
+    model.
+
+    Every stateful layer of a model holds the states of a single batch. The state bank stores
+    the states of each session in a row of a preallocated tensor per layer state. For each
+    forward pass, the rows of the sessions in the batch are gathered into the layer states,
+    and afterwards the new states are scattered back. Sessions can therefore be combined into
+    batches in any order, and each continues from its own previous state. New sessions start
+    with zero states.
+
+    If the bank is full, the least recently used sessions are evicted. The size of the bank
+    can be limited by the number of sessions and by the memory used for the stored states.
+
+    Example:
+        >>> bank = StateBank(model, max_memory=2**30)
+        >>> output = bank(["camera_3", "camera_7"], data)  # data of batch size 2
+
+    Parameters:
+        model: The model, containing stateful layers
+        max_sessions: Maximum number of sessions that are stored. If None, the number of
+            sessions is only limited by `max_memory`.
+        max_memory: Maximum memory in bytes used for storing states. If None, the memory is
+            only limited by `max_sessions`.
+        device: Device on which states are stored, for instance "cpu" to keep the states of
+            inactive sessions out of GPU memory. If None, the device of each layer is used.
+    """
+
+    def __init__(
+        self,
+        model: nn.Module,
+        max_sessions: Optional[int] = None,
+        max_memory: Optional[int] = None,
+        device: Optional[Union[torch.device, str]] = None,
+    ):
+        self.model = model
+        self.layers = {
+            name: module
+            for name, module in model.named_modules()
+            if isinstance(module, StatefulLayer)
+        }
+        self.max_sessions = max_sessions
+        self.max_memory = max_memory
+        self.device = device
+        self.clear()
+
+    def clear(self):
+        """Remove all sessions and release the stored states."""
+        self._slots: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._free_slots: List[int] = []
+        self._storage: Dict[Tuple[str, str], torch.Tensor] = dict()
+
+    def __call__(self, session_ids: Sequence[Hashable], *args, **kwargs):
+        return self.forward(session_ids, *args, **kwargs)
+
+    def forward(self, session_ids: Sequence[Hashable], *args, **kwargs):
+        """Run the model on a batch with the states of the given sessions.
+
+        Parameters:
+            session_ids: One hashable ID per sample in the batch
+            args: Passed on to the model
+            kwargs: Passed on to the model
+
+        Returns:
+            The output of the model
+        """
+        self.load(session_ids)
+        output = self.model(*args, **kwargs)
+        self.store(session_ids)
+        return output
+
+    def load(self, session_ids: Sequence[Hashable]):
+        """Set the states of all stateful layers to those of the given sessions.
+
+        Parameters:
+            session_ids: One hashable ID per sample in the batch
+        """
+        session_ids = self._check_ids(session_ids)
+        set_batch_size(self.model, len(session_ids))
+        if not self._storage:
+            # State shapes are not known yet, so layers initialize them at the forward pass
+            for layer in self.layers.values():
+                for name, buffer in layer.named_buffers(recurse=False):
+                    setattr(layer, name, torch.zeros(0, device=buffer.device))
+            return
+        slots = self._assign_slots(session_ids)
+        for (layer_name, state_name), storage in self._storage.items():
+            layer = self.layers[layer_name]
+            device = getattr(layer, state_name).device
+            rows = storage.index_select(0, slots.to(storage.device))
+            setattr(layer, state_name, rows.to(device))
+
+    def store(self, session_ids: Sequence[Hashable]):
+        """Store the current states of all stateful layers for the given sessions.
+
+        Parameters:
+            session_ids: One hashable ID per sample in the batch
+        """
+        session_ids = self._check_ids(session_ids)
+        if not self._storage:
+            self._allocate(len(session_ids))
+        slots = self._assign_slots(session_ids)
+        for (layer_name, state_name), storage in self._storage.items():
+            state = getattr(self.layers[layer_name], state_name).detach()
+            storage.index_copy_(0, slots.to(storage.device), state.to(storage.device))
+
+    def evict(self, session_id: Hashable):
+        """Remove a session from the bank.
+
+        Parameters:
+            session_id: ID of the session
+        """
+        self._free_slots.append(self._slots.pop(session_id))
+
+    @property
+    def sessions(self) -> List[Hashable]:
+        """IDs of the stored sessions, from least to most recently used."""
+        return list(self._slots)
+
+    @property
+    def memory(self) -> int:
+        """Memory in bytes that is allocated for storing states."""
+        return sum(s.numel() * s.element_size() for s in self._storage.values())
+
+    def __contains__(self, session_id: Hashable) -> bool:
+        return session_id in self._slots
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    @property
+    def _capacity(self) -> int:
+        if not self._storage:
+            return 0
+        return len(next(iter(self._storage.values())))
+
+    def _max_capacity(self) -> Optional[int]:
+        limits = []
+        if self.max_sessions is not None:
+            limits.append(self.max_sessions)
+        if self.max_memory is not None and self._storage:
+            bytes_per_session = self.memory // self._capacity
+            limits.append(self.max_memory // bytes_per_session)
+        return min(limits) if limits else None
+
+    def _check_ids(self, session_ids: Sequence[Hashable]) -> List[Hashable]:
+        session_ids = list(session_ids)
+        if len(set(session_ids)) != len(session_ids):
+            raise ValueError("Session IDs within a batch must be unique.")
+        max_capacity = self._max_capacity()
+        if max_capacity is not None and len(session_ids) > max_capacity:
+            raise ValueError(
+                f"Batch of {len(session_ids)} sessions exceeds the capacity of the state "
+                f"bank of {max_capacity} sessions."
+            )
+        return session_ids
+
+    def _allocate(self, capacity: int):
+        for layer_name, layer in self.layers.items():
+            for state_name, buffer in layer.named_buffers(recurse=False):
+                self._storage[(layer_name, state_name)] = torch.zeros(
+                    (capacity, *buffer.shape[1:]),
+                    dtype=buffer.dtype,
+                    device=buffer.device if self.device is None else self.device,
+                )
+        max_capacity = self._max_capacity()
+        if max_capacity is not None and capacity > max_capacity:
+            self.clear()
+            raise ValueError(
+                f"States of {capacity} sessions exceed the memory limit of the state bank."
+            )
+        self._free_slots = list(range(capacity))
+
+    def _grow(self, n_required: int):
+        # Double the capacity, as far as the limits allow
+        capacity = self._capacity
+        new_capacity = max(2 * capacity, capacity + n_required)
+        max_capacity = self._max_capacity()
+        if max_capacity is not None:
+            new_capacity = min(new_capacity, max_capacity)
+        if new_capacity <= capacity:
+            return
+        for key, storage in self._storage.items():
+            new_storage = storage.new_zeros((new_capacity, *storage.shape[1:]))
+            new_storage[:capacity] = storage
+            self._storage[key] = new_storage
+        self._free_slots.extend(range(capacity, new_capacity))
+
+    def _assign_slots(self, session_ids: List[Hashable]) -> torch.Tensor:
+        new_ids = [sid for sid in session_ids if sid not in self._slots]
+        # Mark sessions of the batch as most recently used, so that they are not evicted
+        for sid in session_ids:
+            if sid in self._slots:
+                self._slots.move_to_end(sid)
+        if len(new_ids) > len(self._free_slots):
+            self._grow(len(new_ids) - len(self._free_slots))
+        while len(new_ids) > len(self._free_slots):
+            self.evict(next(iter(self._slots)))
+
+        for sid in new_ids:
+            slot = self._free_slots.pop()
+            for storage in self._storage.values():
+                storage[slot] = 0
+            self._slots[sid] = slot
+        return torch.tensor([self._slots[sid] for sid in session_ids])
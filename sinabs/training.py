@@ -0,0 +1,206 @@
+import queue
+import threading
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import torch
+import torch.nn as nn
+from torch.nn.parallel import DistributedDataParallel
+
+from .layers import StatefulLayer
+from .utils import detach_states, reset_states
+
+
+def time_windows(
+    data: Union[torch.Tensor, np.ndarray],
+    window_size: int,
+    target: Optional[Union[torch.Tensor, np.ndarray]] = None,
+    target_per_step: bool = False,
+) -> Iterator[Tuple[torch.Tensor, Any]]:
+    """Split a sequence of shape (batch, time, ...) into consecutive windows along time.
+
+    Windows are only converted to tensors when they are requested, so `data` can be a memory
+    mapped array, e.g. from `np.load(..., mmap_mode="r")`, that does not fit into memory.
+
+    Parameters:
+        data: Input of shape (batch, time, ...)
+        window_size: Number of time steps per window. The last window can be shorter.
+        target: Optional target that is returned with each window
+        target_per_step: If True, `target` has shape (batch, time, ...) and is split into
+            windows like `data`. Otherwise the same target is returned with each window.
+
+    Yields:
+        Tuples of input window and target
+    """
+    n_time_steps = data.shape[1]
+    for start in range(0, n_time_steps, window_size):
+        window = slice(start, start + window_size)
+        window_target = target
+        if target is not None and target_per_step:
+            window_target = _as_tensor(target[:, window])
+        yield _as_tensor(data[:, window]), window_target
+
+
+def _as_tensor(data: Union[torch.Tensor, np.ndarray]) -> torch.Tensor:
+    if isinstance(data, np.ndarray):
+        return torch.from_numpy(np.ascontiguousarray(data))
+    return data
+
+
+def prefetch(
+    iterable: Iterable,
+    device: Optional[Union[torch.device, str]] = None,
+    buffer_size: int = 1,
+) -> Iterator:
+    """Iterate over `iterable` while the next items are loaded in a background thread.
+
+    Loading and, if `device` is given, copying to the device overlap with whatever is done with
+    the current item.
+
+    Parameters:
+        iterable: Iterable of tensors or tuples / lists of tensors
+        device: If given, tensors are moved to this device
+        buffer_size: Number of items that are loaded in advance
+
+    Yields:
+        The items of `iterable`
+    """
+    items = queue.Queue(maxsize=buffer_size)
+    stop = threading.Event()
+    end_of_data = object()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def load():
+        try:
+            for item in iterable:
+                if not put(_to_device(item, device)):
+                    return
+        except Exception as e:
+            put(_LoadingError(e))
+            return
+        put(end_of_data)
+
+    thread = threading.Thread(target=load, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is end_of_data:
+                break
+            if isinstance(item, _LoadingError):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+
+class _LoadingError:
+    def __init__(self, error: Exception):
+        self.error = error
+
+
+def _to_device(item, device):
+    if device is None:
+        return item
+    if isinstance(item, torch.Tensor):
+        if torch.device(device).type == "cuda":
+            item = item.pin_memory()
+        return item.to(device, non_blocking=True)
+    if isinstance(item, (tuple, list)):
+        return type(item)(_to_device(element, device) for element in item)
+    return item
+
+
+def train_truncated_bptt(
+    model: nn.Module,
+    windows: Iterable[Tuple[torch.Tensor, Any]],
+    loss_fn: Callable[[torch.Tensor, Any], torch.Tensor],
+    optimizer: torch.optim.Optimizer,
+    device: Optional[Union[torch.device, str]] = None,
+    prefetch_windows: bool = True,
+    reset: bool = True,
+) -> List[float]:
+    """Train `model` on one long sequence with truncated backpropagation through time.
+
+    For each window of the sequence, a forward and backward pass and an optimizer step are
+    run. Neuron states are carried over from one window to the next, but detached from the
+    computational graph, so that memory only depends on the window length.
+
+    Parameters:
+        model: The model to be trained
+        windows: Iterable of (input window, target) tuples, for instance from `time_windows`.
+            Input windows have shape (batch, time, ...).
+        loss_fn: Function of model output and target that returns the loss
+        optimizer: Optimizer for the model parameters
+        device: If given, windows are moved to this device
+        prefetch_windows: If True, the next window is loaded in a background thread while
+            the current one is being processed.
+        reset: If True, reset all neuron states before the first window
+
+    Returns:
+        The loss of each window
+    """
+    if reset:
+        reset_states(model)
+    if prefetch_windows:
+        windows = prefetch(windows, device=device)
+    elif device is not None:
+        windows = (_to_device(window, device) for window in windows)
+
+    losses = []
+    for data, target in windows:
+        optimizer.zero_grad()
+        loss = loss_fn(model(data), target)
+        loss.backward()
+        optimizer.step()
+        detach_states(model)
+        losses.append(loss.item())
+    return losses
+
+
+def exclude_states_from_ddp(model: nn.Module) -> List[str]:
+    """Exclude the neuron states of all spiking layers within the model from the buffer
+    synchronization of `torch.nn.parallel.DistributedDataParallel`.
+
+    Neuron states are registered as buffers, which DDP copies from rank 0 to all other
+    ranks when it is created and at the beginning of every forward pass. For spiking layers
+    this is wasted bandwidth, and it replaces the states of each rank, which belong to the
+    samples of that rank, by those of rank 0. If the states of the ranks have different
+    shapes, e.g. for different batch sizes per rank, they are silently corrupted.
+
+    After calling this function before wrapping the model with DDP, each rank keeps its own
+    states, which are initialized, reset and detached locally, for instance with
+    :func:`~sinabs.utils.reset_states`. Only gradients are synchronized, so that parameters
+    stay the same on all ranks. States are excluded by name, so they can be replaced and
+    change their shape during training.
+
+    Example:
+        >>> exclude_states_from_ddp(model)
+        >>> ddp_model = torch.nn.parallel.DistributedDataParallel(model)
+
+    Parameters:
+        model: The torch module, before it is wrapped with DDP
+
+    Returns:
+        Names of the states that are excluded, as in `model.named_buffers()`
+    """
+    state_names = [
+        f"{layer_name}.{name}" if layer_name else name
+        for layer_name, layer in model.named_modules()
+        if isinstance(layer, StatefulLayer)
+        for name, _ in layer.named_buffers(recurse=False)
+    ]
+    ignored = getattr(model, "_ddp_params_and_buffers_to_ignore", [])
+    DistributedDataParallel._set_params_and_buffers_to_ignore_for_model(
+        model, sorted(set(ignored) | set(state_names))
+    )
+    return state_names
@@ -1,4 +1,6 @@
-from typing import List
+import inspect
+import os
+from typing import Dict, List, Union
 
 import numpy as np
 import torch
@@ -33,6 +35,132 @@ def zero_grad(model: nn.Module) -> None:
             layer.zero_grad()
 
 
+def detach_states(model: nn.Module) -> None:
+    """Helper function to detach the states of all spiking layers within the model from the
+    computational graph, without changing their values. Gradients of subsequent time steps will
+    then not be propagated back beyond this point, as in truncated backpropagation through time.
+
+    Parameters:
+        model: The torch module
+    """
+    for layer in model.modules():
+        if isinstance(layer, sinabs.layers.StatefulLayer):
+            for name, buffer in layer.named_buffers(recurse=False):
+                setattr(layer, name, buffer.detach())
+
+
+def snapshot_states(model: nn.Module) -> Dict[str, torch.Tensor]:
+    """Copy of the states of all spiking layers within the model.
+
+    The states are copied, so the snapshot is not affected by subsequent forward passes or
+    by in-place modifications of the states, for instance by
+    :meth:`~sinabs.layers.StatefulLayer.reset_states` or a :class:`~sinabs.StateArena`.
+
+    Parameters:
+        model: The torch module
+
+    Returns:
+        Dict from "<layer name>.<state name>", as in `model.state_dict()`, to state tensors
+    """
+    snapshot = _Snapshot()
+    for layer_name, layer in model.named_modules():
+        if isinstance(layer, sinabs.layers.StatefulLayer):
+            for name, buffer in layer.named_buffers(recurse=False):
+                snapshot[_state_key(layer_name, name)] = buffer.detach().clone()
+    # Version counters are increased by in-place operations
+    snapshot.versions = {key: state._version for key, state in snapshot.items()}
+    return snapshot
+
+
+def restore_states(
+    model: nn.Module, snapshot: Dict[str, torch.Tensor], copy: bool = True
+) -> None:
+    """Set the states of all spiking layers within the model to those of a snapshot.
+
+    States of any shape are restored, so the snapshot may have a different batch size than
+    the current states. States that are not contained in the snapshot are left unchanged.
+
+    Parameters:
+        model: The torch module
+        snapshot: Snapshot from :func:`snapshot_states` or :func:`load_states`
+        copy: If True, the snapshot is copied into the current states, in place if they
+            have the same shapes, and can be restored again later. If False, the layers use
+            the tensors of the snapshot without copying. In-place modifications of the
+            states, for instance by :meth:`~sinabs.layers.StatefulLayer.reset_states`, then
+            also change the snapshot, which is detected if it is restored again.
+    """
+    versions = getattr(snapshot, "versions", dict())
+    for key, state in snapshot.items():
+        if key in versions and state._version != versions[key]:
+            raise RuntimeError(f"State `{key}` of the snapshot was modified in place.")
+
+    for layer_name, layer in model.named_modules():
+        if not isinstance(layer, sinabs.layers.StatefulLayer):
+            continue
+        for name, buffer in layer.named_buffers(recurse=False):
+            state = snapshot.get(_state_key(layer_name, name))
+            if state is None:
+                continue
+            if not copy:
+                setattr(layer, name, state.to(buffer.device))
+            elif state.shape == buffer.shape and not buffer.requires_grad:
+                with torch.no_grad():
+                    buffer.copy_(state)
+            else:
+                setattr(layer, name, state.to(buffer.device, copy=True))
+
+
+def save_states(model: nn.Module, path: Union[str, os.PathLike]) -> None:
+    """Save the states of all spiking layers within the model to a file, which can be
+    memory-mapped by :func:`load_states`.
+
+    Parameters:
+        model: The torch module
+        path: Path of the file
+    """
+    snapshot = {k: v.contiguous() for k, v in snapshot_states(model).items()}
+    torch.save(snapshot, path)
+
+
+def load_states(
+    model: nn.Module, path: Union[str, os.PathLike], mmap: bool = True
+) -> Dict[str, torch.Tensor]:
+    """Restore the states of all spiking layers within the model from a file written by
+    :func:`save_states`.
+
+    With `mmap`, the file is memory-mapped instead of being read, so states are only loaded
+    from disk once they are used by the next forward pass. Changes to the mapped states are
+    not written back to the file. Memory-mapping requires torch 2.1 or later, with earlier
+    versions the file is always read.
+
+    Parameters:
+        model: The torch module
+        path: Path of the file
+        mmap: Whether to memory-map the file
+
+    Returns:
+        The loaded snapshot, whose tensors are used by the layers without copying
+    """
+    load_args = inspect.signature(torch.load).parameters
+    kwargs = dict()
+    if "weights_only" in load_args:
+        kwargs["weights_only"] = True
+    if mmap and "mmap" in load_args:
+        kwargs["mmap"] = True
+    snapshot = torch.load(path, map_location="cpu", **kwargs)
+    restore_states(model, snapshot, copy=False)
+    return snapshot
+
+
+class _Snapshot(dict):
+    # Dict of states that remembers their version counters at the time of the snapshot
+    versions: Dict[str, int]
+
+
+def _state_key(layer_name: str, state_name: str) -> str:
+    return f"{layer_name}.{state_name}" if layer_name else state_name
+
+
 def get_activations(torchanalog_model, tsrData, name_list=None):
     """Return torch analog model activations for the specified layers."""
     torch_modules = dict(torchanalog_model.named_modules())
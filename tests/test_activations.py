@@ -95,3 +95,21 @@ def test_periodic_exponential():
     x = torch.arange(-5.0, 10.5, 0.01)
     # Must have 10 peaks
     assert torch.sum(grad_fn(x, 1.0) == 1) == 10
+
+
+@pytest.mark.parametrize("spike_fn", (SingleSpike, MultiSpike, MaxSpike(2)))
+def test_spike_generation_without_grad(spike_fn):
+    v_mem = torch.rand(10, 20) * 5 - 1
+    v_mem_grad = v_mem.clone().requires_grad_(True)
+
+    spikes = spike_fn.apply(v_mem, 1.0, SingleExponential())
+    with torch.no_grad():
+        spikes_no_grad = spike_fn.apply(v_mem_grad, 1.0, SingleExponential())
+    spikes_grad = spike_fn.apply(v_mem_grad, 1.0, SingleExponential())
+
+    # Autograd is only used if gradients are required
+    assert spikes.grad_fn is None
+    assert spikes_no_grad.grad_fn is None
+    assert spikes_grad.grad_fn is not None
+    assert torch.equal(spikes, spikes_grad)
+    assert torch.equal(spikes_no_grad, spikes_grad)
@@ -352,3 +352,29 @@ def test_scaling():
     test_obj(float_tensor - 20)
     test_obj(float_tensor / 20)
     test_obj(float_tensor * 20)
+
+
+def test_fixed_point_conv_spike():
+    from sinabs.layers import FixedPointConv2d, IAFSqueeze
+
+    spk_squeeze = IAFSqueeze(
+        batch_size=2,
+        min_v_mem=min_v_mem,
+        spike_threshold=thr,
+        record_states=True,
+    )
+    conv_discr, spk_discr = discretize.discretize_conv_spike(
+        conv_lyr, spk_squeeze, to_int=False
+    )
+    conv_fixed, spk_fixed = discretize.fixed_point_conv_spike(conv_lyr, spk_squeeze)
+    assert isinstance(conv_fixed, FixedPointConv2d)
+    assert spk_fixed.fixed_point
+
+    inp = (torch.rand(2 * 10, 2, 6, 6) < 0.3).int()
+    spikes = spk_fixed(conv_fixed(inp))
+    spikes_ref = spk_discr(conv_discr(inp.float()))
+    assert spikes.dtype == torch.int16
+    assert torch.equal(spikes.float(), spikes_ref)
+    assert torch.equal(
+        spk_fixed.recordings["v_mem"].float(), spk_discr.recordings["v_mem"]
+    )
@@ -0,0 +1,139 @@
+import pytest
+import torch
+import torch.nn as nn
+
+import sinabs
+import sinabs.layers as sl
+from sinabs import early_exit_inference
+
+
+def make_classifier(n_classes=4):
+    torch.manual_seed(0)
+    ann = nn.Sequential(
+        nn.Linear(8, 16),
+        nn.ReLU(),
+        nn.Linear(16, n_classes),
+        nn.ReLU(),
+    )
+    return sinabs.from_model(ann, batch_size=1).spiking_model
+
+
+def test_early_exit_matches_full_simulation():
+    snn = make_classifier()
+    batch_size, num_timesteps = 6, 40
+    data = torch.rand(batch_size, 1, 8).repeat(1, num_timesteps, 1)
+    data[:3] *= 4  # Strong input is decided early
+
+    counts, steps = early_exit_inference(snn, data, chunk_size=5, margin=3)
+    assert (snn[1].batch_size, snn[1].num_timesteps) == (1, -1)
+    assert (steps[:3] < num_timesteps).all()
+    assert (steps % 5 == 0).all()
+
+    # Each sample gets the same counts as when it is simulated alone for its steps
+    for sample, sample_counts, n_steps in zip(data, counts, steps):
+        sinabs.reset_states(snn)
+        with torch.no_grad():
+            assert torch.equal(snn(sample[:n_steps]).sum(0), sample_counts)
+
+
+@pytest.mark.parametrize("criterion", [dict(margin=1e9), dict(confidence=1.1)])
+def test_early_exit_never_decided(criterion):
+    model = nn.Sequential(nn.Linear(8, 4), sl.IAF())
+    data = torch.rand(3, 20, 8)
+    counts, steps = early_exit_inference(model, data, chunk_size=3, **criterion)
+    assert (steps == 20).all()
+    sinabs.reset_states(model)
+    with torch.no_grad():
+        assert torch.equal(counts, model(data).sum(1))
+
+
+def test_early_exit_min_steps():
+    model = nn.Sequential(nn.Linear(8, 4), sl.IAF())
+    data = torch.rand(3, 20, 8) * 4
+    _, steps = early_exit_inference(model, data, chunk_size=2, margin=0)
+    assert (steps == 2).all()
+    _, steps = early_exit_inference(model, data, chunk_size=2, margin=0, min_steps=7)
+    assert (steps == 8).all()
+    with pytest.raises(ValueError):
+        early_exit_inference(model, data)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 30])
+def test_depth_first_forward(chunk_size):
+    batch_size, num_timesteps = 2, 30
+    torch.manual_seed(0)
+    ann = nn.Sequential(
+        nn.Conv2d(2, 4, kernel_size=3, padding=1),
+        nn.ReLU(),
+        nn.AvgPool2d(2),
+        nn.Flatten(),
+        nn.Linear(4 * 4 * 4, 3),
+        nn.ReLU(),
+    )
+    squeeze_snn = sinabs.from_model(ann, batch_size=batch_size).spiking_model
+    snn = nn.Sequential(
+        sl.Repeat(squeeze_snn[0]),
+        sl.IAF(),
+        sl.Repeat(squeeze_snn[2:5]),
+        sl.IAF(),
+    )
+    data = torch.rand(batch_size, num_timesteps, 2, 8, 8) * 2
+
+    with torch.no_grad():
+        sinabs.reset_states(squeeze_snn)
+        expected = squeeze_snn(data.flatten(0, 1)).unflatten(0, (batch_size, -1))
+        assert expected.sum() > 0
+        sinabs.reset_states(snn)
+        assert torch.allclose(snn(data), expected)
+
+    for model in (squeeze_snn, snn):
+        sinabs.reset_states(model)
+        output = sinabs.depth_first_forward(model, data, chunk_size=chunk_size)
+        assert torch.allclose(output, expected)
+        sinabs.reset_states(model)
+        output = sinabs.depth_first_forward(
+            model, data, chunk_size=chunk_size, sum_over_time=True
+        )
+        assert torch.allclose(output, expected.sum(1))
+    assert squeeze_snn[1].batch_size == batch_size
+
+
+@pytest.mark.parametrize("chunk_size,stages", [(1, 1), (4, 3), (7, [2, 4]), (30, 10)])
+def test_pipelined_forward(chunk_size, stages):
+    batch_size, num_timesteps = 2, 30
+    torch.manual_seed(0)
+    ann = nn.Sequential(
+        nn.Conv2d(2, 4, kernel_size=3, padding=1),
+        nn.ReLU(),
+        nn.AvgPool2d(2),
+        nn.Flatten(),
+        nn.Linear(4 * 4 * 4, 3),
+        nn.ReLU(),
+    )
+    snn = sinabs.from_model(ann, batch_size=batch_size).spiking_model
+    data = torch.rand(batch_size, num_timesteps, 2, 8, 8) * 2
+
+    sinabs.reset_states(snn)
+    expected = sinabs.depth_first_forward(snn, data, chunk_size=num_timesteps)
+    assert expected.sum() > 0
+    sinabs.reset_states(snn)
+    output = sinabs.pipelined_forward(snn, data, chunk_size=chunk_size, stages=stages)
+    assert torch.allclose(output, expected)
+    sinabs.reset_states(snn)
+    output = sinabs.pipelined_forward(
+        snn, data, chunk_size=chunk_size, stages=stages, sum_over_time=True
+    )
+    assert torch.allclose(output, expected.sum(1))
+    assert snn[1].batch_size == batch_size
+
+
+def test_pipelined_forward_errors():
+    model = nn.Sequential(sl.IAF(), nn.Linear(3, 2), sl.IAF())
+    data = torch.rand(2, 20, 4)
+    with pytest.raises(RuntimeError):
+        # Wrong input size in the second stage
+        sinabs.pipelined_forward(model, data, chunk_size=2, stages=3)
+    with pytest.raises(TypeError):
+        sinabs.pipelined_forward(sl.IAF(), data)
+    with pytest.raises(ValueError):
+        sinabs.pipelined_forward(model, data, stages=[5])
@@ -95,6 +95,19 @@ def test_alif_with_current_dynamics():
     assert spike_output.sum() > 0
 
 
+def test_alif_synaptic_current_continues():
+    input_current = torch.rand(2, 40, 5) * 3
+    layer = ALIF(tau_mem=10.0, tau_syn=5.0, tau_adapt=20.0)
+    layer_split = ALIF(tau_mem=10.0, tau_syn=5.0, tau_adapt=20.0)
+    output = layer(input_current)
+    output_split = torch.cat(
+        [layer_split(input_current[:, :20]), layer_split(input_current[:, 20:])], 1
+    )
+    assert torch.allclose(output, output_split)
+    assert torch.allclose(layer.i_syn, layer_split.i_syn)
+    assert (layer.i_syn != 0).any()
+
+
 def test_alif_train_alphas():
     batch_size, time_steps = 10, 100
     tau_mem = torch.as_tensor(30.0)
@@ -245,3 +258,130 @@ def test_alif_recurrent_on_gpu():
 
     layer = layer.to("cuda")
     layer(input_current.to("cuda"))
+
+
+@pytest.mark.parametrize("norm_input", (True, False))
+def test_alif_precomputed_synaptic_current(norm_input):
+    from sinabs.layers.functional.alif import alif_forward_single
+
+    batch_size, time_steps = 5, 50
+    input_current = torch.rand(batch_size, time_steps, 2, 7, 7) * 5
+    layer = ALIF(tau_mem=20.0, tau_adapt=10.0, tau_syn=10.0, norm_input=norm_input)
+    spikes = layer(input_current)
+
+    # Reference: synaptic current updated step by step
+    state = {
+        name: torch.zeros(batch_size, 2, 7, 7)
+        for name in ("v_mem", "i_syn", "b", "spike_threshold")
+    }
+    spikes_ref = []
+    for step in range(time_steps):
+        spikes_step, state = alif_forward_single(
+            input_data=input_current[:, step],
+            alpha_mem=layer.alpha_mem_calculated,
+            alpha_adapt=layer.alpha_adapt_calculated,
+            alpha_syn=layer.alpha_syn_calculated,
+            adapt_scale=layer.adapt_scale,
+            state=state,
+            spike_fn=layer.spike_fn,
+            reset_fn=layer.reset_fn,
+            surrogate_grad_fn=layer.surrogate_grad_fn,
+            min_v_mem=None,
+            b0=layer.b0,
+            norm_input=norm_input,
+        )
+        spikes_ref.append(spikes_step)
+    spikes_ref = torch.stack(spikes_ref, 1)
+
+    # The precomputed synaptic current differs from the step-by-step update by
+    # float32 rounding, which can flip the odd spike close to threshold.
+    assert (spikes != spikes_ref).float().mean() < 1e-2
+    v_mem_close = torch.isclose(layer.v_mem, state["v_mem"], atol=1e-4)
+    assert v_mem_close.float().mean() > 0.99
+
+    grads = torch.autograd.grad(spikes.sum(), (layer.tau_mem, layer.tau_syn))
+    grads_ref = torch.autograd.grad(spikes_ref.sum(), (layer.tau_mem, layer.tau_syn))
+    for grad, grad_ref in zip(grads, grads_ref):
+        assert torch.allclose(grad, grad_ref, rtol=1e-4)
+
+
+@pytest.mark.parametrize("recurrent", (False, True))
+def test_alif_checkpointing(recurrent):
+    batch_size, time_steps = 3, 23
+    input_current = torch.rand(batch_size, time_steps, 6) * 1.5
+
+    def train_step(checkpoint_steps):
+        torch.manual_seed(0)
+        kwargs = dict(tau_mem=10.0, tau_adapt=20.0, tau_syn=5.0, train_alphas=True)
+        if recurrent:
+            layer = ALIFRecurrent(rec_connect=nn.Linear(6, 6), **kwargs)
+        else:
+            layer = ALIF(**kwargs)
+        layer.checkpoint_steps = checkpoint_steps
+        data = input_current.clone().requires_grad_(True)
+        spikes = layer(data)
+        weights = torch.linspace(0, 1, spikes.numel()).reshape(spikes.shape)
+        (spikes * weights).sum().backward()
+        grads = [p.grad for p in layer.parameters() if p.grad is not None]
+        return spikes, data.grad, grads, layer.v_mem.detach()
+
+    spikes, grad_input, grads, v_mem = train_step(5)
+    spikes_ref, grad_input_ref, grads_ref, v_mem_ref = train_step(None)
+    assert torch.equal(spikes, spikes_ref)
+    assert torch.allclose(v_mem, v_mem_ref)
+    assert torch.allclose(grad_input, grad_input_ref)
+    assert len(grads) == len(grads_ref)
+    for grad, grad_ref in zip(grads, grads_ref):
+        assert torch.allclose(grad, grad_ref)
+
+
+def test_alif_record_states_per_step():
+    input_data = torch.rand(2, 10, 3)
+    layer = ALIF(tau_mem=10.0, tau_adapt=20.0, record_states=True)
+    layer(input_data)
+
+    layer_step = ALIF(tau_mem=10.0, tau_adapt=20.0)
+    for step in range(10):
+        layer_step(input_data[:, step : step + 1])
+        assert torch.equal(layer.recordings["v_mem"][:, step], layer_step.v_mem)
+        assert torch.equal(layer.recordings["b"][:, step], layer_step.b)
+
+
+@pytest.mark.parametrize("sparse_weight", [False, True])
+def test_alif_recurrent_fused(sparse_weight):
+    n_neurons = 64
+    input_data = torch.randint(0, 8, (3, 40, n_neurons)) / 8
+    rec_connect = nn.Linear(n_neurons, n_neurons)
+    # Dyadic weights, such that results do not depend on the order of summation
+    mask = torch.rand(n_neurons, n_neurons) < 0.2
+    rec_connect.weight.data = torch.randint(-4, 5, mask.shape) / 8 * mask
+    rec_connect.bias.data = torch.randint(-4, 5, (n_neurons,)) / 16
+
+    layer_ref = ALIFRecurrent(
+        tau_mem=10.0, tau_adapt=20.0, rec_connect=nn.Sequential(rec_connect)
+    )
+    spikes_ref = layer_ref(input_data)
+
+    if sparse_weight:
+        rec_connect.weight = nn.Parameter(rec_connect.weight.data.to_sparse())
+    layer = ALIFRecurrent(tau_mem=10.0, tau_adapt=20.0, rec_connect=rec_connect)
+    with torch.no_grad():
+        spikes = layer(input_data)
+    assert torch.equal(spikes, spikes_ref)
+    assert torch.allclose(layer.v_mem, layer_ref.v_mem)
+
+
+def test_alif_recurrent_record_states_per_step():
+    input_data = torch.rand(2, 10, 3) * 2
+    rec_connect = nn.Linear(3, 3, bias=False)
+    kwargs = dict(tau_mem=10.0, tau_adapt=20.0, rec_connect=rec_connect)
+    layer = ALIFRecurrent(**kwargs, record_states=True)
+    layer(input_data)
+
+    layer_step = ALIFRecurrent(**kwargs)
+    for step in range(10):
+        layer_step.step(input_data[:, step])
+        for name in ("v_mem", "b"):
+            assert torch.allclose(
+                layer.recordings[name][:, step], getattr(layer_step, name)
+            )
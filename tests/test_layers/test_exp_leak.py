@@ -1,6 +1,8 @@
+import pytest
 import torch
 
 from sinabs.layers import ExpLeak, ExpLeakSqueeze
+from sinabs.layers.functional import ExpLeakScan
 
 
 def test_leaky_basic():
@@ -102,3 +104,57 @@ def test_leaky_v_mem_recordings():
 
     assert layer.recordings["v_mem"].shape == membrane_output.shape
     assert "i_syn" not in layer.recordings.keys()
+
+
+def _leaky_reference(input_current, alpha, v_mem, min_v_mem=None):
+    output = []
+    for step in range(input_current.shape[1]):
+        v_mem = alpha * v_mem + input_current[:, step]
+        output.append(v_mem)
+        if min_v_mem is not None:
+            v_mem = torch.clamp(v_mem, min=min_v_mem)
+    return torch.stack(output, 1)
+
+
+@pytest.mark.parametrize("time_steps", [1, 7, 64, 100])
+def test_leaky_scan_matches_loop(time_steps):
+    batch_size = 3
+    alpha = torch.rand(2, 5, dtype=torch.float64, requires_grad=True)
+    v_mem = torch.rand(batch_size, 2, 5, dtype=torch.float64, requires_grad=True)
+    input_current = torch.rand(
+        batch_size, time_steps, 2, 5, dtype=torch.float64, requires_grad=True
+    )
+
+    output = ExpLeakScan.apply(input_current, alpha, v_mem)
+    output_ref = _leaky_reference(input_current, alpha, v_mem)
+    assert torch.allclose(output, output_ref)
+
+    grad_output = torch.rand_like(output)
+    grads = torch.autograd.grad(output, (input_current, alpha, v_mem), grad_output)
+    grads_ref = torch.autograd.grad(
+        output_ref, (input_current, alpha, v_mem), grad_output
+    )
+    for grad, grad_ref in zip(grads, grads_ref):
+        assert torch.allclose(grad, grad_ref)
+
+
+def test_leaky_scan_gradcheck():
+    alpha = torch.tensor(0.9, dtype=torch.float64, requires_grad=True)
+    v_mem = torch.rand(2, 3, dtype=torch.float64, requires_grad=True)
+    input_current = torch.rand(2, 10, 3, dtype=torch.float64, requires_grad=True)
+
+    assert torch.autograd.gradcheck(ExpLeakScan.apply, (input_current, alpha, v_mem))
+
+
+def test_leaky_min_v_mem():
+    batch_size, time_steps = 10, 100
+    input_current = torch.rand(batch_size, time_steps, 2, 7, 7) - 0.5
+    layer = ExpLeak(tau_mem=10.0, min_v_mem=-0.2, record_states=True)
+    membrane_output = layer(input_current)
+
+    alpha = torch.exp(torch.tensor(-1 / 10.0))
+    output_ref = _leaky_reference(
+        input_current, alpha, torch.zeros(batch_size, 2, 7, 7), min_v_mem=-0.2
+    )
+    assert torch.allclose(membrane_output, output_ref, atol=1e-6)
+    assert (layer.recordings["v_mem"] >= -0.2).all()
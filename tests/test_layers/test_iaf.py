@@ -165,3 +165,349 @@ def test_iaf_recurrent_on_gpu():
 
     layer = layer.to("cuda")
     layer(input_current.to("cuda"))
+
+
+def _iaf_reference(layer, input_current):
+    # Step-by-step simulation, enforced by requiring gradients for the input
+    spikes = layer(input_current.clone().requires_grad_(True))
+    return spikes.detach(), layer.v_mem.detach().clone()
+
+
+@pytest.mark.parametrize("min_v_mem", [None, -0.5])
+def test_iaf_closed_form_matches_loop(min_v_mem):
+    batch_size, time_steps = 5, 50
+    # Use multiples of 1/8 so that closed form and loop are not affected by rounding
+    input_current = torch.randint(-8, 16, (batch_size, time_steps, 2, 7, 7)) / 8
+    layer = IAF(min_v_mem=min_v_mem, record_states=True, closed_form=True)
+    layer_ref = IAF(min_v_mem=min_v_mem)
+
+    spikes_ref, v_mem_ref = _iaf_reference(layer_ref, input_current)
+    with torch.no_grad():
+        spikes = layer(input_current)
+
+    assert (spikes == spikes_ref).all()
+    assert (layer.v_mem == v_mem_ref).all()
+    assert layer.recordings["v_mem"].shape == spikes.shape
+    assert (layer.recordings["v_mem"][:, -1] == layer.v_mem).all()
+    if min_v_mem is not None:
+        assert (layer.recordings["v_mem"] >= min_v_mem).all()
+
+
+def test_iaf_closed_form_is_opt_in(monkeypatch):
+    from sinabs.layers import functional
+
+    def fail(*args, **kwargs):
+        raise AssertionError("Closed-form simulation used without `closed_form`")
+
+    monkeypatch.setattr(functional, "iaf_forward", fail)
+    input_current = torch.rand(5, 50, 10) * 2
+    with torch.no_grad():
+        IAF()(input_current)
+        IAFSqueeze(batch_size=5)(input_current.flatten(0, 1))
+
+
+def test_iaf_closed_form_carries_state():
+    batch_size, time_steps = 5, 20
+    input_current = torch.randint(-8, 16, (batch_size, 2 * time_steps, 10)) / 8
+    layer = IAF(closed_form=True)
+    layer_ref = IAF()
+
+    spikes_ref, v_mem_ref = _iaf_reference(layer_ref, input_current)
+    with torch.no_grad():
+        spikes = torch.cat(
+            [
+                layer(input_current[:, :time_steps]),
+                layer(input_current[:, time_steps:]),
+            ],
+            dim=1,
+        )
+
+    assert (spikes == spikes_ref).all()
+    assert (layer.v_mem == v_mem_ref).all()
+
+
+@pytest.mark.parametrize(
+    "spike_fn,reset_fn,min_v_mem",
+    [
+        (sa.MultiSpike, sa.MembraneSubtract(), None),
+        (sa.MultiSpike, sa.MembraneSubtract(), -0.5),
+        (sa.SingleSpike, sa.MembraneSubtract(), None),
+        (sa.SingleSpike, sa.MembraneReset(), -0.5),
+        (sa.MaxSpike(2), sa.MembraneSubtract(), None),
+    ],
+)
+def test_iaf_sparse_matches_dense(spike_fn, reset_fn, min_v_mem):
+    batch_size, time_steps = 3, 40
+    mask = torch.rand(batch_size, time_steps, 4, 5) < 0.1
+    input_current = mask * torch.randint(-8, 24, mask.shape) / 8
+
+    layer_dense = IAF(spike_fn=spike_fn, reset_fn=reset_fn, min_v_mem=min_v_mem)
+    layer_sparse = IAF(spike_fn=spike_fn, reset_fn=reset_fn, min_v_mem=min_v_mem)
+    for _ in range(2):
+        # Second iteration starts from non-zero states
+        spikes_dense = layer_dense(input_current)
+        spikes_sparse = layer_sparse(input_current.to_sparse())
+        assert spikes_sparse.is_sparse
+        assert torch.equal(spikes_sparse.to_dense(), spikes_dense)
+        assert torch.equal(layer_sparse.v_mem, layer_dense.v_mem)
+        assert layer_sparse.firing_rate == layer_dense.firing_rate
+
+
+def test_iaf_sparse_reset_value():
+    # A non-zero `reset_value` changes neurons without input, which are not updated
+    input_current = ((torch.rand(2, 10, 6) < 0.2) * 1.5).to_sparse()
+    layer = IAF(reset_fn=sa.MembraneReset(reset_value=0.3))
+    with pytest.raises(ValueError):
+        layer(input_current)
+
+
+def test_iaf_sparse_event_input():
+    from sinabs.layers.functional import events_to_sparse, sparse_to_events
+
+    batch_size, time_steps = 2, 20
+    input_current = (torch.rand(batch_size, time_steps, 6) < 0.2) * 1.5
+    input_events = sparse_to_events(input_current.to_sparse())
+    assert len(input_events) == time_steps
+    assert torch.equal(
+        events_to_sparse(input_events, (batch_size, 6)).to_dense(), input_current
+    )
+
+    # State shape needs to be known for event input
+    with pytest.raises(ValueError):
+        IAF()(input_events)
+
+    layer = IAF(shape=(batch_size, 6))
+    output_events = layer(input_events)
+    spikes = events_to_sparse(output_events, (batch_size, 6)).to_dense()
+    assert torch.equal(spikes, IAF()(input_current))
+
+
+@pytest.mark.parametrize(
+    "spike_fn,reset_fn,min_v_mem",
+    [
+        (sa.MultiSpike, sa.MembraneSubtract(), None),
+        (sa.SingleSpike, sa.MembraneSubtract(), -30),
+        (sa.SingleSpike, sa.MembraneReset(), None),
+        (sa.MaxSpike(2), sa.MembraneSubtract(), -30),
+    ],
+)
+def test_iaf_fixed_point_matches_float(spike_fn, reset_fn, min_v_mem):
+    batch_size, time_steps = 3, 50
+    input_current = torch.randint(-20, 40, (batch_size, time_steps, 2, 4, 4))
+    kwargs = dict(
+        spike_threshold=torch.tensor(50.0),
+        spike_fn=spike_fn,
+        reset_fn=reset_fn,
+        min_v_mem=min_v_mem,
+        record_states=True,
+    )
+    layer_float = IAF(**kwargs)
+    layer_fixed = IAF(fixed_point=True, **kwargs)
+    for _ in range(2):
+        # Second iteration starts from non-zero states
+        spikes_float = layer_float(input_current.float())
+        spikes_fixed = layer_fixed(input_current.to(torch.int16))
+        assert spikes_fixed.dtype == layer_fixed.v_mem.dtype == torch.int16
+        assert torch.equal(spikes_fixed.float(), spikes_float)
+        assert torch.equal(layer_fixed.v_mem.float(), layer_float.v_mem)
+        assert torch.equal(
+            layer_fixed.recordings["v_mem"].float(), layer_float.recordings["v_mem"]
+        )
+
+
+def test_iaf_fixed_point_saturation():
+    layer = IAF(spike_threshold=torch.tensor(40000.0), fixed_point=True)
+    spikes = layer(torch.full((1, 3, 2), 20000, dtype=torch.int32))
+    assert (spikes == 0).all()
+    assert (layer.v_mem == torch.iinfo(torch.int16).max).all()
+
+    layer.reset_states()
+    assert layer.v_mem.dtype == torch.int16
+    with pytest.raises(TypeError):
+        layer(torch.rand(1, 3, 2))
+    with pytest.raises(ValueError):
+        IAF(spike_threshold=torch.tensor(1.5), fixed_point=True)(
+            torch.ones((1, 3, 2), dtype=torch.int32)
+        )
+
+
+def test_iaf_squeeze_fixed_point_with_conv():
+    from sinabs.layers import FixedPointConv2d
+
+    batch_size, time_steps = 2, 10
+    conv = nn.Conv2d(2, 4, 3)
+    conv.weight.data = torch.randint(-100, 100, conv.weight.shape).float()
+    conv.bias.data = torch.randint(-100, 100, conv.bias.shape).float()
+    layer_float = IAFSqueeze(batch_size=batch_size, spike_threshold=300.0)
+    layer_fixed = IAFSqueeze(
+        batch_size=batch_size, spike_threshold=300.0, fixed_point=True
+    )
+    conv_fixed = FixedPointConv2d.from_conv(conv)
+
+    inp = (torch.rand(batch_size * time_steps, 2, 6, 6) < 0.3).int()
+    spikes_fixed = layer_fixed(conv_fixed(inp))
+    spikes_float = layer_float(conv(inp.float()))
+    assert torch.equal(spikes_fixed.float(), spikes_float)
+
+
+def test_fixed_point_conv_from_conv_keeps_device_and_dtype():
+    from sinabs.layers import FixedPointConv2d
+
+    conv = nn.Conv2d(2, 4, 3).double()
+    conv.weight.data = torch.randint(-100, 100, conv.weight.shape).double()
+    conv.bias.data = torch.randint(-100, 100, conv.bias.shape).double()
+    conv_fixed = FixedPointConv2d.from_conv(conv)
+    assert conv_fixed.weight.device == conv.weight.device
+    assert conv_fixed.weight.dtype == torch.float64
+    assert torch.equal(conv_fixed.weight, conv.weight)
+
+
+@pytest.mark.parametrize("spike_dtype", [torch.uint8, torch.bool])
+def test_iaf_spike_dtype(spike_dtype):
+    import sinabs.layers as sl
+    from sinabs.hooks import register_float_input_hooks
+
+    def make_model(spike_dtype):
+        torch.manual_seed(0)
+        return nn.Sequential(
+            sl.FlattenTime(),
+            nn.Conv2d(2, 8, 3, padding=1),
+            IAFSqueeze(batch_size=2, spike_fn=sa.SingleSpike, spike_dtype=spike_dtype),
+            sl.SumPool2d(2),
+            sl.UnflattenTime(batch_size=2),
+            sl.Repeat(nn.Conv2d(8, 4, 3, padding=1)),
+            sl.LIF(
+                tau_mem=10.0,
+                spike_fn=sa.SingleSpike,
+                norm_input=False,
+                spike_dtype=spike_dtype,
+            ),
+        )
+
+    data = torch.rand(2, 10, 2, 16, 16) * 2
+    model = make_model(None)
+    compact_model = make_model(spike_dtype)
+    register_float_input_hooks(compact_model)
+    with torch.no_grad():
+        output = model(data)
+        output_compact = compact_model(data)
+
+    assert output.sum() > 0
+    assert output_compact.dtype == spike_dtype
+    assert torch.equal(output_compact.float(), output)
+    assert compact_model[2].firing_rate == model[2].firing_rate
+    with torch.no_grad():
+        assert compact_model[:4](data).dtype == torch.uint8
+
+    # Spikes remain float if gradients are required
+    layer = IAF(spike_dtype=spike_dtype)
+    assert layer(data.requires_grad_(True)).dtype == torch.float32
+
+
+def _peak_memory(function) -> int:
+    # Peak of CPU memory allocated by torch while `function` is running
+    from torch.profiler import ProfilerActivity, profile
+
+    with profile(activities=[ProfilerActivity.CPU], profile_memory=True) as prof:
+        function()
+    current = peak = 0
+    for event in sorted(prof.events(), key=lambda e: e.time_range.start):
+        if event.name == "[memory]":
+            current += event.cpu_memory_usage
+        else:
+            current += event.self_cpu_memory_usage
+        peak = max(peak, current)
+    return peak
+
+
+@pytest.mark.parametrize("closed_form", [False, True])
+def test_iaf_spike_dtype_memory(closed_form):
+    data = torch.randint(0, 16, (4, 100, 1000)) / 8
+    input_bytes = data.numel() * data.element_size()
+    layer = IAF(closed_form=closed_form)
+    layer_compact = IAF(closed_form=closed_form, spike_dtype=torch.uint8)
+    with torch.no_grad():
+        output = layer(data)
+        output_compact = layer_compact(data)
+        layer.reset_states()
+        layer_compact.reset_states()
+        peak = _peak_memory(lambda: layer(data))
+        peak_compact = _peak_memory(lambda: layer_compact(data))
+
+    assert torch.equal(output_compact.float(), output)
+    assert output_compact.dtype == torch.uint8
+    if closed_form:
+        # Spikes are computed in the memory of the membrane potential and only the compact
+        # spikes are allocated in addition
+        assert peak_compact <= peak + input_bytes // 4
+        assert peak_compact < 3 * input_bytes
+    else:
+        # No float spikes are allocated
+        assert peak_compact < 0.5 * peak
+
+
+def test_pack_spikes():
+    from sinabs.layers.functional import pack_spikes, unpack_spikes
+
+    spikes = (torch.rand(3, 5, 7) > 0.7).float()
+    packed = pack_spikes(spikes)
+    assert packed.dtype == torch.uint8
+    assert packed.numel() == 14
+    assert torch.equal(unpack_spikes(packed, spikes.shape), spikes)
+
+
+@pytest.mark.parametrize("spike_fn", [sa.MultiSpike, sa.SingleSpike])
+@pytest.mark.parametrize(
+    "reset_fn",
+    [sa.MembraneSubtract(), sa.MembraneReset(), sa.MembraneReset(reset_value=0.3)],
+)
+def test_iaf_skip_zero_steps(spike_fn, reset_fn):
+    torch.manual_seed(0)
+    input_data = torch.rand(3, 50, 4, 5) * 3
+    input_data[:, 10:30] = 0
+    input_data[:, 35] = 0
+    input_data[:, 45:] = 0
+    layer = IAF(spike_fn=spike_fn, reset_fn=reset_fn, min_v_mem=-1.0)
+    skipping_layer = IAF(
+        spike_fn=spike_fn, reset_fn=reset_fn, min_v_mem=-1.0, skip_zero_steps=True
+    )
+
+    with torch.no_grad():
+        for _ in range(2):
+            spikes = layer(input_data)
+            assert torch.equal(skipping_layer(input_data), spikes)
+            assert torch.allclose(skipping_layer.v_mem, layer.v_mem, atol=1e-5)
+            assert skipping_layer.firing_rate == layer.firing_rate
+
+
+def test_iaf_skip_zero_steps_reset_value():
+    # A non-zero `reset_value` is added at every time step, including empty ones
+    input_data = torch.zeros(2, 20, 3)
+    input_data[:, 0] = 0.2
+    reset_fn = sa.MembraneReset(reset_value=0.3)
+    layer = IAF(reset_fn=reset_fn)
+    skipping_layer = IAF(reset_fn=reset_fn, skip_zero_steps=True)
+
+    with torch.no_grad():
+        spikes = layer(input_data)
+        assert spikes.sum() > 0
+        assert torch.equal(skipping_layer(input_data), spikes)
+        assert torch.allclose(skipping_layer.v_mem, layer.v_mem)
+
+
+@pytest.mark.parametrize(
+    "kwargs", [dict(tau_syn=5.0), dict(record_states=True)], ids=["syn", "record"]
+)
+def test_iaf_skip_zero_steps_unsupported_falls_back(kwargs):
+    input_data = torch.rand(2, 20, 3) * 2
+    input_data[:, 5:15] = 0
+    layer = IAF(**kwargs)
+    skipping_layer = IAF(skip_zero_steps=True, **kwargs)
+
+    # Training is unaffected, and inference simulates all time steps
+    skipping_layer(input_data.requires_grad_()).sum().backward()
+    skipping_layer.reset_states()
+    with torch.no_grad():
+        spikes = layer(input_data)
+        assert torch.equal(skipping_layer(input_data), spikes)
+        assert torch.allclose(skipping_layer.v_mem, layer.v_mem)
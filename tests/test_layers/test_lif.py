@@ -392,3 +392,304 @@ def test_alpha_tau_conversion(tau_syn, train_alphas):
         alpha_syn = torch.exp(-1.0 / tau_syn)
         assert torch.isclose(layer.tau_syn_calculated, tau_syn).all()
         assert torch.isclose(layer.alpha_syn_calculated, alpha_syn).all()
+
+
+@pytest.mark.parametrize("norm_input", (True, False))
+def test_lif_precomputed_synaptic_current(norm_input):
+    from sinabs.layers.functional.lif import lif_forward_single
+
+    batch_size, time_steps = 5, 50
+    input_current = torch.rand(batch_size, time_steps, 2, 7, 7) * 5
+    layer = LIF(tau_mem=20.0, tau_syn=10.0, norm_input=norm_input)
+    spikes = layer(input_current)
+
+    # Reference: synaptic current updated step by step
+    state = {"v_mem": torch.zeros(batch_size, 2, 7, 7)}
+    state["i_syn"] = torch.zeros_like(state["v_mem"])
+    spikes_ref = []
+    for step in range(time_steps):
+        spikes_step, state = lif_forward_single(
+            input_data=input_current[:, step],
+            alpha_mem=layer.alpha_mem_calculated,
+            alpha_syn=layer.alpha_syn_calculated,
+            state=state,
+            spike_threshold=layer.spike_threshold,
+            spike_fn=layer.spike_fn,
+            reset_fn=layer.reset_fn,
+            surrogate_grad_fn=layer.surrogate_grad_fn,
+            min_v_mem=None,
+            norm_input=norm_input,
+        )
+        spikes_ref.append(spikes_step)
+    spikes_ref = torch.stack(spikes_ref, 1)
+
+    # The precomputed synaptic current differs from the step-by-step update by
+    # float32 rounding, which can flip the odd spike close to threshold.
+    assert (spikes != spikes_ref).float().mean() < 1e-2
+    assert torch.allclose(layer.i_syn, state["i_syn"])
+    v_mem_close = torch.isclose(layer.v_mem, state["v_mem"], atol=1e-4)
+    assert v_mem_close.float().mean() > 0.99
+
+    grads = torch.autograd.grad(spikes.sum(), (layer.tau_mem, layer.tau_syn))
+    grads_ref = torch.autograd.grad(spikes_ref.sum(), (layer.tau_mem, layer.tau_syn))
+    for grad, grad_ref in zip(grads, grads_ref):
+        assert torch.allclose(grad, grad_ref, rtol=1e-4)
+
+
+@pytest.mark.parametrize(
+    "spike_fn,reset_fn,tau_syn,min_v_mem,norm_input",
+    [
+        (sa.MultiSpike, sa.MembraneSubtract(), None, None, True),
+        (sa.SingleSpike, sa.MembraneReset(), 10.0, -0.5, True),
+        (sa.MaxSpike(2), sa.MembraneSubtract(subtract_value=0.5), 10.0, None, False),
+        (sa.MultiSpike, sa.MembraneReset(reset_value=-0.2), None, -1.0, False),
+    ],
+)
+def test_lif_inplace_inference(spike_fn, reset_fn, tau_syn, min_v_mem, norm_input):
+    batch_size, time_steps = 5, 50
+    input_current = (torch.rand(batch_size, time_steps, 2, 7, 7) - 0.3) * 5
+    kwargs = dict(
+        tau_mem=20.0,
+        tau_syn=tau_syn,
+        spike_fn=spike_fn,
+        reset_fn=reset_fn,
+        min_v_mem=min_v_mem,
+        norm_input=norm_input,
+        record_states=True,
+    )
+    layer = LIF(**kwargs)
+    layer_ref = LIF(**kwargs)
+
+    with torch.no_grad():
+        spikes = layer(input_current)
+    spikes_ref = layer_ref(input_current)
+
+    assert torch.allclose(spikes, spikes_ref)
+    assert layer.recordings.keys() == layer_ref.recordings.keys()
+    for name, recording in layer.recordings.items():
+        assert torch.allclose(recording, layer_ref.recordings[name], atol=1e-5)
+        assert torch.allclose(getattr(layer, name), getattr(layer_ref, name), atol=1e-5)
+
+
+@pytest.mark.parametrize(
+    "spike_fn,reset_fn,surrogate_grad_fn,min_v_mem",
+    [
+        (sa.MultiSpike, sa.MembraneSubtract(), sa.SingleExponential(), None),
+        (sa.SingleSpike, sa.MembraneReset(), sa.Heaviside(), -0.5),
+        (sa.MaxSpike(2), sa.MembraneSubtract(subtract_value=0.5), sa.Gaussian(), None),
+        (sa.SingleSpike, sa.MembraneSubtract(), sa.PeriodicExponential(), -1.0),
+    ],
+)
+def test_lif_bptt_gradients(spike_fn, reset_fn, surrogate_grad_fn, min_v_mem):
+    from sinabs.layers.functional.lif import lif_forward_bptt, lif_forward_single
+
+    batch_size, time_steps = 3, 30
+    input_current = (
+        torch.rand(batch_size, time_steps, 4, dtype=torch.float64) - 0.3
+    ) * 3
+    input_current.requires_grad_(True)
+    v_mem = torch.rand(batch_size, 4, dtype=torch.float64, requires_grad=True)
+    tau_mem = torch.tensor(10.0, dtype=torch.float64, requires_grad=True)
+    params = dict(
+        spike_threshold=torch.tensor(1.0, dtype=torch.float64),
+        spike_fn=spike_fn,
+        reset_fn=reset_fn,
+        surrogate_grad_fn=surrogate_grad_fn,
+        min_v_mem=min_v_mem,
+        norm_input=True,
+    )
+
+    spikes, state, _ = lif_forward_bptt(
+        input_current,
+        alpha_mem=torch.exp(-1 / tau_mem),
+        state={"v_mem": v_mem},
+        **params,
+    )
+
+    state_ref = {"v_mem": v_mem}
+    spikes_ref = []
+    for step in range(time_steps):
+        spikes_step, state_ref = lif_forward_single(
+            input_data=input_current[:, step],
+            alpha_mem=torch.exp(-1 / tau_mem),
+            alpha_syn=None,
+            state=state_ref,
+            **params,
+        )
+        spikes_ref.append(spikes_step)
+    spikes_ref = torch.stack(spikes_ref, 1)
+
+    assert torch.equal(spikes, spikes_ref)
+    assert torch.allclose(state["v_mem"], state_ref["v_mem"])
+
+    weights = torch.rand_like(spikes)
+    loss = (spikes * weights).sum() + state["v_mem"].sum()
+    loss_ref = (spikes_ref * weights).sum() + state_ref["v_mem"].sum()
+    inputs = (input_current, v_mem, tau_mem)
+    grads = torch.autograd.grad(loss, inputs)
+    grads_ref = torch.autograd.grad(loss_ref, inputs)
+    for grad, grad_ref in zip(grads, grads_ref):
+        assert torch.allclose(grad, grad_ref)
+
+
+@pytest.mark.parametrize("norm_input", (True, False))
+def test_lif_bptt_float32_spikes_match_loop(norm_input):
+    # `record_states` forces the step-by-step loop, without it `LIFBPTT` is used
+    input_current = torch.rand(5, 50, 2, 7, 7) * 5
+    kwargs = dict(tau_mem=20.0, norm_input=norm_input)
+    layer = LIF(**kwargs)
+    layer_ref = LIF(**kwargs, record_states=True)
+
+    spikes = layer(input_current)
+    spikes_ref = layer_ref(input_current)
+
+    assert torch.equal(spikes, spikes_ref)
+    assert torch.equal(layer.v_mem, layer_ref.v_mem)
+
+
+def _train_step(layer, input_current):
+    input_current = input_current.clone().requires_grad_(True)
+    spikes = layer(input_current)
+    weights = torch.linspace(0, 1, spikes.numel()).reshape(spikes.shape)
+    (spikes * weights).sum().backward()
+    grads = [p.grad for p in layer.parameters() if p.grad is not None]
+    return spikes, input_current.grad, grads, layer.v_mem.detach()
+
+
+@pytest.mark.parametrize(
+    "tau_syn,checkpoint_steps,recurrent",
+    product((None, 5.0), (4, "auto"), (False, True)),
+)
+def test_lif_checkpointing(tau_syn, checkpoint_steps, recurrent):
+    batch_size, time_steps = 3, 23
+    input_current = torch.rand(batch_size, time_steps, 6) * 1.5
+
+    def make_layer(checkpoint_steps):
+        torch.manual_seed(0)
+        if recurrent:
+            return LIFRecurrent(
+                tau_mem=10.0,
+                tau_syn=tau_syn,
+                rec_connect=nn.Linear(6, 6),
+                train_alphas=True,
+                checkpoint_steps=checkpoint_steps,
+            )
+        return LIF(
+            tau_mem=10.0,
+            tau_syn=tau_syn,
+            train_alphas=True,
+            min_v_mem=-1.0,
+            checkpoint_steps=checkpoint_steps,
+        )
+
+    results = _train_step(make_layer(checkpoint_steps), input_current)
+    results_ref = _train_step(make_layer(None), input_current)
+
+    spikes, grad_input, grads, v_mem = results
+    spikes_ref, grad_input_ref, grads_ref, v_mem_ref = results_ref
+    assert torch.equal(spikes, spikes_ref)
+    assert torch.allclose(v_mem, v_mem_ref)
+    assert torch.allclose(grad_input, grad_input_ref)
+    assert len(grads) == len(grads_ref)
+    for grad, grad_ref in zip(grads, grads_ref):
+        assert torch.allclose(grad, grad_ref)
+
+
+def test_checkpoint_steps_for_budget():
+    from sinabs.layers.functional import checkpoint_steps_for_budget
+
+    # Memory estimate ceil(100 / K) * 4 + K is minimal for K = 20
+    assert checkpoint_steps_for_budget(100, 1, 4) == 20
+    # Largest K that fits into the budget
+    assert checkpoint_steps_for_budget(100, 1, 4, memory_budget=60) == 52
+    assert checkpoint_steps_for_budget(100, 1, 4, memory_budget=1000) == 100
+    with pytest.warns(UserWarning):
+        assert checkpoint_steps_for_budget(100, 1, 4, memory_budget=10) == 20
+
+
+def test_checkpoint_auto_uses_engine_memory():
+    batch_size, time_steps, n_neurons = 2, 50, 16
+    input_current = torch.rand(batch_size, time_steps, n_neurons, requires_grad=True)
+    # The membrane potentials that `lif_forward_bptt` saves for the whole sequence and the
+    # state at one chunk boundary fit into the budget, so no chunking is needed
+    budget = (time_steps + 1) * batch_size * n_neurons * 4
+    layer = LIF(tau_mem=10.0, checkpoint_steps="auto", checkpoint_memory_budget=budget)
+    assert layer._resolve_checkpoint_steps(input_current) == time_steps
+
+    # The step-by-step simulation saves twice as much, so ceil(50 / K) + 2 * K <= 51
+    layer.record_states = True
+    assert layer._resolve_checkpoint_steps(input_current) == 24
+
+
+@pytest.mark.parametrize("sparse_weight", [False, True])
+@pytest.mark.parametrize("bias", [False, True])
+def test_lif_recurrent_fused(sparse_weight, bias):
+    n_neurons = 64
+    input_data = torch.randint(0, 8, (3, 40, n_neurons)) / 8
+    rec_connect = nn.Linear(n_neurons, n_neurons, bias=bias)
+    # Dyadic weights, such that results do not depend on the order of summation
+    mask = torch.rand(n_neurons, n_neurons) < 0.2
+    rec_connect.weight.data = torch.randint(-4, 5, mask.shape) / 8 * mask
+
+    layer_ref = LIFRecurrent(
+        tau_mem=10.0,
+        tau_syn=5.0,
+        rec_connect=nn.Sequential(rec_connect),
+        record_states=True,
+    )
+    spikes_ref = layer_ref(input_data)
+
+    if sparse_weight:
+        rec_connect.weight = nn.Parameter(rec_connect.weight.data.to_sparse())
+    layer = LIFRecurrent(
+        tau_mem=10.0, tau_syn=5.0, rec_connect=rec_connect, record_states=True
+    )
+    with torch.no_grad():
+        spikes = layer(input_data)
+    assert torch.equal(spikes, spikes_ref)
+    for name, recording in layer_ref.recordings.items():
+        assert torch.allclose(layer.recordings[name], recording)
+
+
+@pytest.mark.parametrize("sparse_weight", [False, True])
+def test_fused_recurrent_weight_cache(sparse_weight):
+    from sinabs.layers.functional.recurrent import (
+        fused_recurrent_weight,
+        recurrent_input,
+    )
+
+    rec_connect = nn.Linear(8, 8).requires_grad_(False)
+    if sparse_weight:
+        rec_connect.weight = nn.Parameter(
+            rec_connect.weight.data.to_sparse(), requires_grad=False
+        )
+    weight, bias = fused_recurrent_weight(rec_connect, (8,))
+    assert fused_recurrent_weight(rec_connect, (8,))[0] is weight
+
+    spikes = (torch.rand(3, 8) > 0.5).float()
+    out = torch.empty(3, 8)
+    result = recurrent_input(spikes, weight, bias, out=out)
+    assert result.data_ptr() == out.data_ptr()
+    expected = spikes @ rec_connect.weight.to_dense().t() + rec_connect.bias
+    assert torch.allclose(out, expected)
+
+    # Weights are prepared again after the parameters have been modified in place
+    rec_connect.bias.add_(1.0)
+    weight, bias = fused_recurrent_weight(rec_connect, (8,))
+    assert torch.allclose(recurrent_input(spikes, weight, bias), expected + 1.0)
+
+
+def test_lif_recurrent_record_states_per_step():
+    input_data = torch.rand(2, 10, 3) * 2
+    rec_connect = nn.Linear(3, 3, bias=False)
+    kwargs = dict(tau_mem=10.0, tau_syn=5.0, rec_connect=rec_connect)
+    layer = LIFRecurrent(**kwargs, record_states=True)
+    layer(input_data)
+
+    layer_step = LIFRecurrent(**kwargs)
+    for step in range(10):
+        layer_step.step(input_data[:, step])
+        for name in ("v_mem", "i_syn"):
+            assert torch.allclose(
+                layer.recordings[name][:, step], getattr(layer_step, name)
+            )
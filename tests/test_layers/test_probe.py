@@ -0,0 +1,67 @@
+import pytest
+import torch
+
+from sinabs.layers import ALIF, IAF, LIF, ExpLeak, LIFRecurrent, StateProbe
+
+
+@pytest.mark.parametrize(
+    "make_layer",
+    [
+        lambda rec: LIF(tau_mem=10.0, tau_syn=5.0, record_states=rec),
+        lambda rec: LIF(tau_mem=10.0, record_states=rec, checkpoint_steps=7),
+        lambda rec: IAF(min_v_mem=-0.1, record_states=rec),
+        lambda rec: ALIF(tau_mem=10.0, tau_adapt=20.0, record_states=rec),
+        lambda rec: ExpLeak(tau_mem=10.0, record_states=rec),
+        lambda rec: LIFRecurrent(
+            tau_mem=10.0, rec_connect=torch.nn.Identity(), record_states=rec
+        ),
+    ],
+)
+@pytest.mark.parametrize("requires_grad", [False, True])
+def test_probe_matches_record_states(make_layer, requires_grad):
+    input_data = torch.rand(2, 30, 3, 4, 4, requires_grad=requires_grad)
+    layer_full = make_layer(True)
+    recordings = []
+    for _ in range(2):
+        layer_full(input_data)
+        recordings.append(layer_full.recordings)
+    names = list(recordings[0])
+
+    probe = StateProbe(states=names, index=(slice(None), 1, 2), every=3, buffer_size=4)
+    layer = make_layer(probe)
+    # Time steps are counted across forward passes
+    output = torch.cat([layer(input_data) for _ in range(2)], 1)
+    if requires_grad:
+        # Chunks that are recomputed for checkpointing are not recorded again
+        output.sum().backward()
+    assert layer.recordings == dict()
+
+    assert probe.steps[names[0]].tolist() == [48, 51, 54, 57]
+    for name in names:
+        full = torch.cat([recs[name] for recs in recordings], 1)
+        expected = full[:, ::3, 1, 2].movedim(1, 0)[-4:]
+        assert torch.allclose(probe.recordings[name], expected.detach())
+
+
+def test_probe_reductions():
+    input_data = torch.rand(2, 30, 3, 4, 4)
+    layer_full = LIF(tau_mem=10.0, record_states=True)
+    layer_full(input_data)
+    v_mem = layer_full.recordings["v_mem"]
+
+    probe_mean = StateProbe(reduction="mean")
+    probe_max = StateProbe(reduction="max", index=(slice(None), 0))
+    probe_hist = StateProbe(reduction="histogram", bins=10, value_range=(-1, 2))
+    for probe in (probe_mean, probe_max, probe_hist):
+        LIF(tau_mem=10.0, record_states=probe)(input_data)
+
+    assert torch.allclose(probe_mean.recordings["v_mem"], v_mem.mean(1))
+    assert torch.equal(probe_max.recordings["v_mem"], v_mem[:, :, 0].amax(1))
+    histogram = probe_hist.recordings["v_mem"]
+    assert histogram.shape == (10,) and len(probe_hist.bin_edges) == 11
+    assert histogram.sum() == v_mem.numel()
+
+    probe_mean.reset()
+    assert probe_mean.recordings == dict()
+    with pytest.raises(ValueError):
+        StateProbe(reduction="histogram")
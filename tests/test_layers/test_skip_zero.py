@@ -0,0 +1,42 @@
+import torch
+import torch.nn as nn
+
+import sinabs.layers as sl
+
+
+def test_skip_zero_steps_matches_module():
+    torch.manual_seed(0)
+    data = (torch.rand(20, 2, 8, 8) < 0.1).float()
+    data[::3] = 0
+    for module in (
+        nn.Conv2d(2, 4, kernel_size=3, bias=True),
+        nn.Conv2d(2, 4, kernel_size=3, bias=False),
+        sl.SumPool2d(2),
+    ):
+        skipping = sl.SkipZeroSteps(module)
+        with torch.no_grad():
+            assert torch.allclose(skipping(data), module(data))
+            assert torch.allclose(skipping(data[::3]), module(data[::3]))
+
+
+def test_skip_zero_steps_in_squeeze_model():
+    batch_size = 2
+    torch.manual_seed(0)
+    conv = nn.Conv2d(2, 4, kernel_size=3, padding=1, bias=False)
+    model = nn.Sequential(conv, sl.IAFSqueeze(batch_size=batch_size))
+    skipping_model = nn.Sequential(
+        sl.SkipZeroSteps(conv),
+        sl.IAFSqueeze(batch_size=batch_size, skip_zero_steps=True),
+    )
+    data = torch.rand(batch_size, 30, 2, 8, 8) * 2
+    data[:, 5:20] = 0
+    data[0, 25:] = 0
+
+    with torch.no_grad():
+        output = skipping_model(data.flatten(0, 1))
+        assert torch.equal(output, model(data.flatten(0, 1)))
+
+    # Gradients are computed without skipping
+    data.requires_grad_(True)
+    skipping_model(data.flatten(0, 1)).sum().backward()
+    assert data.grad is not None
@@ -0,0 +1,71 @@
+import pytest
+import torch
+import torch.nn as nn
+
+import sinabs.layers as sl
+
+
+@pytest.mark.parametrize(
+    "conv_kwargs",
+    [
+        dict(padding=1),
+        dict(stride=2, padding=(1, 2), dilation=2),
+        dict(groups=2, padding="same"),
+        dict(stride=(1, 3), bias=False),
+    ],
+)
+def test_sparse_conv_matches_dense(conv_kwargs):
+    torch.manual_seed(0)
+    conv = nn.Conv2d(4, 6, kernel_size=(3, 5), **conv_kwargs)
+    sparse_conv = sl.SparseConv2d.from_conv(conv, max_density=1.0)
+    spikes = (torch.rand(10, 4, 17, 19) < 0.05).float()
+    data = spikes * torch.rand(spikes.shape)
+
+    with torch.no_grad():
+        assert sparse_conv.use_sparse(data)
+        assert torch.allclose(sparse_conv(data), conv(data), atol=1e-6)
+        assert torch.allclose(sparse_conv(data.to_sparse()), conv(data), atol=1e-6)
+        assert torch.allclose(sparse_conv(spikes.bool()), conv(spikes), atol=1e-6)
+
+
+def test_sparse_conv_dense_fallback():
+    sparse_conv = sl.SparseConv2d(2, 4, kernel_size=3, max_density=0.1)
+    assert not sparse_conv.use_sparse(torch.ones(1, 2, 8, 8))
+    assert sparse_conv.use_sparse(torch.zeros(1, 2, 8, 8))
+    # Gradients with respect to the input require the dense convolution
+    assert not sparse_conv.use_sparse(torch.zeros(1, 2, 8, 8, requires_grad=True))
+    output = sparse_conv(torch.ones(1, 2, 8, 8, dtype=torch.uint8))
+    assert output.shape == (1, 4, 6, 6)
+
+
+def test_sparse_conv_weight_gradients():
+    torch.manual_seed(0)
+    conv = nn.Conv2d(4, 6, kernel_size=3, padding=1, groups=2)
+    sparse_conv = sl.SparseConv2d.from_conv(conv, max_density=1.0)
+    spikes = (torch.rand(10, 4, 12, 12) < 0.05).float()
+
+    conv(spikes).square().sum().backward()
+    sparse_conv(spikes).square().sum().backward()
+    for param, sparse_param in zip(conv.parameters(), sparse_conv.parameters()):
+        assert torch.allclose(param.grad, sparse_param.grad, rtol=1e-4)
+
+
+def test_sparse_conv_with_iaf_squeeze():
+    batch_size, time_steps = 2, 10
+    torch.manual_seed(0)
+    model = nn.Sequential(
+        nn.Conv2d(2, 8, kernel_size=3, padding=1),
+        sl.IAFSqueeze(batch_size=batch_size),
+        nn.Conv2d(8, 4, kernel_size=3, padding=1),
+        sl.IAFSqueeze(batch_size=batch_size),
+    )
+    sparse_model = nn.Sequential(
+        model[0],
+        sl.IAFSqueeze(batch_size=batch_size),
+        sl.SparseConv2d.from_conv(model[2], max_density=1.0),
+        sl.IAFSqueeze(batch_size=batch_size),
+    )
+    data = torch.rand(batch_size * time_steps, 2, 16, 16) * 2
+
+    with torch.no_grad():
+        assert torch.equal(sparse_model(data), model(data))
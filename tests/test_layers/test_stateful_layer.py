@@ -3,6 +3,8 @@ import pytest
 import torch
 import torch.nn as nn
 
+import sinabs.activation as sa
+import sinabs.layers as sl
 from sinabs.layers import LIF, StatefulLayer
 
 
@@ -70,3 +72,137 @@ def test_reset_states():
 
     assert layer.i_syn.max() <= 1.0
     assert layer.i_syn.min() >= 0.0
+
+
+@pytest.mark.parametrize(
+    "make_layer",
+    [
+        lambda: sl.LIF(tau_mem=10.0, tau_syn=5.0, norm_input=False),
+        lambda: sl.IAF(),
+        lambda: sl.ExpLeak(tau_mem=10.0),
+        lambda: sl.ALIF(tau_mem=10.0, tau_adapt=20.0, tau_syn=4.0),
+        lambda: sl.LIFSqueeze(tau_mem=10.0, batch_size=2, norm_input=False),
+        lambda: sl.LIFRecurrent(
+            tau_mem=10.0, rec_connect=nn.Linear(8, 8), norm_input=False
+        ),
+        lambda: sl.ALIFRecurrent(
+            tau_mem=10.0, tau_adapt=20.0, rec_connect=nn.Linear(8, 8)
+        ),
+    ],
+)
+def test_step_matches_forward(make_layer):
+    torch.manual_seed(0)
+    data = torch.rand(2, 30, 8) * 3
+    layer = make_layer()
+    layer_step = make_layer()
+    layer_step.load_state_dict(layer.state_dict())
+
+    with torch.no_grad():
+        if isinstance(layer, sl.SqueezeMixin):
+            expected = layer(data.flatten(0, 1)).unflatten(0, (2, 30))
+        else:
+            expected = layer(data)
+        output = torch.stack([layer_step.step(data[:, t]) for t in range(30)], 1)
+
+    assert torch.allclose(output, expected)
+    for name, buffer in layer.named_buffers():
+        assert torch.allclose(getattr(layer_step, name), buffer)
+
+
+def test_step_shape_and_parameter_changes():
+    layer = LIF(tau_mem=10.0, norm_input=False)
+    with torch.no_grad():
+        layer.step(torch.full((1, 4), 0.5))
+        assert torch.allclose(layer.v_mem, torch.full((1, 4), 0.5))
+
+        # New trailing dimension reinitializes the states
+        layer.step(torch.ones(1, 6))
+        assert layer.v_mem.shape == (1, 6)
+
+        # Decay factors are recomputed after time constants have been changed
+        layer.tau_mem.fill_(1e-3)
+        layer.step(torch.full((1, 6), 0.5))
+        assert torch.allclose(layer.v_mem, torch.full((1, 6), 0.5))
+
+    # Gradients are propagated to the time constant
+    layer.reset_states()
+    layer.step(torch.full((1, 6), 0.5))
+    layer.step(torch.zeros(1, 6)).sum()
+    layer.v_mem.sum().backward()
+    assert layer.tau_mem.grad is not None
+
+
+@pytest.mark.parametrize(
+    "make_layer",
+    [
+        lambda: sl.LIF(tau_mem=10.0, norm_input=False),
+        lambda: sl.ALIF(tau_mem=10.0, tau_adapt=20.0, norm_input=False),
+    ],
+)
+def test_step_batch_size_change_keeps_states(make_layer):
+    layer = make_layer()
+    with torch.no_grad():
+        layer.step(torch.full((2, 4), 0.5))
+        # Only the batch size changed, so states are resampled instead of reset
+        layer.step(torch.zeros(3, 4))
+    assert layer.v_mem.shape == (3, 4)
+    assert (layer.v_mem > 0).all()
+
+
+def _saved_bytes_per_neuron(make_layer, n_neurons=64) -> float:
+    # Memory saved for the backward pass per neuron and time step, measured as difference
+    # between two sequence lengths, such that states and weights cancel out. Scalars that
+    # are saved at each time step add a small fraction of a byte.
+    saved_bytes = []
+    for time_steps in (10, 20):
+        storages = dict()
+
+        def pack(tensor):
+            # `untyped_storage` was added in torch 2.0
+            if hasattr(tensor, "untyped_storage"):
+                storage = tensor.untyped_storage()
+            else:
+                storage = tensor.storage()
+            storages[storage.data_ptr()] = storage.size() * storage.element_size()
+            return tensor
+
+        torch.manual_seed(0)
+        layer = make_layer()
+        data = (torch.rand(2, time_steps, n_neurons) * 3).requires_grad_()
+        with torch.autograd.graph.saved_tensors_hooks(pack, lambda tensor: tensor):
+            output = layer(data)
+        storages.pop(data.data_ptr(), None)
+        saved_bytes.append(sum(storages.values()))
+        del output
+    return (saved_bytes[1] - saved_bytes[0]) / (2 * 10 * n_neurons)
+
+
+@pytest.mark.parametrize(
+    "make_layer",
+    [
+        lambda: sl.LIF(tau_mem=10.0),
+        lambda: sl.LIF(tau_mem=10.0, tau_syn=5.0, saved_state_dtype=torch.float16),
+        lambda: sl.LIF(tau_mem=10.0, record_states=True),
+        lambda: sl.LIF(
+            tau_mem=10.0,
+            min_v_mem=-1.0,
+            reset_fn=sa.MembraneReset(),
+            surrogate_grad_fn=sa.CompactSurrogate(),
+        ).requires_grad_(False),
+        lambda: sl.IAF(tau_syn=5.0),
+        lambda: sl.IAF(min_v_mem=-1.0, record_states=True),
+        lambda: sl.ExpLeak(tau_mem=10.0),
+        lambda: sl.ALIF(tau_mem=10.0, tau_adapt=20.0, tau_syn=4.0),
+        lambda: sl.ALIF(
+            tau_mem=10.0, tau_adapt=20.0, reset_fn=sa.MembraneReset()
+        ).requires_grad_(False),
+        lambda: sl.LIFRecurrent(tau_mem=10.0, rec_connect=nn.Linear(64, 64)),
+        lambda: sl.IAFRecurrent(rec_connect=nn.Linear(64, 64), tau_syn=5.0),
+        lambda: sl.ALIFRecurrent(
+            tau_mem=10.0, tau_adapt=20.0, rec_connect=nn.Linear(64, 64)
+        ),
+    ],
+)
+def test_saved_bytes_per_neuron(make_layer):
+    estimate = make_layer()._saved_bytes_per_neuron(torch.float32)
+    assert estimate == pytest.approx(_saved_bytes_per_neuron(make_layer), abs=0.1)
@@ -1,4 +1,5 @@
 import numpy as np
+import pytest
 import torch
 from torch import nn
 
@@ -163,3 +164,146 @@ def test_reset_states():
 
             assert layer.v_mem.max() <= -2
             assert layer.v_mem.min() >= -4
+
+
+def test_network_step():
+    import sinabs.layers as sl
+    from sinabs import Network
+
+    torch.manual_seed(0)
+    model = nn.Sequential(
+        nn.Conv2d(2, 4, kernel_size=3),
+        sl.IAFSqueeze(batch_size=1),
+        nn.Sequential(nn.Flatten(), nn.Linear(4 * 6 * 6, 3)),
+        sl.LIFSqueeze(tau_mem=10.0, batch_size=1),
+    )
+    net = Network(spiking_model=model)
+    data = torch.rand(10, 2, 8, 8) * 2
+
+    with torch.no_grad():
+        expected = net(data)
+        net.reset_states()
+        output = torch.cat([net.step(data[t : t + 1]) for t in range(10)])
+    assert torch.allclose(output, expected)
+
+    # Stateful layers outside of sequential models are not supported
+    with pytest.raises(ValueError):
+        nested_network.step(nested_input_tensor)
+
+
+def test_memory_planning():
+    import sinabs.layers as sl
+    from sinabs import Network
+
+    input_shape = (2, 16, 16)
+    model = nn.Sequential(
+        nn.Conv2d(2, 8, kernel_size=3, padding=1, bias=False),
+        sl.IAFSqueeze(batch_size=1),
+        nn.Conv2d(8, 8, kernel_size=3, padding=1, bias=False),
+        sl.IAFSqueeze(batch_size=1, spike_dtype=torch.uint8),
+    )
+    net = Network(spiking_model=model, input_shape=input_shape, batch_size=1)
+
+    neurons = 8 * 16 * 16
+    weight_bytes = sum(p.numel() * p.element_size() for p in net.parameters())
+    state_bytes = 2 * 4 * neurons
+    # Largest pair of consecutive activations: convolution output and float spikes
+    step_bytes = 2 * 4 * neurons
+    assert net.estimate_memory(1, 1) == weight_bytes + state_bytes + step_bytes
+    assert net.estimate_memory(3, 10) == weight_bytes + 3 * (
+        state_bytes + 10 * step_bytes
+    )
+    assert net.estimate_memory(3, 10, chunk_size=2) == net.estimate_memory(3, 2)
+    assert net.estimate_memory(1, 10, training=True) > net.estimate_memory(1, 10)
+
+    budget = net.estimate_memory(5, 100) + step_bytes
+    assert net.plan_memory(budget, num_timesteps=100) == (5, 100)
+    _, chunk_size = net.plan_memory(budget, num_timesteps=100, batch_size=10)
+    assert net.estimate_memory(10, 100, chunk_size) <= budget
+    assert net.estimate_memory(10, 100, chunk_size + 1) > budget
+    training_budget = net.estimate_memory(3, 100, training=True) + step_bytes
+    assert net.plan_memory(training_budget, 100, training=True) == (3, 100)
+    with pytest.warns(UserWarning):
+        net.plan_memory(weight_bytes, num_timesteps=100)
+
+    # Changing `spike_dtype` after construction is reflected in the estimate
+    model[1].spike_dtype = torch.uint8
+    assert net.estimate_memory(1, 1) == weight_bytes + state_bytes + 5 * neurons
+    model[1].spike_dtype = None
+    model[3].spike_dtype = None
+    assert net.estimate_memory(1, 1) == weight_bytes + state_bytes + step_bytes
+
+
+def _saved_bytes(module, data) -> int:
+    # Memory of the distinct tensors that are saved for the backward pass during a forward
+    # pass of `module`, and of its output
+    storages = dict()
+
+    def add(tensor):
+        # `untyped_storage` was added in torch 2.0
+        if hasattr(tensor, "untyped_storage"):
+            storage = tensor.untyped_storage()
+        else:
+            storage = tensor.storage()
+        storages[storage.data_ptr()] = storage.size() * storage.element_size()
+        return tensor
+
+    with torch.autograd.graph.saved_tensors_hooks(add, lambda tensor: tensor):
+        add(module(data))
+    return sum(storages.values())
+
+
+def test_training_memory_matches_saved_tensors():
+    import math
+
+    import sinabs.layers as sl
+    from sinabs import Network
+
+    batch_size, checkpoint_steps = 2, 5
+
+    def make_model(checkpoint_steps=None):
+        torch.manual_seed(0)
+        return nn.Sequential(
+            nn.Linear(16, 32),
+            sl.LIFSqueeze(tau_mem=10.0, batch_size=batch_size),
+            nn.Linear(32, 8),
+            sl.LIFSqueeze(
+                tau_mem=10.0, batch_size=batch_size, checkpoint_steps=checkpoint_steps
+            ),
+        )
+
+    def per_step(function):
+        # Difference between 30 and 10 time steps, such that constant memory cancels
+        return (function(30) - function(10)) / 20
+
+    model = make_model()
+    net = Network(spiking_model=model, input_shape=(16,), batch_size=batch_size)
+    estimate = per_step(lambda t: net.estimate_memory(batch_size, t, training=True))
+    measured = per_step(
+        lambda t: _saved_bytes(model, torch.rand(batch_size * t, 16) * 2)
+    )
+    assert estimate == pytest.approx(measured, rel=0.02)
+
+    # With checkpointing, the tensors saved by the last layer are replaced by its states at
+    # chunk boundaries and the tensors saved when one chunk is recomputed
+    layer_bytes = per_step(
+        lambda t: _saved_bytes(
+            make_model()[3], torch.rand(batch_size * t, 8, requires_grad=True) * 2
+        )
+        # Input and output of the layer are already included in the estimate
+        - 2 * batch_size * t * 8 * 4
+    )
+    net_checkpointed = Network(
+        spiking_model=make_model(checkpoint_steps),
+        input_shape=(16,),
+        batch_size=batch_size,
+    )
+    time_steps = 30
+    expected = (
+        net.estimate_memory(batch_size, time_steps, training=True)
+        - time_steps * layer_bytes
+        + math.ceil(time_steps / checkpoint_steps) * batch_size * 8 * 4
+        + checkpoint_steps * layer_bytes
+    )
+    estimate = net_checkpointed.estimate_memory(batch_size, time_steps, training=True)
+    assert estimate == pytest.approx(expected, rel=0.01)
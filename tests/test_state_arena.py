@@ -0,0 +1,124 @@
+import pytest
+import torch
+import torch.nn as nn
+
+import sinabs.layers as sl
+from sinabs import StateArena
+
+
+def make_model():
+    torch.manual_seed(0)
+    return nn.Sequential(
+        nn.Linear(4, 8),
+        sl.LIF(tau_mem=10.0, tau_syn=5.0),
+        nn.Linear(8, 3),
+        sl.ALIF(tau_mem=10.0, tau_adapt=20.0),
+    )
+
+
+def in_arena(model, arena):
+    # Whether all states lie within the memory of the arena tensors
+    ranges = [
+        (a.data_ptr(), a.data_ptr() + a.numel() * a.element_size())
+        for a in arena._arenas.values()
+    ]
+    return all(
+        any(
+            start <= b.data_ptr() and b.data_ptr() + b.numel() * b.element_size() <= end
+            for start, end in ranges
+        )
+        for b in model.buffers()
+    )
+
+
+def test_arena_matches_plain_model():
+    data = torch.rand(2, 20, 4)
+    reference = make_model()
+    model = make_model()
+    arena = StateArena(model)
+
+    with torch.no_grad():
+        for _ in range(2):
+            assert torch.equal(model(data), reference(data))
+            assert in_arena(model, arena)
+
+    # Different batch size leads to reallocation
+    with torch.no_grad():
+        model(torch.rand(5, 3, 4))
+    assert model[1].v_mem.shape == (5, 8)
+    assert in_arena(model, arena)
+    assert arena.memory == sum(b.numel() * b.element_size() for b in model.buffers())
+
+
+def test_states_written_into_arena():
+    data = torch.rand(2, 20, 4)
+    reference = make_model()
+    model = make_model()
+    arena = StateArena(model)
+
+    with torch.no_grad():
+        assert torch.equal(model(data), reference(data))
+        buffers = list(model.buffers())
+        assert torch.equal(model(data), reference(data))
+        # States are written in place, into the same views of the arena
+        assert all(a is b for a, b in zip(model.buffers(), buffers))
+        assert in_arena(model, arena)
+        for t in range(5):
+            x = reference[0](data[:, t])
+            x = reference[2](reference[1].step(x))
+            x = reference[3].step(x)
+            y = model[0](data[:, t])
+            y = model[2](model[1].step(y))
+            assert torch.equal(model[3].step(y), x)
+            assert in_arena(model, arena)
+    for buffer, buffer_ref in zip(model.buffers(), reference.buffers()):
+        assert torch.equal(buffer, buffer_ref)
+
+    arena.remove()
+    with torch.no_grad():
+        model(data)
+    assert not in_arena(model, arena)
+
+
+def test_reset_snapshot_restore():
+    data = torch.rand(2, 20, 4)
+    model = make_model()
+    arena = StateArena(model)
+
+    with torch.no_grad():
+        model(data)
+        snapshot = arena.snapshot()
+        output = model(data)
+        arena.restore(snapshot)
+        assert torch.equal(model(data), output)
+
+    arena.reset()
+    assert all((buffer == 0).all() for buffer in model.buffers())
+
+    with torch.no_grad():
+        model(torch.rand(3, 20, 4))
+    with pytest.raises(ValueError):
+        arena.restore(snapshot)
+
+    arena.to("cpu")
+    assert in_arena(model, arena)
+
+
+def test_arena_training():
+    data = torch.rand(2, 20, 4)
+    reference = make_model()
+    model = make_model()
+    arena = StateArena(model)
+
+    out = model(data) + model(data)
+    out_ref = reference(data) + reference(data)
+    assert torch.equal(out, out_ref)
+    out.sum().backward()
+    out_ref.sum().backward()
+    for param, param_ref in zip(model.parameters(), reference.parameters()):
+        if param_ref.grad is not None:
+            assert torch.allclose(param.grad, param_ref.grad)
+
+    arena.detach()
+    assert in_arena(model, arena)
+    assert not any(buffer.requires_grad for buffer in model.buffers())
@@ -0,0 +1,79 @@
+import pytest
+import torch
+import torch.nn as nn
+
+import sinabs.layers as sl
+from sinabs import StateBank
+
+
+def make_model():
+    torch.manual_seed(0)
+    return nn.Sequential(
+        nn.Linear(4, 8),
+        sl.LIF(tau_mem=10.0, tau_syn=5.0),
+        nn.Linear(8, 3),
+        sl.IAF(),
+    )
+
+
+def test_sessions_continue_from_own_state():
+    model = make_model()
+    streams = {sid: torch.rand(1, 30, 4) for sid in "abc"}
+
+    # Reference: each stream simulated alone in one go
+    reference = dict()
+    for sid, data in streams.items():
+        reference[sid] = make_model()(data)
+
+    # Streams processed in chunks of 10 time steps, in changing batch compositions
+    bank = StateBank(model)
+    batches = [("a", "b"), ("c",), ("b", "c", "a"), ("c", "a"), ("b",)]
+    position = {sid: 0 for sid in streams}
+    outputs = {sid: [] for sid in streams}
+    for batch in batches:
+        data = torch.cat(
+            [streams[sid][:, position[sid] : position[sid] + 10] for sid in batch]
+        )
+        output = bank(batch, data)
+        for sid, out in zip(batch, output):
+            outputs[sid].append(out)
+            position[sid] += 10
+
+    for sid in streams:
+        assert torch.allclose(torch.cat(outputs[sid]), reference[sid][0])
+    assert len(bank) == 3 and "a" in bank
+
+
+def test_lru_eviction():
+    model = make_model()
+    bank = StateBank(model, max_sessions=2)
+    data = torch.rand(1, 5, 4) + 1
+    bank(["a"], data)
+    bank(["b"], data)
+    bank(["a"], data)
+    bank(["c"], data)
+    # "b" was least recently used
+    assert bank.sessions == ["a", "c"]
+    assert bank.memory == 2 * (2 * 8 + 3) * 4
+
+    # Evicted sessions start again from zero states
+    output_b = bank(["b"], data)
+    assert torch.equal(output_b, StateBank(make_model())(["x"], data))
+
+    with pytest.raises(ValueError):
+        bank(["a", "b", "c"], torch.rand(3, 5, 4))
+
+
+def test_memory_limit():
+    model = make_model()
+    bytes_per_session = (2 * 8 + 3) * 4
+    bank = StateBank(model, max_memory=3 * bytes_per_session)
+    for sid in range(5):
+        bank([sid], torch.rand(1, 5, 4))
+    assert bank.sessions == [2, 3, 4]
+    assert bank.memory <= 3 * bytes_per_session
+
+    bank.evict(3)
+    assert 3 not in bank
+    bank.clear()
+    assert len(bank) == 0 and bank.memory == 0
@@ -29,3 +29,114 @@ def test_periodic_exponential(grad_width, grad_scale, spike_threshold):
     vmem_small = torch.linspace(-spike_threshold, spike_threshold, 50)
     surrogate_gradient_small = grad_fn(vmem_small, spike_threshold)
     assert (torch.diff(surrogate_gradient_small) > 0).all()
+
+
+def saved_bytes(fn, *args):
+    import torch
+
+    sizes = []
+
+    def pack(tensor):
+        sizes.append(tensor.numel() * tensor.element_size())
+        return tensor
+
+    with torch.autograd.graph.saved_tensors_hooks(pack, lambda tensor: tensor):
+        output = fn(*args)
+    return output, sum(sizes)
+
+
+@pytest.mark.parametrize(
+    "surrogate,tolerance,max_memory_ratio",
+    [("heaviside", 0.0, 0.1), ("exponential", 0.0, 0.5), ("exponential", 0.1, 0.4)],
+)
+def test_compact_surrogate(surrogate, tolerance, max_memory_ratio):
+    import torch
+
+    from sinabs.activation import (
+        CompactSurrogate,
+        Heaviside,
+        SingleExponential,
+        SingleSpike,
+    )
+
+    torch.manual_seed(0)
+    grad_fn = Heaviside(window=0.2) if surrogate == "heaviside" else SingleExponential()
+    compact_grad_fn = CompactSurrogate(grad_fn, tolerance=tolerance)
+    v_mem = (torch.rand(8, 1000) * 6 - 5).requires_grad_(True)
+    grad_output = torch.rand(8, 1000)
+
+    spikes, full_bytes = saved_bytes(SingleSpike.apply, v_mem, 1.0, grad_fn)
+    (grad,) = torch.autograd.grad(spikes, v_mem, grad_output)
+    spikes_compact, compact_bytes = saved_bytes(
+        SingleSpike.apply, v_mem, 1.0, compact_grad_fn
+    )
+    (grad_compact,) = torch.autograd.grad(spikes_compact, v_mem, grad_output)
+
+    assert torch.equal(spikes, spikes_compact)
+    assert compact_bytes <= max_memory_ratio * full_bytes
+    assert torch.allclose(grad_compact, grad, rtol=1e-3, atol=tolerance + 1e-5)
+
+
+def test_compact_surrogate_in_layer():
+    import torch
+
+    import sinabs.layers as sl
+    from sinabs.activation import CompactSurrogate, Heaviside
+
+    torch.manual_seed(0)
+    data = torch.rand(2, 50, 16)
+    grads = []
+    for grad_fn in (Heaviside(0.5), CompactSurrogate(Heaviside(0.5))):
+        layer = sl.ALIF(tau_mem=10.0, tau_adapt=20.0, surrogate_grad_fn=grad_fn)
+        weight = torch.ones(16, requires_grad=True)
+        layer(data * weight).sum().backward()
+        grads.append(weight.grad)
+    assert torch.allclose(*grads)
+
+
+@pytest.mark.parametrize("layer_type", ["iaf", "iaf_reset", "lif"])
+def test_compact_surrogate_lif_iaf(layer_type):
+    import torch
+
+    import sinabs.layers as sl
+    from sinabs.activation import CompactSurrogate, Heaviside, MembraneReset
+
+    def make_layer(grad_fn):
+        if layer_type == "iaf":
+            return sl.IAF(surrogate_grad_fn=grad_fn)
+        if layer_type == "iaf_reset":
+            return sl.IAF(
+                surrogate_grad_fn=grad_fn, reset_fn=MembraneReset(), min_v_mem=-0.5
+            )
+        layer = sl.LIF(tau_mem=10.0, surrogate_grad_fn=grad_fn)
+        # Without trained time constants, the membrane potential does not need to be saved
+        layer.tau_mem.requires_grad_(False)
+        return layer
+
+    torch.manual_seed(0)
+    data = torch.rand(2, 50, 16) * 2 - 0.5
+    grads = []
+    memory = []
+    for grad_fn in (Heaviside(0.5), CompactSurrogate(Heaviside(0.5))):
+        weight = torch.ones(16, requires_grad=True)
+        output, n_bytes = saved_bytes(make_layer(grad_fn), data * weight)
+        output.sum().backward()
+        grads.append(weight.grad)
+        memory.append(n_bytes)
+    assert torch.allclose(*grads)
+    if layer_type == "iaf_reset":
+        # Masks of spiking and clipped neurons are saved in addition
+        assert memory[1] <= memory[0]
+    else:
+        assert memory[1] < 0.6 * memory[0]
+
+
+def test_compact_surrogate_trained_tau():
+    import torch
+
+    import sinabs.layers as sl
+    from sinabs.activation import CompactSurrogate
+
+    layer = sl.LIF(tau_mem=10.0, surrogate_grad_fn=CompactSurrogate())
+    with pytest.warns(UserWarning):
+        layer(torch.rand(2, 10, 4, requires_grad=True)).sum().backward()
@@ -0,0 +1,168 @@
+import copy
+
+import numpy as np
+import pytest
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+import torch.nn as nn
+
+import sinabs
+import sinabs.layers as sl
+from sinabs.training import (
+    exclude_states_from_ddp,
+    prefetch,
+    time_windows,
+    train_truncated_bptt,
+)
+
+
+def make_model():
+    torch.manual_seed(0)
+    return nn.Sequential(
+        nn.Linear(2, 8),
+        sl.LIF(tau_mem=10.0),
+        nn.Linear(8, 3),
+        sl.LIF(tau_mem=10.0, spike_fn=None),
+    )
+
+
+def test_time_windows():
+    data = np.random.rand(2, 10, 3).astype(np.float32)
+    target = torch.rand(2, 10)
+    windows = list(time_windows(data, 4, target, target_per_step=True))
+    assert [w.shape[1] for w, _ in windows] == [4, 4, 2]
+    assert all(isinstance(w, torch.Tensor) for w, _ in windows)
+    assert torch.equal(torch.cat([w for w, _ in windows], 1), torch.from_numpy(data))
+    assert torch.equal(torch.cat([t for _, t in windows], 1), target)
+
+    # Target without time dimension is passed unchanged
+    label = torch.tensor([0, 1])
+    assert all(t is label for _, t in time_windows(data, 4, label))
+
+
+def test_prefetch():
+    items = [(torch.full((2,), i), i) for i in range(5)]
+    assert [item[1] for item in prefetch(items)] == list(range(5))
+
+    def failing():
+        yield torch.zeros(1)
+        raise RuntimeError("Loading failed")
+
+    with pytest.raises(RuntimeError, match="Loading failed"):
+        list(prefetch(failing()))
+
+
+def test_detach_states():
+    model = make_model()
+    data = torch.rand(2, 5, 2)
+    model(data)
+    assert model[1].v_mem.grad_fn is not None
+
+    v_mem = model[1].v_mem.clone()
+    sinabs.detach_states(model)
+    assert model[1].v_mem.grad_fn is None
+    assert torch.equal(model[1].v_mem, v_mem)
+
+
+@pytest.mark.parametrize("prefetch_windows", (True, False))
+def test_train_truncated_bptt(prefetch_windows):
+    data = torch.rand(2, 50, 2) * 2
+    target = torch.rand(2, 50, 3)
+
+    def loss_fn(output, target):
+        return ((output - target) ** 2).mean()
+
+    # Without parameter updates, window losses match a forward pass over the full sequence
+    model = make_model()
+    optimizer = torch.optim.SGD(model.parameters(), lr=0.0)
+    losses = train_truncated_bptt(
+        model,
+        time_windows(data, 16, target, target_per_step=True),
+        loss_fn,
+        optimizer,
+        prefetch_windows=prefetch_windows,
+    )
+    assert len(losses) == 4
+    assert model[1].v_mem.grad_fn is None
+
+    sinabs.reset_states(model)
+    with torch.no_grad():
+        output = model(data)
+    losses_ref = [
+        loss_fn(output[:, start : start + 16], target[:, start : start + 16]).item()
+        for start in range(0, 50, 16)
+    ]
+    assert np.allclose(losses, losses_ref)
+
+    # Parameters are updated after each window
+    model = make_model()
+    weight = model[0].weight.clone()
+    optimizer = torch.optim.SGD(model.parameters(), lr=0.1)
+    train_truncated_bptt(
+        model,
+        time_windows(data, 16, target, target_per_step=True),
+        loss_fn,
+        optimizer,
+        prefetch_windows=prefetch_windows,
+    )
+    assert not torch.equal(model[0].weight, weight)
+
+
+def test_exclude_states_from_ddp():
+    model = make_model()
+    state_names = exclude_states_from_ddp(model)
+    assert state_names == ["1.v_mem", "3.v_mem"]
+    assert sorted(model._ddp_params_and_buffers_to_ignore) == state_names
+
+
+def train_ddp(rank, world_size, init_file, results_dir):
+    dist.init_process_group(
+        "gloo", init_method=f"file://{init_file}", rank=rank, world_size=world_size
+    )
+    # Different batch sizes per rank, so that states have different shapes
+    torch.manual_seed(rank)
+    data = torch.rand(2 + rank, 21, 2)
+    target = torch.rand(2 + rank, 20, 3)
+
+    model = make_model()
+    # States are initialized before wrapping, e.g. by a warm-up
+    with torch.no_grad():
+        model(data[:, :1])
+    data = data[:, 1:]
+    exclude_states_from_ddp(model)
+    ddp_model = nn.parallel.DistributedDataParallel(model)
+    optimizer = torch.optim.SGD(ddp_model.parameters(), lr=0.1)
+    for window, window_target in time_windows(data, 10, target, target_per_step=True):
+        reference = copy.deepcopy(model)
+        optimizer.zero_grad()
+        output = ddp_model(window)
+        # States are neither broadcast from rank 0 nor changed in any other way
+        assert torch.allclose(output, reference(window))
+        for layer, reference_layer in zip(model, reference):
+            for name, state in layer.named_buffers():
+                assert torch.equal(state, getattr(reference_layer, name))
+        nn.functional.mse_loss(output, window_target).backward()
+        optimizer.step()
+        sinabs.detach_states(model)
+    torch.save(model.state_dict(), f"{results_dir}/rank{rank}.pt")
+    dist.destroy_process_group()
+
+
+@pytest.mark.skipif(not dist.is_gloo_available(), reason="Requires gloo backend")
+def test_ddp_training(tmp_path):
+    world_size = 2
+    mp.spawn(
+        train_ddp,
+        args=(world_size, tmp_path / "init", tmp_path),
+        nprocs=world_size,
+        join=True,
+    )
+    results = [torch.load(tmp_path / f"rank{r}.pt") for r in range(world_size)]
+    initial = make_model()
+    # Parameters are trained and stay in sync
+    assert not torch.equal(results[0]["0.weight"], initial[0].weight)
+    for name, _ in initial.named_parameters():
+        assert torch.equal(results[0][name], results[1][name])
+    for rank, result in enumerate(results):
+        assert result["1.v_mem"].shape == (2 + rank, 8)
@@ -1,3 +1,4 @@
+import pytest
 import torch
 import torch.nn as nn
 
@@ -50,3 +51,69 @@ def test_zero_grad():
     sinabs.zero_grad(model)
     assert model.net[1].v_mem.grad_fn is None
     assert model.net[1].v_mem.sum() != 0
+
+
+def test_snapshot_restore_states():
+    model = SNN()
+    data = torch.rand(3, 10, 2)
+    with torch.no_grad():
+        model(data)
+        snapshot = sinabs.utils.snapshot_states(model)
+        output = model(data)
+        sinabs.reset_states(model)
+        sinabs.utils.restore_states(model, snapshot)
+        assert torch.equal(model(data), output)
+
+        # Snapshots are copies, which can be restored several times
+        v_mem = model.spike_output.v_mem
+        sinabs.reset_states(model)
+        assert model.spike_output.v_mem is v_mem
+        sinabs.utils.restore_states(model, snapshot)
+        assert model.spike_output.v_mem is v_mem
+        assert torch.equal(model(data), output)
+
+        # Without copying, the layers modify the snapshot in place
+        sinabs.utils.restore_states(model, snapshot, copy=False)
+        sinabs.reset_states(model)
+        with pytest.raises(RuntimeError):
+            sinabs.utils.restore_states(model, snapshot)
+
+
+def test_snapshot_states_arena():
+    model = SNN()
+    arena = sinabs.StateArena(model)
+    data = torch.rand(3, 10, 2)
+    with torch.no_grad():
+        model(data)
+        snapshot = sinabs.utils.snapshot_states(model)
+        output = model(data)
+        # The arena writes states in place
+        model(data)
+        sinabs.utils.restore_states(model, snapshot)
+        assert torch.equal(model(data), output)
+    assert arena.memory == sum(b.numel() * b.element_size() for b in model.buffers())
+
+
+def test_save_load_states(tmp_path):
+    model = SNN()
+    data = torch.rand(3, 10, 2)
+    with torch.no_grad():
+        model(data)
+        sinabs.utils.save_states(model, tmp_path / "states.pt")
+        output = model(data)
+
+        new_model = SNN()
+        new_model.load_state_dict(model.state_dict())
+        sinabs.utils.load_states(new_model, tmp_path / "states.pt")
+        assert new_model.spike_output.v_mem.shape == (3, 5)
+        assert torch.equal(new_model(data), output)
+
+
+def test_load_state_dict_with_initialized_states():
+    model = SNN()
+    with torch.no_grad():
+        model(torch.rand(3, 10, 2))
+    new_model = SNN()
+    new_model.load_state_dict(model.state_dict())
+    for buffer, new_buffer in zip(model.buffers(), new_model.buffers()):
+        assert torch.equal(buffer, new_buffer)